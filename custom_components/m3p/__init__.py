@@ -8,9 +8,12 @@ from homeassistant.components import mqtt
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import CONF_HUB, DOMAIN
+from .services import async_setup_services
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
@@ -21,6 +24,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Mellow MQTT Media component."""
     config_domains = list(config.keys()) if isinstance(config, dict) else []
     _LOGGER.info("[m3p] async_setup invoked (config_domains=%s)", config_domains)
+    async_setup_services(hass)
     return True
 
 
@@ -42,6 +46,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         return False
     _LOGGER.info("[m3p] MQTT client ready for entry_id=%s", entry.entry_id)
 
+    if entry.data.get(CONF_HUB):
+        await _async_adopt_player_entries(hass, entry)
+
     # Forward the entry setup to the media_player platform
     # Entity creation happens directly in media_player.async_setup_entry
     await hass.config_entries.async_forward_entry_setups(entry, ["media_player"])
@@ -54,6 +61,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_adopt_player_entries(hass: HomeAssistant, hub: ConfigEntry) -> None:
+    """Move per-player entries onto the hub, keeping their registry entries.
+
+    Entities and devices are reassigned before the old entries are removed, so
+    the hub's entities reuse the same entity_ids and customizations.
+    """
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.entry_id == hub.entry_id:
+            continue
+        for entity in er.async_entries_for_config_entry(
+            entity_registry, entry.entry_id
+        ):
+            entity_registry.async_update_entity(
+                entity.entity_id, config_entry_id=hub.entry_id
+            )
+        for device in dr.async_entries_for_config_entry(
+            device_registry, entry.entry_id
+        ):
+            device_registry.async_update_device(
+                device.id, add_config_entry_id=hub.entry_id
+            )
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+        _LOGGER.info(
+            "[m3p] Hub adopted player entry (hub_entry_id=%s, entry_id=%s, title=%s)",
+            hub.entry_id,
+            entry.entry_id,
+            entry.title,
+        )
+        await hass.config_entries.async_remove(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.info("[m3p] async_unload_entry start (entry_id=%s)", entry.entry_id)
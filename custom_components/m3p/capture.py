@@ -0,0 +1,166 @@
+"""Offline capture of Mellow MQTT player traffic.
+
+While a capture runs, every message an m3p player receives and every command
+it publishes is appended to a JSON Lines file, one record per message::
+
+    {"ts": 1735689600.25, "dir": "rx", "entity": "media_player.kitchen",
+     "key": "state_topic", "topic": "kitchen/state", "qos": 0,
+     "retain": false, "len": 7, "payload": "playing"}
+
+``key`` is the config option the topic was subscribed for, so the
+traffic analyzer can tell what each topic carries.
+
+With ``payloads: hash`` the payload is replaced by a short ``hash`` of it.
+The event loop only enqueues; formatting, hashing and disk writes happen on
+a writer thread.
+"""
+
+from __future__ import annotations
+
+import base64
+from collections.abc import Callable
+from hashlib import blake2b
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, TextIO
+
+from homeassistant.util.hass_dict import HassKey
+
+from .const import CAPTURE_QUEUE_SIZE, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CAPTURE: HassKey[TrafficCapture] = HassKey(f"{DOMAIN}_capture")
+
+PAYLOADS_FULL = "full"
+PAYLOADS_HASH = "hash"
+
+# Seconds the writer waits for records before flushing what it has
+_FLUSH_INTERVAL = 1.0
+_STOP = object()
+
+
+class TrafficCapture:
+    """Append-only traffic recorder with a background writer thread."""
+
+    def __init__(self, path: str, payloads: str) -> None:
+        """Initialize the capture; call start() to begin writing."""
+        self.path = path
+        self.payloads = payloads
+        self.recorded = 0
+        # Counted on the event loop (queue full) and the writer (bad record)
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        # Removes the shutdown listener that stops an abandoned capture
+        self.unsub_shutdown: Callable[[], None] | None = None
+        self._queue: queue.Queue[Any] = queue.Queue(CAPTURE_QUEUE_SIZE)
+        self._thread = threading.Thread(
+            target=self._run, name=f"{DOMAIN}_capture", daemon=True
+        )
+
+    @property
+    def dropped(self) -> int:
+        """Return how many records were dropped."""
+        with self._dropped_lock:
+            return self._dropped
+
+    def _count_dropped(self) -> None:
+        with self._dropped_lock:
+            self._dropped += 1
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush outstanding records and stop the writer; blocks until done."""
+        # A writer that failed to open the file has already exited
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def record(
+        self,
+        direction: str,
+        entity_id: str | None,
+        topic: str,
+        payload: Any,
+        qos: int,
+        retain: bool,
+        key: str | None = None,
+    ) -> None:
+        """Queue one message; never blocks. Records are dropped when full."""
+        try:
+            self._queue.put_nowait(
+                (time.time(), direction, entity_id, key, topic, payload, qos, retain)
+            )
+        except queue.Full:
+            self._count_dropped()
+
+    def _run(self) -> None:
+        try:
+            with open(self.path, "a", encoding="utf-8") as file:
+                self._write_until_stopped(file)
+        except OSError:
+            _LOGGER.exception("[m3p] Traffic capture to %s failed", self.path)
+
+    def _write_until_stopped(self, file: TextIO) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=_FLUSH_INTERVAL)
+            except queue.Empty:
+                file.flush()
+                continue
+            if item is _STOP:
+                return
+            try:
+                line = json.dumps(self._format(*item), separators=(",", ":"))
+            except Exception:
+                # One bad record must not stop the writer and fill the queue
+                _LOGGER.exception("[m3p] Traffic capture could not format %s", item)
+                self._count_dropped()
+                continue
+            file.write(line)
+            file.write("\n")
+            self.recorded += 1
+
+    def _format(
+        self,
+        ts: float,
+        direction: str,
+        entity_id: str | None,
+        key: str | None,
+        topic: str,
+        payload: Any,
+        qos: int,
+        retain: bool,
+    ) -> dict[str, Any]:
+        if isinstance(payload, str):
+            raw = payload.encode("utf-8")
+        elif isinstance(payload, (bytes, bytearray, memoryview)):
+            raw = bytes(payload)
+        elif payload is None:
+            raw = b""
+        else:
+            raw = str(payload).encode("utf-8")
+        record: dict[str, Any] = {
+            "ts": round(ts, 6),
+            "dir": direction,
+            "entity": entity_id,
+            "key": key,
+            "topic": topic,
+            "qos": qos,
+            "retain": retain,
+            "len": len(raw),
+        }
+        if self.payloads == PAYLOADS_HASH:
+            record["hash"] = blake2b(raw, digest_size=8).hexdigest()
+        else:
+            try:
+                record["payload"] = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                record["payload_b64"] = base64.b64encode(raw).decode("ascii")
+        return record
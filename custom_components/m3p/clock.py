@@ -0,0 +1,59 @@
+"""Device clock handling for Mellow MQTT players."""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import UTC, datetime, timedelta
+
+from homeassistant.util.dt import parse_datetime
+
+# Epoch values above this are taken to be milliseconds
+_EPOCH_MS_THRESHOLD = 1e11
+
+
+def parse_device_timestamp(value: object) -> datetime | None:
+    """Parse a device timestamp: epoch seconds/milliseconds or ISO 8601.
+
+    Binary encodings can carry a native datetime, which is passed through.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            parsed = parse_datetime(value)
+            if parsed is not None and parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=UTC)
+            return parsed
+    if isinstance(value, (int, float)):
+        if value > _EPOCH_MS_THRESHOLD:
+            value /= 1000
+        try:
+            return datetime.fromtimestamp(value, UTC)
+        except (OverflowError, OSError, ValueError):
+            return None
+    return None
+
+
+class ClockOffsetEstimator:
+    """Estimate the offset between a device's clock and ours.
+
+    Each sample is ``received - device_time``: the clock offset plus that
+    message's transit and queueing delay. The minimum over a sliding window
+    is the sample with the least delay, so it tracks the clock offset without
+    the jitter of any single message.
+    """
+
+    __slots__ = ("_samples",)
+
+    def __init__(self, window: int) -> None:
+        """Initialize the estimator."""
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def to_local(self, device_time: datetime, received: datetime) -> datetime:
+        """Record a sample and return ``device_time`` on our clock."""
+        self._samples.append((received - device_time).total_seconds())
+        return device_time + timedelta(seconds=min(self._samples))
@@ -0,0 +1,48 @@
+"""Decoding of combined state payloads for Mellow MQTT players."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import cbor2
+import msgpack
+
+from homeassistant.util.json import json_loads
+
+from .const import ENCODING_CBOR, ENCODING_JSON, ENCODING_MSGPACK
+from .payload import decode_text
+
+
+def decode_combined_state(payload: bytes, encoding: str) -> dict[str, Any]:
+    """Decode a combined state message straight from the payload bytes.
+
+    Byte-string keys and values, which CBOR and MessagePack can carry, are
+    decoded as UTF-8 like text topics. CBOR also allows keys of other types,
+    such as integers; those are dropped, as no field is named by them. Raises
+    ValueError when the payload is malformed or is not a map.
+    """
+    try:
+        if encoding == ENCODING_CBOR:
+            data = cbor2.loads(payload)
+        elif encoding == ENCODING_MSGPACK:
+            # Timestamp extension values arrive as aware datetimes
+            data = msgpack.unpackb(payload, timestamp=3)
+        elif encoding == ENCODING_JSON:
+            data = json_loads(payload)
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+    except msgpack.UnpackException as err:
+        raise ValueError(str(err)) from err
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a map, got {type(data).__name__}")
+    decoded = {}
+    for key, value in data.items():
+        if isinstance(key := _decode_bytes(key), str):
+            decoded[key] = _decode_bytes(value)
+    return decoded
+
+
+def _decode_bytes(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return decode_text(value)
+    return value
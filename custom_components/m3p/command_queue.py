@@ -0,0 +1,92 @@
+"""Outbound command queue for Mellow MQTT players while MQTT is down."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import count
+
+from .const import (
+    ACTION_PAUSE,
+    ACTION_PLAY,
+    ACTION_SEEK,
+    ACTION_STOP,
+    ACTION_VOLUME_MUTE,
+    ACTION_VOLUME_SET,
+)
+
+# Commands sharing a key supersede each other: only the latest is sent.
+# Track skips are cumulative, so they are never collapsed. Group topic
+# commands reach other players too, so they only collapse with each other.
+COLLAPSE_KEYS = {
+    ACTION_PLAY: "transport",
+    ACTION_PAUSE: "transport",
+    ACTION_STOP: "transport",
+    ACTION_SEEK: ACTION_SEEK,
+    ACTION_VOLUME_SET: ACTION_VOLUME_SET,
+    ACTION_VOLUME_MUTE: ACTION_VOLUME_MUTE,
+}
+
+
+@dataclass(slots=True)
+class QueuedCommand:
+    """A command waiting for MQTT to come back."""
+
+    action: str
+    topic: str
+    payload: str
+    qos: int
+    retain: bool
+    queued_at: float
+    group: bool = False
+
+
+class CommandQueue:
+    """Bounded, collapsing FIFO of commands with a time-to-live.
+
+    Times are ``time.monotonic()`` values supplied by the caller. ``ttl`` may
+    be changed at any time; a ttl of 0 means commands should not be queued.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Initialize an empty queue."""
+        self._max_size = max_size
+        self.ttl = ttl
+        self._commands: OrderedDict[str | int, QueuedCommand] = OrderedDict()
+        self._ids = count()
+
+    def __len__(self) -> int:
+        """Return the number of queued commands."""
+        return len(self._commands)
+
+    def push(self, command: QueuedCommand) -> list[QueuedCommand]:
+        """Queue a command and return any commands it displaced.
+
+        A superseded command is replaced and the replacement moves to the
+        back, so the queue stays in the order the user acted. When full, the
+        oldest command is dropped.
+        """
+        dropped = []
+        key = COLLAPSE_KEYS.get(command.action) or next(self._ids)
+        if command.group and isinstance(key, str):
+            key = f"group_{key}"
+        if (previous := self._commands.pop(key, None)) is not None:
+            dropped.append(previous)
+        self._commands[key] = command
+        while len(self._commands) > self._max_size:
+            dropped.append(self._commands.popitem(last=False)[1])
+        return dropped
+
+    def drain(self, now: float) -> list[QueuedCommand]:
+        """Remove and return every command that has not expired, in order."""
+        commands = [
+            command
+            for command in self._commands.values()
+            if now - command.queued_at <= self.ttl
+        ]
+        self._commands.clear()
+        return commands
+
+    def clear(self) -> None:
+        """Drop every queued command."""
+        self._commands.clear()
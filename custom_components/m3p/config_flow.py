@@ -4,11 +4,18 @@ from __future__ import annotations
 
 import json
 import logging
+from typing import Any
 
 from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
 from homeassistant.helpers.service_info.mqtt import MqttServiceInfo
 
-from .const import DOMAIN
+from .const import CONF_HUB, DOMAIN, HUB_UNIQUE_ID
+from .discovery import (
+    discovery_device_name,
+    discovery_unique_id,
+    expand_discovery_payload,
+    is_device_payload,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,6 +44,28 @@ class MqttMediaPlayerConfigFlow(ConfigFlow, domain=DOMAIN):
 
         return f"{raw_payload[:limit]}...(truncated {len(raw_payload)} chars)"
 
+    def _hub_entry_exists(self) -> bool:
+        """Return True when a hub entry already owns discovered players."""
+        return any(
+            entry.data.get(CONF_HUB)
+            for entry in self._async_current_entries(include_ignore=False)
+        )
+
+    async def async_step_user(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Create a hub entry that owns every discovered player."""
+        await self.async_set_unique_id(HUB_UNIQUE_ID)
+        self._abort_if_unique_id_configured()
+
+        if user_input is None:
+            return self.async_show_form(step_id="user")
+
+        _LOGGER.info("[m3p] Creating hub config entry")
+        return self.async_create_entry(
+            title="Mellow MQTT Media Hub", data={CONF_HUB: True}
+        )
+
     async def async_step_mqtt(
         self, discovery_info: MqttServiceInfo
     ) -> ConfigFlowResult:
@@ -67,6 +96,10 @@ class MqttMediaPlayerConfigFlow(ConfigFlow, domain=DOMAIN):
                         return self.async_abort(reason="removed")
                 return self.async_abort(reason="empty_payload")
 
+            if self._hub_entry_exists():
+                # The hub subscribes to discovery itself
+                return self.async_abort(reason="hub_managed")
+
             payload = json.loads(discovery_info.payload)
         except (json.JSONDecodeError, ValueError) as err:
             _LOGGER.info(
@@ -76,8 +109,27 @@ class MqttMediaPlayerConfigFlow(ConfigFlow, domain=DOMAIN):
             )
             return self.async_abort(reason="invalid_payload")
 
+        if not isinstance(payload, dict):
+            return self.async_abort(reason="invalid_payload")
+
+        # Device payloads carry several players; all of them share one entry
+        if is_device_payload(payload):
+            components = expand_discovery_payload(payload)
+            if not components:
+                _LOGGER.info(
+                    "[m3p] Device payload has no media_player components (topic=%s)",
+                    discovery_info.topic,
+                )
+                return self.async_abort(reason="no_media_players")
+            _LOGGER.info(
+                "[m3p] Device payload with %s media_player components (topic=%s, components=%s)",
+                len(components),
+                discovery_info.topic,
+                sorted(components),
+            )
+
         # Extract unique identifier from payload
-        unique_id = payload.get("unique_id")
+        unique_id = discovery_unique_id(payload)
         if not unique_id:
             _LOGGER.info(
                 "[m3p] Discovery payload missing unique_id (topic=%s, keys=%s)",
@@ -104,9 +156,7 @@ class MqttMediaPlayerConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
         # Create device-specific config entry
-        device_name = payload.get("name", "Mellow MQTT Device")
-        if device_info := payload.get("device"):
-            device_name = device_info.get("name", device_name)
+        device_name = discovery_device_name(payload, "Mellow MQTT Device")
 
         _LOGGER.info(
             "[m3p] Creating/Updating config entry for unique_id=%s (device_name=%s, entry_title=%s)",
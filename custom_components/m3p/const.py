@@ -7,11 +7,14 @@ CONF_MEDIA_ARTIST_TOPIC = "media_artist_topic"
 CONF_MEDIA_DURATION_TOPIC = "media_duration_topic"
 CONF_MEDIA_IMAGE_URL_TOPIC = "media_image_url_topic"
 CONF_MEDIA_POSITION_TOPIC = "media_position_topic"
+CONF_MEDIA_POSITION_TIMESTAMP_TOPIC = "media_position_timestamp_topic"
 CONF_MEDIA_TITLE_TOPIC = "media_title_topic"
 CONF_NEXT_TRACK_TOPIC = "next_track_topic"
 CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC = "media_image_remotely_accessible_topic"
 CONF_PAUSE_TOPIC = "pause_topic"
 CONF_PLAY_TOPIC = "play_topic"
+CONF_PLAY_MEDIA_TOPIC = "play_media_topic"
+CONF_POSITION_INTERVAL_COMMAND_TOPIC = "position_interval_command_topic"
 CONF_PREVIOUS_TRACK_TOPIC = "previous_track_topic"
 CONF_SEEK_TOPIC = "seek_topic"
 CONF_STOP_TOPIC = "stop_topic"
@@ -19,3 +22,131 @@ CONF_VOLUME_LEVEL_TOPIC = "volume_level_topic"
 CONF_VOLUME_MUTE_TOPIC = "volume_mute_topic"
 CONF_VOLUME_SET_TOPIC = "volume_set_topic"
 CONF_VOLUME_STEP = "volume_step"
+CONF_COMMAND_TOPIC = "command_topic"
+CONF_COMMAND_ACTIONS = "command_actions"
+CONF_COMMAND_SEQUENCE = "command_sequence"
+CONF_COMMAND_ACK_TOPIC = "command_ack_topic"
+CONF_COMMAND_OPTIONS = "command_options"
+CONF_AWAIT_ACK = "await_ack"
+CONF_COMMAND_QUEUE_TTL = "command_queue_ttl"
+CONF_GROUP_COMMAND_TOPIC = "group_command_topic"
+CONF_RESTORE_STATE = "restore_state"
+CONF_RECONNECT_QUIET_WINDOW = "reconnect_quiet_window"
+CONF_TOPIC_RATE_LIMIT = "topic_rate_limit"
+CONF_ENTITY_RATE_LIMIT = "entity_rate_limit"
+CONF_DYNAMIC_SUBSCRIPTIONS = "dynamic_subscriptions"
+CONF_POSITION_INTERVAL_WATCHED = "position_interval_watched"
+CONF_POSITION_INTERVAL_UNWATCHED = "position_interval_unwatched"
+CONF_LIBRARY_INDEX_TOPIC = "library_index_topic"
+CONF_LIBRARY_DELTA_TOPIC = "library_delta_topic"
+CONF_QUEUE_TOPIC = "queue_topic"
+CONF_QUEUE_DELTA_TOPIC = "queue_delta_topic"
+CONF_COMBINED_STATE_TOPIC = "combined_state_topic"
+CONF_COMBINED_STATE_ENCODING = "combined_state_encoding"
+CONF_REFRESH_COMMAND_TOPIC = "refresh_command_topic"
+CONF_UNRECORDED_ATTRIBUTES = "unrecorded_attributes"
+CONF_RECORDED_ATTRIBUTES = "recorded_attributes"
+CONF_STATE_VALUE_TEMPLATE = "state_value_template"
+CONF_VOLUME_LEVEL_VALUE_TEMPLATE = "volume_level_value_template"
+CONF_MEDIA_TITLE_VALUE_TEMPLATE = "media_title_value_template"
+CONF_MEDIA_ARTIST_VALUE_TEMPLATE = "media_artist_value_template"
+CONF_MEDIA_ALBUM_NAME_VALUE_TEMPLATE = "media_album_name_value_template"
+CONF_MEDIA_DURATION_VALUE_TEMPLATE = "media_duration_value_template"
+CONF_MEDIA_POSITION_VALUE_TEMPLATE = "media_position_value_template"
+CONF_MEDIA_IMAGE_URL_VALUE_TEMPLATE = "media_image_url_value_template"
+
+# Hub mode: a single config entry that owns every discovered player
+CONF_HUB = "hub"
+HUB_UNIQUE_ID = "m3p_hub"
+HUB_DISCOVERY_TOPIC = "homeassistant/media_player/#"
+# Discovery messages are collected for this long (seconds) and then added in
+# one batch, so a burst of retained configs becomes a single add_entities call
+HUB_BATCH_DELAY = 0.5
+HUB_BATCH_SIZE = 100
+
+# Upper bound (seconds) on how long messages are buffered after a reconnect,
+# even if the retained burst never goes quiet
+RECONNECT_SETTLE_MAX_SECONDS = 5.0
+
+# Ingress rate limiting: buckets hold this many seconds' worth of tokens
+RATE_LIMIT_BURST_SECONDS = 2.0
+# A player whose messages were rate limited this many times within the window
+# (seconds) gets a repair issue
+NOISY_DEVICE_THRESHOLD = 300
+NOISY_DEVICE_WINDOW_SECONDS = 60.0
+
+# Encodings accepted on combined_state_topic
+ENCODING_JSON = "json"
+ENCODING_CBOR = "cbor"
+ENCODING_MSGPACK = "msgpack"
+COMBINED_STATE_ENCODINGS = (ENCODING_JSON, ENCODING_CBOR, ENCODING_MSGPACK)
+
+# Player states in which metadata topics carry updates (dynamic subscriptions)
+ACTIVE_STATES = frozenset({"playing", "paused", "buffering"})
+
+# How often (seconds) to re-check whether anything watches a player, for
+# position_interval_command_topic; websocket connects/disconnects also trigger
+# a check
+POSITION_WATCH_CHECK_SECONDS = 60
+
+# The MQTT client batches subscriptions (for up to 1 s after connecting), so
+# refresh requests, and the end of a settle, wait at least this long
+# (seconds) for them to reach the broker
+REFRESH_DELAY_SECONDS = 1.5
+
+# Position samples used for the sliding-minimum device clock offset estimate
+CLOCK_OFFSET_WINDOW = 30
+
+# Actions published on the multiplexed command_topic
+ACTION_PLAY = "play"
+ACTION_PAUSE = "pause"
+ACTION_STOP = "stop"
+ACTION_NEXT_TRACK = "next_track"
+ACTION_PREVIOUS_TRACK = "previous_track"
+ACTION_SEEK = "seek"
+ACTION_VOLUME_SET = "volume_set"
+ACTION_VOLUME_MUTE = "volume_mute"
+ACTION_PLAY_MEDIA = "play_media"
+COMMAND_ACTIONS = (
+    ACTION_PLAY,
+    ACTION_PAUSE,
+    ACTION_STOP,
+    ACTION_NEXT_TRACK,
+    ACTION_PREVIOUS_TRACK,
+    ACTION_SEEK,
+    ACTION_VOLUME_SET,
+    ACTION_VOLUME_MUTE,
+    ACTION_PLAY_MEDIA,
+)
+# Enabled unless command_actions says otherwise; play_media needs a library
+# on the device, so it is opt-in
+DEFAULT_COMMAND_ACTIONS = tuple(
+    action for action in COMMAND_ACTIONS if action != ACTION_PLAY_MEDIA
+)
+# Sequence numbers awaiting an ack on command_ack_topic
+COMMAND_PENDING_ACKS = 32
+# Commands held per player while MQTT is disconnected
+COMMAND_QUEUE_SIZE = 20
+
+# Library items listed per browse page; larger folders end in a "More" item
+LIBRARY_BROWSE_PAGE_SIZE = 500
+
+# Messages waiting for the traffic capture writer thread; beyond this they
+# are dropped rather than let the capture fall behind without bound
+CAPTURE_QUEUE_SIZE = 10000
+
+# Metadata strings shared by all players; longer values, such as data URI
+# artwork, are kept per player
+INTERN_TABLE_SIZE = 2048
+INTERN_MAX_LENGTH = 512
+
+# Services
+SERVICE_GROUP_COMMAND = "group_command"
+SERVICE_GET_QUEUE = "get_queue"
+SERVICE_REFRESH = "refresh"
+SERVICE_CAPTURE_START = "capture_start"
+SERVICE_CAPTURE_STOP = "capture_stop"
+ATTR_ACTION = "action"
+ATTR_VALUE = "value"
+ATTR_PATH = "path"
+ATTR_PAYLOADS = "payloads"
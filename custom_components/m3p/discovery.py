@@ -0,0 +1,175 @@
+"""Helpers for Mellow MQTT discovery payloads."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.components.media_player.const import (
+    DOMAIN as MEDIA_PLAYER_DOMAIN,
+)
+from homeassistant.components.mqtt.abbreviations import (
+    ABBREVIATIONS,
+    DEVICE_ABBREVIATIONS,
+    ORIGIN_ABBREVIATIONS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Device-level discovery: one payload describes a device and its components.
+# Both the long and the abbreviated keys used by HA's MQTT discovery are
+# accepted.
+COMPONENTS_KEYS = ("components", "cmps")
+DEVICE_KEYS = ("device", "dev")
+PLATFORM_KEYS = ("platform", "p")
+TOPIC_BASE = "~"
+
+
+def _first(payload: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        if key in payload:
+            return payload[key]
+    return None
+
+
+def _expand_keys(config: dict[str, Any]) -> dict[str, Any]:
+    """Expand abbreviated keys, as HA's MQTT discovery does."""
+    expanded = {ABBREVIATIONS.get(key, key): value for key, value in config.items()}
+    for key, abbreviations in (
+        ("device", DEVICE_ABBREVIATIONS),
+        ("origin", ORIGIN_ABBREVIATIONS),
+    ):
+        if isinstance(nested := expanded.get(key), dict):
+            expanded[key] = {
+                abbreviations.get(name, name): value for name, value in nested.items()
+            }
+    if isinstance(availability := expanded.get("availability"), list):
+        expanded["availability"] = [
+            {ABBREVIATIONS.get(name, name): value for name, value in entry.items()}
+            if isinstance(entry, dict)
+            else entry
+            for entry in availability
+        ]
+    return expanded
+
+
+def _apply_topic_base(config: dict[str, Any]) -> dict[str, Any]:
+    """Replace a leading or trailing ``~`` in topics with the ``~`` option."""
+    base = config.pop(TOPIC_BASE, None)
+    if not isinstance(base, str):
+        return config
+
+    def expand(topic: Any) -> Any:
+        if not isinstance(topic, str) or not topic:
+            return topic
+        if topic[0] == TOPIC_BASE:
+            topic = f"{base}{topic[1:]}"
+        if topic[-1] == TOPIC_BASE:
+            topic = f"{topic[:-1]}{base}"
+        return topic
+
+    for key, value in config.items():
+        if key.endswith("topic"):
+            config[key] = expand(value)
+    if isinstance(availability := config.get("availability"), list):
+        # Entries may be shared with other components: replace, don't mutate
+        config["availability"] = [
+            {**entry, "topic": expand(entry["topic"])}
+            if isinstance(entry, dict) and "topic" in entry
+            else entry
+            for entry in availability
+        ]
+    return config
+
+
+def is_device_payload(payload: dict[str, Any]) -> bool:
+    """Return True for a device-level payload with a components mapping."""
+    return isinstance(_first(payload, COMPONENTS_KEYS), dict)
+
+
+def expand_discovery_payload(payload: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Split a discovery payload into one config per media player.
+
+    Abbreviated keys (``uniq_id``, ``stat_t``, ``dev``, ...) are expanded and
+    the ``~`` topic base is applied, as HA's MQTT discovery does. A
+    single-component payload is returned under the key ``""``. For a device
+    payload, each media_player component is merged over the shared top-level
+    options (including ``~``) and given the shared device info, keyed by its
+    component id. Components for other platforms, or without a unique_id,
+    are skipped.
+    """
+    if not is_device_payload(payload):
+        return {"": _apply_topic_base(_expand_keys(payload))}
+
+    skip = {*COMPONENTS_KEYS, *DEVICE_KEYS}
+    shared = _expand_keys(
+        {key: value for key, value in payload.items() if key not in skip}
+    )
+    device = _first(payload, DEVICE_KEYS)
+    if isinstance(device, dict):
+        device = _expand_keys({"device": device})["device"]
+
+    configs: dict[str, dict[str, Any]] = {}
+    for component_id, component in _first(payload, COMPONENTS_KEYS).items():
+        if not isinstance(component, dict):
+            continue
+        platform = _first(component, PLATFORM_KEYS)
+        if platform != MEDIA_PLAYER_DOMAIN:
+            _LOGGER.debug(
+                "[m3p] Skipping component %s with platform %s", component_id, platform
+            )
+            continue
+        config = _apply_topic_base(
+            {
+                **shared,
+                **_expand_keys(
+                    {
+                        key: value
+                        for key, value in component.items()
+                        if key not in PLATFORM_KEYS and key not in DEVICE_KEYS
+                    }
+                ),
+            }
+        )
+        if not config.get("unique_id"):
+            _LOGGER.info("[m3p] Skipping component %s without unique_id", component_id)
+            continue
+        if device is not None:
+            config["device"] = device
+        configs[str(component_id)] = config
+    return configs
+
+
+def discovery_unique_id(payload: dict[str, Any]) -> str | None:
+    """Return the config entry unique_id for a discovery payload.
+
+    Device payloads are identified by their first device identifier, so
+    adding a zone later updates the existing entry instead of creating a
+    second one.
+    """
+    if not is_device_payload(payload):
+        return _first(payload, ("unique_id", "uniq_id"))
+
+    device = _first(payload, DEVICE_KEYS) or {}
+    identifiers = _first(device, ("identifiers", "ids"))
+    if isinstance(identifiers, str):
+        return identifiers
+    if identifiers:
+        identifier = identifiers[0]
+        if isinstance(identifier, (list, tuple)):
+            return ":".join(str(part) for part in identifier)
+        return str(identifier)
+
+    components = expand_discovery_payload(payload)
+    return next(
+        (config["unique_id"] for config in components.values()),
+        None,
+    )
+
+
+def discovery_device_name(payload: dict[str, Any], default: str) -> str:
+    """Return the device name advertised by a payload."""
+    name = payload.get("name", default)
+    if device := _first(payload, DEVICE_KEYS):
+        name = device.get("name", name)
+    return name
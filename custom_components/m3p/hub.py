@@ -0,0 +1,181 @@
+"""Hub mode: one config entry that owns every discovered Mellow MQTT player."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import json
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.components import mqtt
+from homeassistant.components.mqtt.models import ReceiveMessage
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+
+from .const import HUB_BATCH_DELAY, HUB_BATCH_SIZE, HUB_DISCOVERY_TOPIC
+from .discovery import discovery_unique_id
+
+if TYPE_CHECKING:
+    from .media_player import MqttMediaPlayer
+
+_LOGGER = logging.getLogger(__name__)
+
+EntityFactory = Callable[[str, dict], "list[MqttMediaPlayer]"]
+
+
+class MqttMediaPlayerHub:
+    """Subscribe to media_player discovery and add players in batches.
+
+    Every discovered player becomes an entity of the hub's config entry, so a
+    fleet costs one entry setup and one platform setup instead of one each per
+    player. Discovery configs that arrive close together (retained configs on
+    connect, a bridge announcing many players) are collected and added with a
+    single ``async_add_entities`` call.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        async_add_entities: AddConfigEntryEntitiesCallback,
+        entity_factory: EntityFactory,
+    ) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self._config_entry = config_entry
+        self._async_add_entities = async_add_entities
+        self._entity_factory = entity_factory
+        # Keyed by discovery topic
+        self._players: dict[str, list[MqttMediaPlayer]] = {}
+        self._payloads: dict[str, str] = {}
+        self._pending: dict[str, str] = {}
+        self._flush_lock = asyncio.Lock()
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._unsubscribe: CALLBACK_TYPE | None = None
+
+    async def async_start(self) -> None:
+        """Subscribe to discovery topics."""
+        self._unsubscribe = await mqtt.async_subscribe(
+            self.hass, HUB_DISCOVERY_TOPIC, self._discovery_received
+        )
+        _LOGGER.info(
+            "[m3p] Hub subscribed to discovery (entry_id=%s, topic=%s)",
+            self._config_entry.entry_id,
+            HUB_DISCOVERY_TOPIC,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Unsubscribe and drop anything not yet added."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+        self._pending.clear()
+        _LOGGER.info(
+            "[m3p] Hub stopped (entry_id=%s, players=%s)",
+            self._config_entry.entry_id,
+            len(self._players),
+        )
+
+    @callback
+    def _discovery_received(self, msg: ReceiveMessage) -> None:
+        """Queue a discovery config for the next batch."""
+        if not msg.topic.endswith("/config"):
+            return
+
+        # Only the latest config per topic matters
+        self._pending[msg.topic] = msg.payload
+        if len(self._pending) >= HUB_BATCH_SIZE:
+            self._schedule_flush(0)
+        elif self._cancel_flush is None:
+            self._schedule_flush(HUB_BATCH_DELAY)
+
+    @callback
+    def _schedule_flush(self, delay: float) -> None:
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+        self._cancel_flush = async_call_later(self.hass, delay, self._flush_pending)
+
+    @callback
+    def _flush_pending(self, _now: object) -> None:
+        self._cancel_flush = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            self._config_entry.async_create_background_task(
+                self.hass, self._async_apply(pending), "m3p hub discovery batch"
+            )
+
+    async def _async_apply(self, pending: dict[str, str]) -> None:
+        """Apply one batch of discovery configs."""
+        async with self._flush_lock:
+            new_entities: list[MqttMediaPlayer] = []
+            for topic, payload in pending.items():
+                if self._payloads.get(topic) == payload:
+                    # Retained config seen again (e.g. after a reconnect)
+                    continue
+
+                for existing in self._players.pop(topic, ()):
+                    await self._async_remove_player(topic, existing, bool(payload))
+                self._payloads.pop(topic, None)
+
+                if not payload:
+                    continue
+
+                if entities := self._build_entities(topic, payload):
+                    self._players[topic] = entities
+                    self._payloads[topic] = payload
+                    new_entities.extend(entities)
+
+            if new_entities:
+                _LOGGER.info(
+                    "[m3p] Hub adding %s players (entry_id=%s)",
+                    len(new_entities),
+                    self._config_entry.entry_id,
+                )
+                self._async_add_entities(new_entities)
+
+    def _build_entities(self, topic: str, payload: str) -> list[MqttMediaPlayer]:
+        try:
+            discovery_payload = json.loads(payload)
+        except ValueError as err:
+            _LOGGER.info(
+                "[m3p] Hub ignoring invalid JSON (topic=%s, error=%s)", topic, err
+            )
+            return []
+        if not isinstance(discovery_payload, dict) or not discovery_unique_id(
+            discovery_payload
+        ):
+            _LOGGER.info(
+                "[m3p] Hub ignoring payload without unique_id (topic=%s)", topic
+            )
+            return []
+        return self._entity_factory(topic, discovery_payload)
+
+    async def _async_remove_player(
+        self, topic: str, entity: MqttMediaPlayer, replaced: bool
+    ) -> None:
+        """Remove a player whose config changed or was cleared.
+
+        A changed config keeps the registry entry so the replacement entity
+        picks up the same entity_id and customizations.
+        """
+        entity_id = entity.entity_id
+        _LOGGER.info(
+            "[m3p] Hub removing player (topic=%s, entity_id=%s, replaced=%s)",
+            topic,
+            entity_id,
+            replaced,
+        )
+        if entity.platform is not None:
+            await entity.async_remove(force_remove=True)
+        if not replaced and entity_id:
+            registry = er.async_get(self.hass)
+            if registry.async_get(entity_id):
+                registry.async_remove(entity_id)
@@ -0,0 +1,203 @@
+"""In-memory media library index for Mellow MQTT players.
+
+Devices publish their library as retained JSON pages on
+``library_index_topic`` (a wildcard such as ``player/library/page/+``) and
+incremental changes on ``library_delta_topic``::
+
+    page:  {"items": [{"id": "a1", "title": "Album", "parent": "", "class": "album"}, ...]}
+    delta: {"upsert": [<item>, ...], "remove": ["a1", ...]}
+
+Items with an empty or missing ``parent`` are top level. Browsing is served
+from the index without a round trip to the device. Folders list at most
+LIBRARY_BROWSE_PAGE_SIZE children, followed by a "More" item for the next
+page (``<id>?offset=<n>``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import islice
+import logging
+import re
+from typing import Any
+
+from homeassistant.components.media_player import (
+    BrowseError,
+    BrowseMedia,
+    MediaClass,
+)
+
+from .const import LIBRARY_BROWSE_PAGE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+ROOT_ID = ""
+ROOT_TITLE = "Library"
+DEFAULT_CONTENT_TYPE = "music"
+MORE_TITLE = "More"
+_PAGE_ID_PATTERN = re.compile(r"(.*)\?offset=(\d+)", re.DOTALL)
+# Item classes that hold other items
+FOLDER_CLASSES = frozenset(
+    {
+        MediaClass.ALBUM,
+        MediaClass.ARTIST,
+        MediaClass.DIRECTORY,
+        MediaClass.GENRE,
+        MediaClass.PLAYLIST,
+        MediaClass.PODCAST,
+        MediaClass.SEASON,
+        MediaClass.TV_SHOW,
+    }
+)
+
+
+@dataclass(slots=True)
+class LibraryItem:
+    """One entry in a device's media library."""
+
+    id: str
+    title: str
+    parent: str
+    media_class: str
+    content_type: str
+    can_play: bool
+    thumbnail: str | None
+    page: int | None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], page: int | None) -> LibraryItem:
+        """Build an item from its JSON form; raises KeyError without an id."""
+        item_id = str(data["id"])
+        try:
+            media_class = MediaClass(data.get("class", MediaClass.TRACK))
+        except ValueError:
+            media_class = MediaClass.TRACK
+        return cls(
+            id=item_id,
+            title=str(data.get("title", item_id)),
+            parent=str(data.get("parent") or ROOT_ID),
+            media_class=media_class,
+            content_type=str(data.get("type", DEFAULT_CONTENT_TYPE)),
+            can_play=bool(data.get("playable", media_class not in FOLDER_CLASSES)),
+            thumbnail=data.get("thumbnail"),
+            page=page,
+        )
+
+
+class LibraryIndex:
+    """Library items indexed by id and by parent."""
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._items: dict[str, LibraryItem] = {}
+        # Parent id -> child ids, in publish order (dict as an ordered set)
+        self._children: dict[str, dict[str, None]] = {}
+        self._pages: dict[int, list[str]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of items."""
+        return len(self._items)
+
+    def apply_page(self, page: int, items: list[dict[str, Any]]) -> None:
+        """Replace the contents of one page; raises TypeError if not a list."""
+        if not isinstance(items, list):
+            raise TypeError(f"Library page items must be a list, not {items!r}")
+        new_ids = []
+        for data in items:
+            try:
+                item = LibraryItem.from_dict(data, page)
+            except (KeyError, TypeError):
+                _LOGGER.debug("Ignoring library item without id: %s", data)
+                continue
+            self._upsert(item)
+            new_ids.append(item.id)
+        keep = set(new_ids)
+        for item_id in self._pages.get(page, ()):
+            item = self._items.get(item_id)
+            if item_id not in keep and item is not None and item.page == page:
+                self._remove(item_id)
+        self._pages[page] = new_ids
+
+    def apply_delta(self, upserts: list[dict[str, Any]], removes: list[str]) -> None:
+        """Apply incremental changes published after the pages."""
+        for item_id in removes:
+            self._remove(str(item_id))
+        for data in upserts:
+            try:
+                self._upsert(LibraryItem.from_dict(data, None))
+            except (KeyError, TypeError):
+                _LOGGER.debug("Ignoring library item without id: %s", data)
+
+    def _upsert(self, item: LibraryItem) -> None:
+        if (previous := self._items.get(item.id)) is not None:
+            if previous.parent != item.parent:
+                self._children.get(previous.parent, {}).pop(item.id, None)
+            if item.page is None:
+                # A delta keeps the item on its page for later page replaces
+                item.page = previous.page
+        self._items[item.id] = item
+        self._children.setdefault(item.parent, {})[item.id] = None
+
+    def _remove(self, item_id: str) -> None:
+        if (item := self._items.pop(item_id, None)) is None:
+            return
+        self._children.get(item.parent, {}).pop(item_id, None)
+        # Descendants of a removed folder can no longer be browsed to
+        pending = [item_id]
+        while pending:
+            for child_id in self._children.pop(pending.pop(), {}):
+                if self._items.pop(child_id, None) is not None:
+                    pending.append(child_id)
+
+    def browse(self, media_content_id: str | None) -> BrowseMedia:
+        """Return a node and one page of its direct children."""
+        node_id = media_content_id or ROOT_ID
+        offset = 0
+        if node_id not in self._items and (
+            match := _PAGE_ID_PATTERN.fullmatch(node_id)
+        ):
+            node_id, offset = match.group(1), int(match.group(2))
+        if node_id == ROOT_ID:
+            node = BrowseMedia(
+                media_class=MediaClass.DIRECTORY,
+                media_content_id=ROOT_ID,
+                media_content_type=DEFAULT_CONTENT_TYPE,
+                title=ROOT_TITLE,
+                can_play=False,
+                can_expand=True,
+            )
+        elif (item := self._items.get(node_id)) is not None:
+            node = self._to_browse_media(item)
+        else:
+            raise BrowseError(f"Media not found: {node_id}")
+
+        child_ids = self._children.get(node_id, {})
+        end = offset + LIBRARY_BROWSE_PAGE_SIZE
+        node.children = [
+            self._to_browse_media(self._items[child_id])
+            for child_id in islice(child_ids, offset, end)
+        ]
+        if end < len(child_ids):
+            node.children.append(
+                BrowseMedia(
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_id=f"{node_id}?offset={end}",
+                    media_content_type=DEFAULT_CONTENT_TYPE,
+                    title=f"{MORE_TITLE} ({end + 1}-{len(child_ids)})",
+                    can_play=False,
+                    can_expand=True,
+                )
+            )
+        return node
+
+    def _to_browse_media(self, item: LibraryItem) -> BrowseMedia:
+        return BrowseMedia(
+            media_class=item.media_class,
+            media_content_id=item.id,
+            media_content_type=item.content_type,
+            title=item.title,
+            can_play=item.can_play,
+            can_expand=bool(self._children.get(item.id))
+            or item.media_class in FOLDER_CLASSES,
+            thumbnail=item.thumbnail,
+        )
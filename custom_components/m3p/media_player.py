@@ -4,15 +4,31 @@ from __future__ import annotations
 
 import logging
 import re
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any
+
 import voluptuous as vol
-from homeassistant.components import media_player, mqtt
+from homeassistant.components import automation, media_player, mqtt
 from homeassistant.components.media_player import (
+    BrowseMedia,
     MediaPlayerEntity,
+    MediaType,
 )
 from homeassistant.components.media_player.const import (
     DOMAIN as MEDIA_PLAYER_DOMAIN,
 )
 from homeassistant.components.media_player.const import (
+    ATTR_MEDIA_ALBUM_NAME,
+    ATTR_MEDIA_ARTIST,
+    ATTR_MEDIA_DURATION,
+    ATTR_MEDIA_POSITION,
+    ATTR_MEDIA_POSITION_UPDATED_AT,
+    ATTR_MEDIA_TITLE,
+    ATTR_MEDIA_VOLUME_LEVEL,
     MediaPlayerEntityFeature,
     MediaPlayerState,
 )
@@ -21,40 +37,158 @@ from homeassistant.components.mqtt import (
 )
 from homeassistant.components.mqtt.config import MQTT_RO_SCHEMA
 from homeassistant.components.mqtt.const import (
+    CONF_ENCODING,
+    DEFAULT_ENCODING,
+    CONF_QOS,
+    CONF_RETAIN,
     ATTR_DISCOVERY_HASH,
     ATTR_DISCOVERY_PAYLOAD,
     ATTR_DISCOVERY_TOPIC,
 )
 from homeassistant.components.mqtt.entity import MqttEntity
-from homeassistant.components.mqtt.models import ReceiveMessage
+from homeassistant.components.mqtt.models import (
+    MqttValueTemplate,
+    PublishPayloadType,
+    ReceiveMessage,
+)
+from homeassistant.components.mqtt import subscription
 from homeassistant.components.mqtt.schemas import MQTT_ENTITY_COMMON_SCHEMA
+from homeassistant.components.mqtt.util import valid_qos_schema
+from homeassistant.components.websocket_api.const import (
+    DATA_CONNECTIONS as WEBSOCKET_DATA_CONNECTIONS,
+)
+from homeassistant.components.websocket_api.const import (
+    SIGNAL_WEBSOCKET_CONNECTED,
+    SIGNAL_WEBSOCKET_DISCONNECTED,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_platform
+from homeassistant.helpers import issue_registry as ir
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.json import json_dumps
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoreEntity
+from homeassistant.helpers.service_info.mqtt import ReceivePayloadType
+from homeassistant.helpers.template import Template
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
-from homeassistant.util.dt import utcnow
+from homeassistant.util.dt import parse_datetime, utcnow
+from homeassistant.util.json import json_loads, json_loads_object
 
 from custom_components.m3p.const import (
+    ACTION_NEXT_TRACK,
+    ACTION_PAUSE,
+    ACTION_PLAY,
+    ACTION_PLAY_MEDIA,
+    ACTION_PREVIOUS_TRACK,
+    ACTION_SEEK,
+    ACTION_STOP,
+    ACTION_VOLUME_MUTE,
+    ACTION_VOLUME_SET,
+    ACTIVE_STATES,
+    COMMAND_ACTIONS,
+    DEFAULT_COMMAND_ACTIONS,
+    COMMAND_PENDING_ACKS,
+    COMMAND_QUEUE_SIZE,
+    CONF_AWAIT_ACK,
+    CONF_COMMAND_ACK_TOPIC,
+    CONF_COMMAND_ACTIONS,
+    CONF_COMMAND_OPTIONS,
+    CONF_COMMAND_QUEUE_TTL,
+    CONF_COMMAND_SEQUENCE,
+    CONF_COMMAND_TOPIC,
+    CONF_COMBINED_STATE_ENCODING,
+    CONF_COMBINED_STATE_TOPIC,
+    CONF_DYNAMIC_SUBSCRIPTIONS,
+    CONF_GROUP_COMMAND_TOPIC,
+    CONF_ENTITY_RATE_LIMIT,
+    CONF_HUB,
+    CONF_LIBRARY_DELTA_TOPIC,
+    CONF_LIBRARY_INDEX_TOPIC,
     CONF_MEDIA_ALBUM_NAME_TOPIC,
+    CONF_MEDIA_ALBUM_NAME_VALUE_TEMPLATE,
     CONF_MEDIA_ARTIST_TOPIC,
+    CONF_MEDIA_ARTIST_VALUE_TEMPLATE,
     CONF_MEDIA_DURATION_TOPIC,
+    CONF_MEDIA_DURATION_VALUE_TEMPLATE,
     CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC,
     CONF_MEDIA_IMAGE_URL_TOPIC,
+    CONF_MEDIA_IMAGE_URL_VALUE_TEMPLATE,
+    CONF_MEDIA_POSITION_TIMESTAMP_TOPIC,
     CONF_MEDIA_POSITION_TOPIC,
+    CONF_MEDIA_POSITION_VALUE_TEMPLATE,
     CONF_MEDIA_TITLE_TOPIC,
+    CONF_MEDIA_TITLE_VALUE_TEMPLATE,
     CONF_NEXT_TRACK_TOPIC,
     CONF_PAUSE_TOPIC,
+    CONF_PLAY_MEDIA_TOPIC,
     CONF_PLAY_TOPIC,
+    CONF_POSITION_INTERVAL_COMMAND_TOPIC,
+    CONF_POSITION_INTERVAL_UNWATCHED,
+    CONF_POSITION_INTERVAL_WATCHED,
     CONF_PREVIOUS_TRACK_TOPIC,
+    CONF_QUEUE_DELTA_TOPIC,
+    CONF_QUEUE_TOPIC,
+    CONF_RECONNECT_QUIET_WINDOW,
+    CONF_RECORDED_ATTRIBUTES,
+    CONF_REFRESH_COMMAND_TOPIC,
+    CONF_RESTORE_STATE,
     CONF_SEEK_TOPIC,
+    CONF_STATE_VALUE_TEMPLATE,
     CONF_STOP_TOPIC,
+    CONF_TOPIC_RATE_LIMIT,
+    CONF_UNRECORDED_ATTRIBUTES,
     CONF_VOLUME_LEVEL_TOPIC,
+    CONF_VOLUME_LEVEL_VALUE_TEMPLATE,
     CONF_VOLUME_MUTE_TOPIC,
     CONF_VOLUME_SET_TOPIC,
     CONF_VOLUME_STEP,
+    CLOCK_OFFSET_WINDOW,
+    COMBINED_STATE_ENCODINGS,
     DEFAULT_NAME,
+    DOMAIN,
+    ENCODING_JSON,
+    NOISY_DEVICE_THRESHOLD,
+    NOISY_DEVICE_WINDOW_SECONDS,
+    POSITION_WATCH_CHECK_SECONDS,
+    RATE_LIMIT_BURST_SECONDS,
+    RECONNECT_SETTLE_MAX_SECONDS,
+    REFRESH_DELAY_SECONDS,
+    SERVICE_GET_QUEUE,
+    SERVICE_REFRESH,
+)
+from custom_components.m3p.capture import DATA_CAPTURE
+from custom_components.m3p.clock import ClockOffsetEstimator, parse_device_timestamp
+from custom_components.m3p.codec import decode_combined_state
+from custom_components.m3p.command_queue import CommandQueue, QueuedCommand
+from custom_components.m3p.discovery import expand_discovery_payload
+from custom_components.m3p.hub import MqttMediaPlayerHub
+from custom_components.m3p.library import LibraryIndex
+from custom_components.m3p.payload import (
+    METADATA_STRINGS,
+    decode_state,
+    decode_text,
+    is_json_object,
+    parse_bool,
+    parse_float,
+    parse_int,
+)
+from custom_components.m3p.play_queue import PlayQueue, QueueDeltaError
+from custom_components.m3p.ratelimit import TokenBucket
+from custom_components.m3p.value_template import (
+    compile_json_path,
+    extract_json_path,
+    value_to_payload,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -63,6 +197,40 @@ _LOGGER = logging.getLogger(__name__)
 DATA_URI_IMAGE_PATTERN = re.compile(r"^data:image/[^;]+;base64")
 
 
+# State topic -> option extracting its value from a larger payload
+VALUE_TEMPLATES = {
+    CONF_STATE_TOPIC: CONF_STATE_VALUE_TEMPLATE,
+    CONF_VOLUME_LEVEL_TOPIC: CONF_VOLUME_LEVEL_VALUE_TEMPLATE,
+    CONF_MEDIA_TITLE_TOPIC: CONF_MEDIA_TITLE_VALUE_TEMPLATE,
+    CONF_MEDIA_ARTIST_TOPIC: CONF_MEDIA_ARTIST_VALUE_TEMPLATE,
+    CONF_MEDIA_ALBUM_NAME_TOPIC: CONF_MEDIA_ALBUM_NAME_VALUE_TEMPLATE,
+    CONF_MEDIA_DURATION_TOPIC: CONF_MEDIA_DURATION_VALUE_TEMPLATE,
+    CONF_MEDIA_POSITION_TOPIC: CONF_MEDIA_POSITION_VALUE_TEMPLATE,
+    CONF_MEDIA_IMAGE_URL_TOPIC: CONF_MEDIA_IMAGE_URL_VALUE_TEMPLATE,
+}
+
+# Topics whose handlers parse the received bytes themselves (see payload.py)
+RAW_PAYLOAD_TOPICS = frozenset(
+    {
+        CONF_STATE_TOPIC,
+        CONF_VOLUME_LEVEL_TOPIC,
+        CONF_MEDIA_DURATION_TOPIC,
+        CONF_MEDIA_POSITION_TOPIC,
+        CONF_MEDIA_POSITION_TIMESTAMP_TOPIC,
+        CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC,
+    }
+)
+
+# Delivery settings for one command action; unset keys fall back to the
+# entity's qos, no retain, and awaiting the broker
+COMMAND_OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_QOS): valid_qos_schema,
+        vol.Optional(CONF_RETAIN): cv.boolean,
+        vol.Optional(CONF_AWAIT_ACK): cv.boolean,
+    }
+)
+
 PLATFORM_SCHEMA_MODERN = MQTT_RO_SCHEMA.extend(
     {
         # Attributes
@@ -72,6 +240,7 @@ PLATFORM_SCHEMA_MODERN = MQTT_RO_SCHEMA.extend(
         vol.Optional(CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC): cv.string,
         vol.Optional(CONF_MEDIA_IMAGE_URL_TOPIC): cv.string,
         vol.Optional(CONF_MEDIA_POSITION_TOPIC): cv.string,
+        vol.Optional(CONF_MEDIA_POSITION_TIMESTAMP_TOPIC): cv.string,
         vol.Optional(CONF_MEDIA_TITLE_TOPIC): cv.string,
         vol.Optional(CONF_STATE_TOPIC): cv.string,
         vol.Optional(CONF_VOLUME_LEVEL_TOPIC): cv.string,
@@ -79,17 +248,101 @@ PLATFORM_SCHEMA_MODERN = MQTT_RO_SCHEMA.extend(
         vol.Optional(CONF_NEXT_TRACK_TOPIC): cv.string,
         vol.Optional(CONF_PAUSE_TOPIC): cv.string,
         vol.Optional(CONF_PLAY_TOPIC): cv.string,
+        vol.Optional(CONF_PLAY_MEDIA_TOPIC): cv.string,
+        vol.Optional(CONF_POSITION_INTERVAL_COMMAND_TOPIC): cv.string,
+        vol.Optional(CONF_REFRESH_COMMAND_TOPIC): cv.string,
         vol.Optional(CONF_PREVIOUS_TRACK_TOPIC): cv.string,
         vol.Optional(CONF_SEEK_TOPIC): cv.string,
         vol.Optional(CONF_STOP_TOPIC): cv.string,
         vol.Optional(CONF_VOLUME_MUTE_TOPIC): cv.string,
         vol.Optional(CONF_VOLUME_SET_TOPIC): cv.string,
         vol.Optional(CONF_VOLUME_STEP): vol.Coerce(float),
+        vol.Optional(CONF_COMMAND_TOPIC): cv.string,
+        vol.Optional(CONF_LIBRARY_INDEX_TOPIC): cv.string,
+        vol.Optional(CONF_LIBRARY_DELTA_TOPIC): cv.string,
+        vol.Optional(CONF_QUEUE_TOPIC): cv.string,
+        vol.Optional(CONF_QUEUE_DELTA_TOPIC): cv.string,
+        vol.Optional(CONF_COMBINED_STATE_TOPIC): cv.string,
+        **{vol.Optional(key): cv.string for key in VALUE_TEMPLATES.values()},
+        vol.Optional(CONF_COMBINED_STATE_ENCODING, default=ENCODING_JSON): vol.In(
+            COMBINED_STATE_ENCODINGS
+        ),
+        vol.Optional(
+            CONF_COMMAND_ACTIONS, default=list(DEFAULT_COMMAND_ACTIONS)
+        ): vol.All(cv.ensure_list, [vol.In(COMMAND_ACTIONS)]),
+        vol.Optional(CONF_COMMAND_SEQUENCE, default=False): cv.boolean,
+        vol.Optional(CONF_COMMAND_ACK_TOPIC): cv.string,
+        vol.Optional(CONF_GROUP_COMMAND_TOPIC): cv.string,
+        # Seconds a command is held while MQTT is disconnected; 0 drops it
+        vol.Optional(CONF_COMMAND_QUEUE_TTL, default=10.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_COMMAND_OPTIONS, default={}): {
+            vol.In(COMMAND_ACTIONS): COMMAND_OPTIONS_SCHEMA
+        },
+        # Behaviour
+        vol.Optional(CONF_RESTORE_STATE, default=True): cv.boolean,
+        vol.Optional(CONF_UNRECORDED_ATTRIBUTES, default=[]): vol.All(
+            cv.ensure_list, [cv.string]
+        ),
+        vol.Optional(CONF_RECORDED_ATTRIBUTES, default=[]): vol.All(
+            cv.ensure_list, [cv.string]
+        ),
+        vol.Optional(CONF_RECONNECT_QUIET_WINDOW, default=0.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=RECONNECT_SETTLE_MAX_SECONDS)
+        ),
+        vol.Optional(CONF_DYNAMIC_SUBSCRIPTIONS, default=False): cv.boolean,
+        # Seconds between position reports requested from the device; 0 asks
+        # it not to report position at all
+        vol.Optional(CONF_POSITION_INTERVAL_WATCHED, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_POSITION_INTERVAL_UNWATCHED, default=0.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        # Messages per second; 0 (default) disables the limit
+        vol.Optional(CONF_TOPIC_RATE_LIMIT, default=0.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(CONF_ENTITY_RATE_LIMIT, default=0.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
     }
 ).extend(MQTT_ENTITY_COMMON_SCHEMA.schema)
 
 DISCOVERY_SCHEMA = PLATFORM_SCHEMA_MODERN.extend({}, extra=vol.REMOVE_EXTRA)
 
+# combined_state_topic field -> entity attribute it sets
+COMBINED_STATE_ATTRS = {
+    "state": "_attr_state",
+    "volume_level": "_attr_volume_level",
+    "media_title": "_attr_media_title",
+    "media_artist": "_attr_media_artist",
+    "media_album_name": "_attr_media_album_name",
+    "media_duration": "_attr_media_duration",
+    "media_position": "_attr_media_position",
+    "media_image_url": "_attr_media_image_url",
+}
+
+# Command action -> (dedicated topic, feature it enables)
+COMMAND_FEATURES = {
+    ACTION_PLAY: (CONF_PLAY_TOPIC, MediaPlayerEntityFeature.PLAY),
+    ACTION_PAUSE: (CONF_PAUSE_TOPIC, MediaPlayerEntityFeature.PAUSE),
+    ACTION_STOP: (CONF_STOP_TOPIC, MediaPlayerEntityFeature.STOP),
+    ACTION_PREVIOUS_TRACK: (
+        CONF_PREVIOUS_TRACK_TOPIC,
+        MediaPlayerEntityFeature.PREVIOUS_TRACK,
+    ),
+    ACTION_NEXT_TRACK: (CONF_NEXT_TRACK_TOPIC, MediaPlayerEntityFeature.NEXT_TRACK),
+    ACTION_SEEK: (CONF_SEEK_TOPIC, MediaPlayerEntityFeature.SEEK),
+    ACTION_VOLUME_SET: (CONF_VOLUME_SET_TOPIC, MediaPlayerEntityFeature.VOLUME_SET),
+    ACTION_VOLUME_MUTE: (
+        CONF_VOLUME_MUTE_TOPIC,
+        MediaPlayerEntityFeature.VOLUME_MUTE,
+    ),
+    ACTION_PLAY_MEDIA: (CONF_PLAY_MEDIA_TOPIC, MediaPlayerEntityFeature.PLAY_MEDIA),
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -101,17 +354,28 @@ async def async_setup_entry(
         "[m3p] media_player.async_setup_entry called (entry_id=%s)",
         config_entry.entry_id,
     )
-    mqtt_ready = await mqtt.async_wait_for_mqtt_client(hass)
-    if not mqtt_ready:
-        _LOGGER.warning(
-            "[m3p] MQTT client not ready inside media_player platform (entry_id=%s)",
-            config_entry.entry_id,
+    # The MQTT client has already been awaited in __init__.async_setup_entry,
+    # which only forwards the entry once it is ready.
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_QUEUE,
+        {},
+        "async_get_queue",
+        supports_response=SupportsResponse.ONLY,
+    )
+    platform.async_register_entity_service(SERVICE_REFRESH, {}, "async_request_refresh")
+
+    if config_entry.data.get(CONF_HUB):
+        hub = MqttMediaPlayerHub(
+            hass,
+            config_entry,
+            async_add_entities,
+            partial(build_media_players, hass, config_entry),
         )
+        await hub.async_start()
+        config_entry.async_on_unload(hub.async_stop)
         return
-    _LOGGER.info(
-        "[m3p] MQTT client ready for media_player platform (entry_id=%s)",
-        config_entry.entry_id,
-    )
 
     # Get discovery payload from config entry data
     discovery_payload = config_entry.data.get("discovery_payload", {})
@@ -124,22 +388,66 @@ async def async_setup_entry(
         )
         return
 
+    if entities := build_media_players(
+        hass, config_entry, discovery_topic, discovery_payload
+    ):
+        # Create entities directly - no global signal mechanism
+        async_add_entities(entities)
+
+
+def build_media_players(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    discovery_topic: str | None,
+    discovery_payload: dict,
+) -> list[MqttMediaPlayer]:
+    """Build every player described by a discovery payload.
+
+    A device payload yields one entity per media_player component, all
+    sharing the payload's device info.
+    """
+    components = expand_discovery_payload(discovery_payload)
+    return [
+        entity
+        for component_id, config in components.items()
+        if (
+            entity := build_media_player(
+                hass, config_entry, discovery_topic, config, component_id
+            )
+        )
+    ]
+
+
+def build_media_player(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    discovery_topic: str | None,
+    discovery_payload: dict,
+    component_id: str = "",
+) -> MqttMediaPlayer | None:
+    """Validate a discovery payload and build its entity.
+
+    Returns None (after logging) when the payload does not pass the schema.
+    """
     # Validate through schema
     try:
         config = DISCOVERY_SCHEMA(discovery_payload)
     except vol.Invalid as err:
         _LOGGER.error(
-            "[m3p] Invalid discovery payload (entry_id=%s, error=%s)",
+            "[m3p] Invalid discovery payload (entry_id=%s, topic=%s, error=%s)",
             config_entry.entry_id,
+            discovery_topic,
             err,
         )
-        return
+        return None
 
     # Build discovery_data structure that MqttEntity expects
     topic_parts = discovery_topic.split("/") if discovery_topic else []
     node_id = topic_parts[2] if len(topic_parts) > 2 else ""
     object_id = topic_parts[3] if len(topic_parts) > 3 else "mqtt"
     discovery_id = f"{node_id} {object_id}" if node_id else object_id
+    if component_id:
+        discovery_id = f"{discovery_id} {component_id}"
     discovery_hash = (MEDIA_PLAYER_DOMAIN, discovery_id)
 
     discovery_data = {
@@ -153,12 +461,36 @@ async def async_setup_entry(
         config_entry.entry_id,
         discovery_hash,
     )
+    return MqttMediaPlayer(hass, config, config_entry, discovery_data)
+
+
+@dataclass
+class MqttMediaPlayerExtraStoredData(ExtraStoredData):
+    """Artwork reference kept across restarts.
 
-    # Create entity directly - no global signal mechanism
-    async_add_entities([MqttMediaPlayer(hass, config, config_entry, discovery_data)])
+    The image URL is not part of the entity's state attributes (only the
+    proxied entity_picture is), so it is stored separately.
+    """
 
+    media_image_url: str | None
+    media_image_remotely_accessible: bool
 
-class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
+    def as_dict(self) -> dict[str, Any]:
+        """Return a dict representation of the stored data."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, restored: dict[str, Any]) -> MqttMediaPlayerExtraStoredData:
+        """Initialize the stored data from a dict."""
+        return cls(
+            media_image_url=restored.get("media_image_url"),
+            media_image_remotely_accessible=bool(
+                restored.get("media_image_remotely_accessible", False)
+            ),
+        )
+
+
+class MqttMediaPlayer(MqttEntity, MediaPlayerEntity, RestoreEntity):
     """Representation of a MQTT media player."""
 
     _default_name = DEFAULT_NAME
@@ -174,10 +506,54 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
         """Initialize the MQTT media player."""
         _LOGGER.debug("MqttMediaPlayer.__init__ called with config: %s", config)
 
+        # Commands held while MQTT is disconnected. Created before
+        # MqttEntity.__init__ calls _setup_from_config, which only sets the
+        # TTL, so held commands survive discovery and config updates
+        self._m3p_command_queue = CommandQueue(COMMAND_QUEUE_SIZE, 0.0)
+
         # Initialize the base MqttEntity with discovery data
         super().__init__(hass, config, config_entry, discovery_data)
 
         self._m3p_entry_id = config_entry.entry_id
+        # Last message recorded for a traffic capture: see add_subscription
+        self._m3p_captured: ReceiveMessage | None = None
+        # Settle state: see _async_begin_settle
+        self._m3p_settle_timer: CALLBACK_TYPE | None = None
+        self._m3p_settle_buffer: dict[
+            str, tuple[Callable[[ReceiveMessage], None], ReceiveMessage]
+        ] = {}
+        self._m3p_settle_last = 0.0
+        self._m3p_settle_not_before = 0.0
+        self._m3p_settle_deadline = 0.0
+        self._m3p_applying_buffer = False
+        # Rate limiting: see _async_admit_message (buckets live in
+        # _setup_from_config so they follow config updates)
+        self._m3p_deferred: dict[
+            str, tuple[Callable[[ReceiveMessage], None], ReceiveMessage]
+        ] = {}
+        self._m3p_deferred_timer: CALLBACK_TYPE | None = None
+        self._m3p_limited_since = 0.0
+        self._m3p_limited_count = 0
+        self._m3p_noisy_issue_id: str | None = None
+        self._m3p_last_limited = 0.0
+        self._m3p_noisy_clear_timer: CALLBACK_TYPE | None = None
+        # Device clock: see media_position_received
+        self._m3p_device_clock = ClockOffsetEstimator(CLOCK_OFFSET_WINDOW)
+        self._m3p_position_timestamp: datetime | None = None
+        # Broker disconnect grace period: see available
+        self._m3p_unavailable_timer: CALLBACK_TYPE | None = None
+        self._m3p_last_available = False
+        # command_topic sequence numbers: see _async_send_command
+        self._m3p_command_seq = 0
+        self._m3p_pending_acks: dict[int, float] = {}
+        # Pending refresh_command_topic request: see _async_schedule_refresh
+        self._m3p_refresh_timer: CALLBACK_TYPE | None = None
+        # Last interval sent to position_interval_command_topic
+        self._m3p_position_interval: float | None = None
+        # Media library: see library_page_received
+        self._m3p_library = LibraryIndex()
+        # Play queue: see queue_delta_received
+        self._m3p_queue = PlayQueue()
         self._m3p_discovery_present = discovery_data is not None
         config_keys = sorted(config.keys()) if isinstance(config, dict) else []
         _LOGGER.info(
@@ -195,6 +571,126 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
         """Return the config schema."""
         return DISCOVERY_SCHEMA
 
+    @property
+    def available(self) -> bool:
+        """Return if the player is available.
+
+        While commands can be queued, a broker disconnect leaves availability
+        as it was for command_queue_ttl seconds. Home Assistant skips
+        unavailable entities in service calls, so commands issued during a
+        brief broker restart would otherwise never reach the queue.
+        """
+        if self._m3p_unavailable_timer is not None:
+            return self._m3p_last_available
+        available = super().available
+        if mqtt.is_connected(self.hass):
+            self._m3p_last_available = available
+        return available
+
+    @callback
+    def async_mqtt_connection_state_changed(self, state: bool) -> None:
+        """Start or end the disconnect grace period, then write state."""
+        if state:
+            self._async_end_disconnect_grace()
+        elif self._m3p_command_queue.ttl and self._m3p_unavailable_timer is None:
+            self._m3p_unavailable_timer = async_call_later(
+                self.hass,
+                self._m3p_command_queue.ttl,
+                self._async_disconnect_grace_expired,
+            )
+        super().async_mqtt_connection_state_changed(state)
+
+    @callback
+    def _async_disconnect_grace_expired(self, _now: datetime) -> None:
+        self._m3p_unavailable_timer = None
+        _LOGGER.info(
+            "[m3p] %s still disconnected after the command queue TTL, "
+            "marking unavailable",
+            self._log_identity(),
+        )
+        self.async_write_ha_state()
+
+    @callback
+    def _async_end_disconnect_grace(self) -> None:
+        if self._m3p_unavailable_timer is not None:
+            self._m3p_unavailable_timer()
+            self._m3p_unavailable_timer = None
+
+    @property
+    def group_command_topic(self) -> str | None:
+        """Return the command topic this player shares with its group, if any."""
+        return self._config.get(CONF_GROUP_COMMAND_TOPIC)
+
+    @callback
+    def add_subscription(
+        self,
+        state_topic_config_key: str,
+        msg_callback: Callable[[ReceiveMessage], None],
+        tracked_attributes: set[str] | None,
+        disable_encoding: bool = False,
+    ) -> bool:
+        """Add a subscription whose messages are recorded while capturing.
+
+        A message is recorded once, even when several subscriptions (value
+        templates binding attributes to one topic) receive it.
+        """
+
+        @callback
+        def message_received(msg: ReceiveMessage) -> None:
+            if (capture := self.hass.data.get(DATA_CAPTURE)) is not None and (
+                self._m3p_captured is not msg
+            ):
+                # Subscriptions to one topic are handed the same message object
+                self._m3p_captured = msg
+                capture.record(
+                    "rx",
+                    self.entity_id,
+                    msg.topic,
+                    msg.payload,
+                    msg.qos,
+                    msg.retain,
+                    key=state_topic_config_key,
+                )
+            msg_callback(msg)
+
+        return super().add_subscription(
+            state_topic_config_key,
+            message_received,
+            tracked_attributes,
+            disable_encoding=disable_encoding,
+        )
+
+    async def async_publish(
+        self,
+        topic: str,
+        payload: PublishPayloadType,
+        qos: int = 0,
+        retain: bool = False,
+        encoding: str | None = DEFAULT_ENCODING,
+    ) -> None:
+        """Publish a message, recording it while capturing."""
+        if (capture := self.hass.data.get(DATA_CAPTURE)) is not None:
+            capture.record("tx", self.entity_id, topic, payload, qos, retain)
+        await super().async_publish(topic, payload, qos, retain, encoding)
+
+    @callback
+    def _async_apply_recorder_policy(self) -> None:
+        """Adjust which attributes the recorder stores for this player.
+
+        MediaPlayerEntity already leaves out position, position_updated_at
+        and entity_picture (which holds data-URI artwork); unrecorded_attributes
+        adds to that set and recorded_attributes takes from it.
+        """
+        if self._state_info is None:
+            # Not added yet: async_added_to_hass applies it
+            return
+        cls = type(self)
+        self._state_info["unrecorded_attributes"] = (
+            cls._entity_component_unrecorded_attributes
+            | cls._unrecorded_attributes
+            | set(self._config[CONF_UNRECORDED_ATTRIBUTES])
+        ) - set(self._config[CONF_RECORDED_ATTRIBUTES])
+
     def _log_identity(self) -> str:
         """Return a stable identifier for log messages."""
 
@@ -219,31 +715,21 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
         features = MediaPlayerEntityFeature(0)
         feature_topics = []
 
-        if self._config.get(CONF_PLAY_TOPIC):
-            features |= MediaPlayerEntityFeature.PLAY
-            feature_topics.append("PLAY")
-        if self._config.get(CONF_PAUSE_TOPIC):
-            features |= MediaPlayerEntityFeature.PAUSE
-            feature_topics.append("PAUSE")
-        if self._config.get(CONF_STOP_TOPIC):
-            features |= MediaPlayerEntityFeature.STOP
-            feature_topics.append("STOP")
-        if self._config.get(CONF_PREVIOUS_TRACK_TOPIC):
-            features |= MediaPlayerEntityFeature.PREVIOUS_TRACK
-            feature_topics.append("PREVIOUS_TRACK")
-        if self._config.get(CONF_NEXT_TRACK_TOPIC):
-            features |= MediaPlayerEntityFeature.NEXT_TRACK
-            feature_topics.append("NEXT_TRACK")
-        if self._config.get(CONF_SEEK_TOPIC):
-            features |= MediaPlayerEntityFeature.SEEK
-            feature_topics.append("SEEK")
-        if self._config.get(CONF_VOLUME_SET_TOPIC):
-            features |= MediaPlayerEntityFeature.VOLUME_SET
-            feature_topics.append("VOLUME_SET")
+        # With command_topic, every enabled action is sent there
+        command_actions = (
+            set(self._config[CONF_COMMAND_ACTIONS])
+            if self._config.get(CONF_COMMAND_TOPIC)
+            else set()
+        )
+        for action, (topic_key, feature) in COMMAND_FEATURES.items():
+            if self._config.get(topic_key) or action in command_actions:
+                features |= feature
+                feature_topics.append(feature.name)
+        if features & MediaPlayerEntityFeature.VOLUME_SET:
             feature_topics.append("VOLUME_STEP")
-        if self._config.get(CONF_VOLUME_MUTE_TOPIC):
-            features |= MediaPlayerEntityFeature.VOLUME_MUTE
-            feature_topics.append("VOLUME_MUTE")
+        if self._config.get(CONF_LIBRARY_INDEX_TOPIC):
+            features |= MediaPlayerEntityFeature.BROWSE_MEDIA
+            feature_topics.append("BROWSE_MEDIA")
 
         # Check if features have changed
         if previous_features is not None and previous_features != features:
@@ -254,6 +740,39 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             )
 
         self._attr_supported_features = features
+        self._async_apply_recorder_policy()
+
+        self._m3p_command_queue.ttl = config[CONF_COMMAND_QUEUE_TTL]
+        if not self._m3p_command_queue.ttl:
+            self._m3p_command_queue.clear()
+
+        # Value templates: $.a.b paths are read from the parsed JSON directly,
+        # anything else is rendered with Jinja
+        self._m3p_value_paths: dict[str, tuple[str | int, ...]] = {}
+        self._m3p_value_templates: dict[str, MqttValueTemplate] = {}
+        for topic_key, template_key in VALUE_TEMPLATES.items():
+            if not (expression := config.get(template_key)):
+                continue
+            if (path := compile_json_path(expression)) is not None:
+                self._m3p_value_paths[topic_key] = path
+            else:
+                self._m3p_value_templates[topic_key] = MqttValueTemplate(
+                    Template(expression, self.hass), entity=self
+                )
+        self._m3p_json_cache: tuple[ReceivePayloadType, Any] | None = None
+
+        # Buckets keep their tokens across updates that leave the rates alone
+        rates = (config[CONF_TOPIC_RATE_LIMIT], config[CONF_ENTITY_RATE_LIMIT])
+        if getattr(self, "_m3p_rates", None) != rates:
+            self._m3p_rates = rates
+            self._m3p_topic_buckets: dict[str, TokenBucket] = {}
+            self._m3p_entity_bucket: TokenBucket | None = None
+            if entity_rate := config[CONF_ENTITY_RATE_LIMIT]:
+                self._m3p_entity_bucket = TokenBucket(
+                    entity_rate,
+                    entity_rate * RATE_LIMIT_BURST_SECONDS,
+                    time.monotonic(),
+                )
         _LOGGER.debug(
             "MqttMediaPlayer setup completed with features: %s (%s)",
             features,
@@ -266,13 +785,88 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             feature_topics or "<none>",
         )
 
+    @property
+    def extra_restore_state_data(self) -> MqttMediaPlayerExtraStoredData:
+        """Return the artwork reference to persist across restarts."""
+        image_url = self._attr_media_image_url
+        # Data URIs can be hundreds of KB; the device resends artwork anyway
+        if self._is_data_uri_image(image_url):
+            image_url = None
+        return MqttMediaPlayerExtraStoredData(
+            media_image_url=image_url,
+            media_image_remotely_accessible=self._attr_media_image_remotely_accessible,
+        )
+
+    async def _async_restore_state(self) -> None:
+        """Seed attributes from the last known state.
+
+        Retained (or fresh) MQTT messages arriving after subscription
+        overwrite whatever is restored here.
+        """
+        if (last_state := await self.async_get_last_state()) is None:
+            return
+
+        if last_state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            try:
+                self._attr_state = MediaPlayerState(last_state.state)
+            except ValueError:
+                pass
+        # The device may be off, or elsewhere in the track by now: restored
+        # as playing, the frontend would run the position on across the
+        # downtime. Paused keeps it at the last reported value.
+        if self._attr_state == MediaPlayerState.PLAYING:
+            self._attr_state = MediaPlayerState.PAUSED
+
+        attributes = last_state.attributes
+        self._attr_media_title = attributes.get(ATTR_MEDIA_TITLE)
+        self._attr_media_artist = attributes.get(ATTR_MEDIA_ARTIST)
+        self._attr_media_album_name = attributes.get(ATTR_MEDIA_ALBUM_NAME)
+        self._attr_media_duration = attributes.get(ATTR_MEDIA_DURATION)
+        self._attr_volume_level = attributes.get(ATTR_MEDIA_VOLUME_LEVEL)
+        if (position := attributes.get(ATTR_MEDIA_POSITION)) is not None:
+            updated_at = attributes.get(ATTR_MEDIA_POSITION_UPDATED_AT)
+            if isinstance(updated_at, str):
+                updated_at = parse_datetime(updated_at)
+            self._attr_media_position = position
+            self._attr_media_position_updated_at = updated_at
+
+        if (extra := await self.async_get_last_extra_data()) is not None:
+            stored = MqttMediaPlayerExtraStoredData.from_dict(extra.as_dict())
+            self._attr_media_image_url = stored.media_image_url
+            self._attr_media_image_remotely_accessible = (
+                stored.media_image_remotely_accessible
+            )
+
+        _LOGGER.info(
+            "[m3p] %s restored last state (state=%s, title=%s, image_url=%s)",
+            self._log_identity(),
+            self._attr_state,
+            self._attr_media_title,
+            self._truncate_url_for_logging(self._attr_media_image_url),
+        )
+
     async def async_added_to_hass(self) -> None:
         """Called when entity is added to hass."""
         _LOGGER.debug(
             "MqttMediaPlayer.async_added_to_hass called for entity: %s", self.entity_id
         )
         try:
+            # _state_info exists from here on, before the first state write
+            self._async_apply_recorder_policy()
+            if self._config[CONF_RESTORE_STATE]:
+                await self._async_restore_state()
             await super().async_added_to_hass()
+            self.async_on_remove(
+                mqtt.async_subscribe_connection_status(
+                    self.hass, self._async_mqtt_connection_changed
+                )
+            )
+            self.async_on_remove(self._async_cancel_settle)
+            self.async_on_remove(self._async_end_disconnect_grace)
+            self.async_on_remove(self._async_cleanup_rate_limit)
+            self._async_setup_position_interval()
+            self.async_on_remove(self._async_cancel_refresh)
+            self._async_schedule_refresh()
             _LOGGER.debug(
                 "MqttMediaPlayer.async_added_to_hass completed successfully for entity: %s",
                 self.entity_id,
@@ -288,15 +882,19 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
 
     def _decode_payload(self, payload) -> str | None:
         """Decode MQTT payload to string."""
-        if payload is None:
-            return None
-        if isinstance(payload, bytes):
-            return payload.decode("utf-8")
-        if isinstance(payload, bytearray):
-            return payload.decode("utf-8")
-        if isinstance(payload, memoryview):
-            return payload.tobytes().decode("utf-8")
-        return str(payload)
+        return decode_text(payload)
+
+    def _raw_payload(self, key: str) -> bool:
+        """Return True if the topic is subscribed without payload decoding.
+
+        Jinja value templates render text, and other configured encodings
+        are left to the MQTT client.
+        """
+        return (
+            key in RAW_PAYLOAD_TOPICS
+            and key not in self._m3p_value_templates
+            and self._config[CONF_ENCODING] == DEFAULT_ENCODING
+        )
 
     def _is_data_uri_image(self, url: str | None) -> bool:
         """Check if URL is an image data URI."""
@@ -361,6 +959,21 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             configured_topics or "<none>",
         )
 
+        # With dynamic subscriptions, an inactive player only listens for state
+        # and volume, which can change while idle
+        self._m3p_metadata_subscribed = self._metadata_subscriptions_wanted()
+        if not self._m3p_metadata_subscribed:
+            _LOGGER.info(
+                "[m3p] %s inactive (state=%s), subscribing to state and volume only",
+                self._log_identity(),
+                self._attr_state,
+            )
+
+        def metadata_topic(config_key: str) -> str | None:
+            if not self._m3p_metadata_subscribed:
+                return None
+            return self._config.get(config_key)
+
         @callback
         def state_message_received(msg: ReceiveMessage) -> None:
             """Handle new MQTT state messages."""
@@ -368,18 +981,16 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 "🔥 STATE MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
 
-            state_str = self._decode_payload(msg.payload)
-            if not state_str:
+            if not msg.payload:
                 _LOGGER.debug("Empty state payload received, ignoring")
                 return
 
-            # Normalize to lowercase once
-            state_str = state_str.lower()
+            state_str = decode_state(msg.payload)
 
             # Handle HA special cases first
             if state_str == STATE_UNAVAILABLE:
                 self._attr_available = False
-                self.async_write_ha_state()
+                self._async_write_state()
                 _LOGGER.debug("✅ Marked entity unavailable due to MQTT payload")
                 return
 
@@ -387,7 +998,8 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
 
             if state_str == STATE_UNKNOWN:
                 self._attr_state = STATE_UNKNOWN
-                self.async_write_ha_state()
+                self._async_write_state()
+                self._async_scale_subscriptions()
                 _LOGGER.debug("✅ State marked as unknown from MQTT payload")
                 return
 
@@ -400,7 +1012,8 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 return
 
             self._attr_state = new_state
-            self.async_write_ha_state()
+            self._async_write_state()
+            self._async_scale_subscriptions()
             _LOGGER.debug("✅ State updated to: %s", self._attr_state)
             _LOGGER.info(
                 "[m3p] %s state update (topic=%s, payload=%s, state=%s)",
@@ -414,7 +1027,10 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
         _LOGGER.debug("📡 SUBSCRIBING TO STATE TOPIC: %s", state_topic)
         if state_topic:
             success = self.add_subscription(
-                CONF_STATE_TOPIC, state_message_received, {"_attr_state"}
+                CONF_STATE_TOPIC,
+                self._wrap_message_handler(CONF_STATE_TOPIC, state_message_received),
+                {"_attr_state"},
+                disable_encoding=self._raw_payload(CONF_STATE_TOPIC),
             )
             # Defensive: add_subscription is from HA's MqttEntity and currently can't
             # fail if topic is truthy, but we guard against future API changes.
@@ -436,13 +1052,12 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 "🔊 VOLUME MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
 
-            payload_str = self._decode_payload(msg.payload)
-            if not payload_str:
+            if not msg.payload:
                 _LOGGER.debug("Empty volume payload received, ignoring")
                 return
 
             try:
-                volume = float(payload_str)
+                volume = parse_float(msg.payload)
             except (ValueError, TypeError) as e:
                 _LOGGER.warning(
                     "Invalid volume level format received: %s, error: %s",
@@ -459,13 +1074,12 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 return
 
             self._attr_volume_level = volume
-            self.async_write_ha_state()
+            self._async_write_state()
             _LOGGER.debug("✅ Volume updated to: %s", self._attr_volume_level)
             _LOGGER.info(
-                "[m3p] %s volume update (topic=%s, payload=%s, volume=%.3f)",
+                "[m3p] %s volume update (topic=%s, volume=%.3f)",
                 self._log_identity(),
                 msg.topic,
-                payload_str,
                 self._attr_volume_level,
             )
 
@@ -473,7 +1087,12 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
         _LOGGER.debug("📡 SUBSCRIBING TO VOLUME TOPIC: %s", volume_topic)
         if volume_topic:
             success = self.add_subscription(
-                CONF_VOLUME_LEVEL_TOPIC, volume_level_received, {"_attr_volume_level"}
+                CONF_VOLUME_LEVEL_TOPIC,
+                self._wrap_message_handler(
+                    CONF_VOLUME_LEVEL_TOPIC, volume_level_received
+                ),
+                {"_attr_volume_level"},
+                disable_encoding=self._raw_payload(CONF_VOLUME_LEVEL_TOPIC),
             )
             if not success:
                 _LOGGER.error("Failed to subscribe to volume topic: %s", volume_topic)
@@ -494,8 +1113,10 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             _LOGGER.debug(
                 "🎵 TITLE MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
-            self._attr_media_title = self._decode_payload(msg.payload)
-            self.async_write_ha_state()
+            self._attr_media_title = METADATA_STRINGS.intern(
+                self._decode_payload(msg.payload)
+            )
+            self._async_write_state()
             _LOGGER.debug("✅ Media title updated to: %s", self._attr_media_title)
             _LOGGER.info(
                 "[m3p] %s title update (topic=%s, title=%s)",
@@ -504,11 +1125,15 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 self._attr_media_title,
             )
 
-        title_topic = self._config.get(CONF_MEDIA_TITLE_TOPIC)
+        title_topic = metadata_topic(CONF_MEDIA_TITLE_TOPIC)
         _LOGGER.debug("📡 SUBSCRIBING TO TITLE TOPIC: %s", title_topic)
         if title_topic:
             success = self.add_subscription(
-                CONF_MEDIA_TITLE_TOPIC, media_title_received, {"_attr_media_title"}
+                CONF_MEDIA_TITLE_TOPIC,
+                self._wrap_message_handler(
+                    CONF_MEDIA_TITLE_TOPIC, media_title_received
+                ),
+                {"_attr_media_title"},
             )
             if not success:
                 _LOGGER.error("Failed to subscribe to title topic: %s", title_topic)
@@ -527,8 +1152,10 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             _LOGGER.debug(
                 "🎤 ARTIST MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
-            self._attr_media_artist = self._decode_payload(msg.payload)
-            self.async_write_ha_state()
+            self._attr_media_artist = METADATA_STRINGS.intern(
+                self._decode_payload(msg.payload)
+            )
+            self._async_write_state()
             _LOGGER.debug("✅ Media artist updated to: %s", self._attr_media_artist)
             _LOGGER.info(
                 "[m3p] %s artist update (topic=%s, artist=%s)",
@@ -537,11 +1164,15 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 self._attr_media_artist,
             )
 
-        artist_topic = self._config.get(CONF_MEDIA_ARTIST_TOPIC)
+        artist_topic = metadata_topic(CONF_MEDIA_ARTIST_TOPIC)
         _LOGGER.debug("📡 SUBSCRIBING TO ARTIST TOPIC: %s", artist_topic)
         if artist_topic:
             success = self.add_subscription(
-                CONF_MEDIA_ARTIST_TOPIC, media_artist_received, {"_attr_media_artist"}
+                CONF_MEDIA_ARTIST_TOPIC,
+                self._wrap_message_handler(
+                    CONF_MEDIA_ARTIST_TOPIC, media_artist_received
+                ),
+                {"_attr_media_artist"},
             )
             if not success:
                 _LOGGER.error("Failed to subscribe to artist topic: %s", artist_topic)
@@ -562,8 +1193,10 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             _LOGGER.debug(
                 "💿 ALBUM MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
-            self._attr_media_album_name = self._decode_payload(msg.payload)
-            self.async_write_ha_state()
+            self._attr_media_album_name = METADATA_STRINGS.intern(
+                self._decode_payload(msg.payload)
+            )
+            self._async_write_state()
             _LOGGER.debug("✅ Media album updated to: %s", self._attr_media_album_name)
             _LOGGER.info(
                 "[m3p] %s album update (topic=%s, album=%s)",
@@ -572,12 +1205,14 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 self._attr_media_album_name,
             )
 
-        album_topic = self._config.get(CONF_MEDIA_ALBUM_NAME_TOPIC)
+        album_topic = metadata_topic(CONF_MEDIA_ALBUM_NAME_TOPIC)
         _LOGGER.debug("📡 SUBSCRIBING TO ALBUM TOPIC: %s", album_topic)
         if album_topic:
             success = self.add_subscription(
                 CONF_MEDIA_ALBUM_NAME_TOPIC,
-                media_album_name_received,
+                self._wrap_message_handler(
+                    CONF_MEDIA_ALBUM_NAME_TOPIC, media_album_name_received
+                ),
                 {"_attr_media_album_name"},
             )
             if not success:
@@ -598,13 +1233,12 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 "⏱️ DURATION MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
 
-            payload_str = self._decode_payload(msg.payload)
-            if not payload_str:
+            if not msg.payload:
                 _LOGGER.debug("Empty duration payload received, ignoring")
                 return
 
             try:
-                duration = int(payload_str)
+                duration = parse_int(msg.payload)
             except (ValueError, TypeError) as e:
                 _LOGGER.warning(
                     "Invalid media duration format received: %s, error: %s",
@@ -619,23 +1253,25 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 return
 
             self._attr_media_duration = duration
-            self.async_write_ha_state()
+            self._async_write_state()
             _LOGGER.debug("✅ Media duration updated to: %s", self._attr_media_duration)
             _LOGGER.info(
-                "[m3p] %s duration update (topic=%s, payload=%s, duration=%s)",
+                "[m3p] %s duration update (topic=%s, duration=%s)",
                 self._log_identity(),
                 msg.topic,
-                payload_str,
                 self._attr_media_duration,
             )
 
-        duration_topic = self._config.get(CONF_MEDIA_DURATION_TOPIC)
+        duration_topic = metadata_topic(CONF_MEDIA_DURATION_TOPIC)
         _LOGGER.debug("📡 SUBSCRIBING TO DURATION TOPIC: %s", duration_topic)
         if duration_topic:
             success = self.add_subscription(
                 CONF_MEDIA_DURATION_TOPIC,
-                media_duration_received,
+                self._wrap_message_handler(
+                    CONF_MEDIA_DURATION_TOPIC, media_duration_received
+                ),
                 {"_attr_media_duration"},
+                disable_encoding=self._raw_payload(CONF_MEDIA_DURATION_TOPIC),
             )
             if not success:
                 _LOGGER.error(
@@ -661,14 +1297,22 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 "⏲️ POSITION MESSAGE RECEIVED on topic %s: %s", msg.topic, msg.payload
             )
 
-            payload_str = self._decode_payload(msg.payload)
-            if not payload_str:
+            payload = msg.payload
+            if not payload:
                 _LOGGER.debug("Empty position payload received, ignoring")
                 return
 
+            # Either a bare number, or {"position": ..., "timestamp": ...}
+            device_time = None
             try:
-                position = int(payload_str)
-            except (ValueError, TypeError) as e:
+                if is_json_object(payload):
+                    data = json_loads_object(payload)
+                    position = float(data["position"])
+                    if "timestamp" in data:
+                        device_time = parse_device_timestamp(data["timestamp"])
+                else:
+                    position = parse_int(payload)
+            except (ValueError, TypeError, KeyError) as e:
                 _LOGGER.warning(
                     "Invalid media position format received: %s, error: %s",
                     msg.payload,
@@ -681,25 +1325,37 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 _LOGGER.warning("Media position cannot be negative: %s", position)
                 return
 
+            # A companion timestamp applies to the next position only
+            if device_time is None:
+                device_time = self._m3p_position_timestamp
+            self._m3p_position_timestamp = None
+
+            received = utcnow()
             self._attr_media_position = position
-            self._attr_media_position_updated_at = utcnow()
-            self.async_write_ha_state()
+            self._attr_media_position_updated_at = (
+                self._m3p_device_clock.to_local(device_time, received)
+                if device_time is not None
+                else received
+            )
+            self._async_write_state()
             _LOGGER.debug("✅ Media position updated to: %s", self._attr_media_position)
             _LOGGER.info(
-                "[m3p] %s position update (topic=%s, payload=%s, position=%s)",
+                "[m3p] %s position update (topic=%s, position=%s)",
                 self._log_identity(),
                 msg.topic,
-                payload_str,
                 self._attr_media_position,
             )
 
-        position_topic = self._config.get(CONF_MEDIA_POSITION_TOPIC)
+        position_topic = metadata_topic(CONF_MEDIA_POSITION_TOPIC)
         _LOGGER.debug("📡 SUBSCRIBING TO POSITION TOPIC: %s", position_topic)
         if position_topic:
             success = self.add_subscription(
                 CONF_MEDIA_POSITION_TOPIC,
-                media_position_received,
+                self._wrap_message_handler(
+                    CONF_MEDIA_POSITION_TOPIC, media_position_received
+                ),
                 {"_attr_media_position"},
+                disable_encoding=self._raw_payload(CONF_MEDIA_POSITION_TOPIC),
             )
             if not success:
                 _LOGGER.error(
@@ -718,18 +1374,241 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 "❌ No position topic configured, skipping position subscription"
             )
 
+        @callback
+        def media_position_timestamp_received(msg: ReceiveMessage) -> None:
+            """Handle device timestamps for the next position message."""
+            payload_str = self._decode_payload(msg.payload)
+            device_time = parse_device_timestamp(payload_str)
+            if device_time is None:
+                _LOGGER.warning(
+                    "Invalid media position timestamp received: %s", payload_str
+                )
+                return
+            self._m3p_position_timestamp = device_time
+            _LOGGER.debug("⏲️ Position timestamp updated to: %s", device_time)
+
+        position_timestamp_topic = metadata_topic(CONF_MEDIA_POSITION_TIMESTAMP_TOPIC)
+        if position_timestamp_topic:
+            success = self.add_subscription(
+                CONF_MEDIA_POSITION_TIMESTAMP_TOPIC,
+                self._wrap_message_handler(
+                    CONF_MEDIA_POSITION_TIMESTAMP_TOPIC,
+                    media_position_timestamp_received,
+                ),
+                set(),
+                disable_encoding=self._raw_payload(CONF_MEDIA_POSITION_TIMESTAMP_TOPIC),
+            )
+            if not success:
+                raise RuntimeError(
+                    "Failed to subscribe to position timestamp topic: "
+                    f"{position_timestamp_topic}"
+                )
+            _LOGGER.info(
+                "[m3p] %s subscribed to position_timestamp topic=%s",
+                self._log_identity(),
+                position_timestamp_topic,
+            )
+
+        @callback
+        def combined_state_received(msg: ReceiveMessage) -> None:
+            """Handle a combined state message, decoded from the raw bytes."""
+            encoding = self._config[CONF_COMBINED_STATE_ENCODING]
+            try:
+                data = decode_combined_state(msg.payload, encoding)
+            except ValueError as e:
+                _LOGGER.warning(
+                    "Invalid %s combined state received on %s: %s",
+                    encoding,
+                    msg.topic,
+                    e,
+                )
+                return
+            _LOGGER.debug("📦 COMBINED STATE RECEIVED on topic %s: %s", msg.topic, data)
+            self._async_apply_combined_state(data)
+
+        # Subscribed with encoding disabled: the payload stays bytes
+        if combined_topic := self._config.get(CONF_COMBINED_STATE_TOPIC):
+            success = self.add_subscription(
+                CONF_COMBINED_STATE_TOPIC,
+                self._wrap_message_handler(
+                    CONF_COMBINED_STATE_TOPIC, combined_state_received
+                ),
+                set(COMBINED_STATE_ATTRS.values()),
+                disable_encoding=True,
+            )
+            if not success:
+                raise RuntimeError(
+                    f"Failed to subscribe to combined state topic: {combined_topic}"
+                )
+            _LOGGER.info(
+                "[m3p] %s subscribed to combined_state topic=%s (encoding=%s)",
+                self._log_identity(),
+                combined_topic,
+                self._config[CONF_COMBINED_STATE_ENCODING],
+            )
+
+        @callback
+        def command_ack_received(msg: ReceiveMessage) -> None:
+            """Correlate a command ack with the command it answers."""
+            payload_str = self._decode_payload(msg.payload) or ""
+            try:
+                if payload_str.lstrip().startswith("{"):
+                    seq = int(json_loads_object(payload_str)["seq"])
+                else:
+                    seq = int(payload_str)
+            except (ValueError, TypeError, KeyError):
+                _LOGGER.debug("Ignoring command ack without seq: %s", payload_str)
+                return
+            if (sent := self._m3p_pending_acks.pop(seq, None)) is None:
+                return
+            _LOGGER.info(
+                "[m3p] %s command ack (seq=%s, latency_ms=%.1f)",
+                self._log_identity(),
+                seq,
+                (time.monotonic() - sent) * 1000,
+            )
+
+        # Acks are not state: they bypass the settle buffer and rate limits
+        if ack_topic := self._config.get(CONF_COMMAND_ACK_TOPIC):
+            success = self.add_subscription(
+                CONF_COMMAND_ACK_TOPIC, command_ack_received, set()
+            )
+            if not success:
+                raise RuntimeError(
+                    f"Failed to subscribe to command ack topic: {ack_topic}"
+                )
+            _LOGGER.info(
+                "[m3p] %s subscribed to command_ack topic=%s",
+                self._log_identity(),
+                ack_topic,
+            )
+
+        @callback
+        def library_page_received(msg: ReceiveMessage) -> None:
+            """Replace one library page; the page number ends the topic."""
+            try:
+                page = int(msg.topic.rsplit("/", 1)[-1])
+                items = json_loads_object(self._decode_payload(msg.payload) or "{}")[
+                    "items"
+                ]
+                self._m3p_library.apply_page(page, items)
+            except (ValueError, TypeError, KeyError):
+                _LOGGER.warning(
+                    "[m3p] %s ignoring invalid library page on %s",
+                    self._log_identity(),
+                    msg.topic,
+                )
+                return
+            _LOGGER.debug(
+                "📚 Library page %s: %s items (total=%s)",
+                page,
+                len(items),
+                len(self._m3p_library),
+            )
+
+        @callback
+        def library_delta_received(msg: ReceiveMessage) -> None:
+            """Apply incremental library changes."""
+            try:
+                delta = json_loads_object(self._decode_payload(msg.payload) or "{}")
+                upserts = delta.get("upsert", [])
+                removes = delta.get("remove", [])
+                self._m3p_library.apply_delta(upserts, removes)
+            except (ValueError, TypeError, AttributeError):
+                _LOGGER.warning(
+                    "[m3p] %s ignoring invalid library delta", self._log_identity()
+                )
+                return
+            _LOGGER.debug(
+                "📚 Library delta: +%s -%s (total=%s)",
+                len(upserts),
+                len(removes),
+                len(self._m3p_library),
+            )
+
+        # The library is not state, and every page shares one subscription:
+        # it bypasses the settle buffer and rate limits, which collapse by topic
+        for library_key, library_handler in (
+            (CONF_LIBRARY_INDEX_TOPIC, library_page_received),
+            (CONF_LIBRARY_DELTA_TOPIC, library_delta_received),
+        ):
+            if library_topic := self._config.get(library_key):
+                if not self.add_subscription(library_key, library_handler, set()):
+                    raise RuntimeError(
+                        f"Failed to subscribe to library topic: {library_topic}"
+                    )
+                _LOGGER.info(
+                    "[m3p] %s subscribed to %s=%s",
+                    self._log_identity(),
+                    library_key,
+                    library_topic,
+                )
+
+        @callback
+        def queue_received(msg: ReceiveMessage) -> None:
+            """Replace the play queue with a full snapshot."""
+            try:
+                self._m3p_queue.apply_snapshot(
+                    json_loads_object(self._decode_payload(msg.payload) or "{}")
+                )
+            except (ValueError, TypeError, KeyError):
+                _LOGGER.warning(
+                    "[m3p] %s ignoring invalid queue snapshot", self._log_identity()
+                )
+                return
+            _LOGGER.debug(
+                "🎶 Queue snapshot: %s items (version=%s)",
+                len(self._m3p_queue.items),
+                self._m3p_queue.version,
+            )
+
+        @callback
+        def queue_delta_received(msg: ReceiveMessage) -> None:
+            """Apply insert/remove/move operations to the play queue."""
+            try:
+                self._m3p_queue.apply_delta(
+                    json_loads_object(self._decode_payload(msg.payload) or "{}")
+                )
+            except (QueueDeltaError, ValueError) as err:
+                _LOGGER.warning(
+                    "[m3p] %s queue delta rejected, waiting for a snapshot: %s",
+                    self._log_identity(),
+                    err,
+                )
+                return
+            _LOGGER.debug(
+                "🎶 Queue delta applied: %s items (version=%s)",
+                len(self._m3p_queue.items),
+                self._m3p_queue.version,
+            )
+
+        # Deltas must all be applied in order, so like the library they
+        # bypass the settle buffer and rate limits
+        for queue_key, queue_handler in (
+            (CONF_QUEUE_TOPIC, queue_received),
+            (CONF_QUEUE_DELTA_TOPIC, queue_delta_received),
+        ):
+            if queue_topic := self._config.get(queue_key):
+                if not self.add_subscription(queue_key, queue_handler, set()):
+                    raise RuntimeError(
+                        f"Failed to subscribe to queue topic: {queue_topic}"
+                    )
+                _LOGGER.info(
+                    "[m3p] %s subscribed to %s=%s",
+                    self._log_identity(),
+                    queue_key,
+                    queue_topic,
+                )
+
         @callback
         def media_image_url_received(msg: ReceiveMessage) -> None:
             """Handle new MQTT media image url messages."""
-            payload_for_log = self._truncate_url_for_logging(
-                self._decode_payload(msg.payload)
-            )
+            image_url = METADATA_STRINGS.intern(self._decode_payload(msg.payload))
             _LOGGER.debug(
                 "🖼️ IMAGE URL MESSAGE RECEIVED on topic %s: %s",
                 msg.topic,
-                payload_for_log,
+                self._truncate_url_for_logging(image_url),
             )
-            image_url = self._decode_payload(msg.payload)
             self._attr_media_image_url = image_url
 
             # Auto-detect data URIs and mark them as remotely accessible
@@ -739,7 +1618,7 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                     "📊 Detected data URI image, setting remotely_accessible=True"
                 )
 
-            self.async_write_ha_state()
+            self._async_write_state()
             url_for_log = self._truncate_url_for_logging(self._attr_media_image_url)
             _LOGGER.debug("✅ Media image URL updated to: %s", url_for_log)
             _LOGGER.info(
@@ -749,12 +1628,14 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 url_for_log,
             )
 
-        image_url_topic = self._config.get(CONF_MEDIA_IMAGE_URL_TOPIC)
+        image_url_topic = metadata_topic(CONF_MEDIA_IMAGE_URL_TOPIC)
         _LOGGER.debug("📡 SUBSCRIBING TO IMAGE URL TOPIC: %s", image_url_topic)
         if image_url_topic:
             success = self.add_subscription(
                 CONF_MEDIA_IMAGE_URL_TOPIC,
-                media_image_url_received,
+                self._wrap_message_handler(
+                    CONF_MEDIA_IMAGE_URL_TOPIC, media_image_url_received
+                ),
                 {"_attr_media_image_url"},
             )
             if not success:
@@ -782,29 +1663,22 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
                 msg.topic,
                 msg.payload,
             )
-            payload_str = self._decode_payload(msg.payload)
-            # Convert string payload to boolean
-            if payload_str is not None:
-                self._attr_media_image_remotely_accessible = payload_str.lower() in (
-                    "true",
-                    "1",
-                    "yes",
-                    "on",
-                )
-                self.async_write_ha_state()
+            # Convert payload to boolean
+            if msg.payload is not None:
+                self._attr_media_image_remotely_accessible = parse_bool(msg.payload)
+                self._async_write_state()
                 _LOGGER.debug(
                     "✅ Media image remotely accessible updated to: %s",
                     self._attr_media_image_remotely_accessible,
                 )
                 _LOGGER.info(
-                    "[m3p] %s image_accessible update (topic=%s, payload=%s, accessible=%s)",
+                    "[m3p] %s image_accessible update (topic=%s, accessible=%s)",
                     self._log_identity(),
                     msg.topic,
-                    payload_str,
                     self._attr_media_image_remotely_accessible,
                 )
 
-        image_accessible_topic = self._config.get(
+        image_accessible_topic = metadata_topic(
             CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC
         )
         _LOGGER.debug(
@@ -814,8 +1688,14 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
         if image_accessible_topic:
             success = self.add_subscription(
                 CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC,
-                media_image_remotely_accessible_received,
+                self._wrap_message_handler(
+                    CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC,
+                    media_image_remotely_accessible_received,
+                ),
                 {"_attr_media_image_remotely_accessible"},
+                disable_encoding=self._raw_payload(
+                    CONF_MEDIA_IMAGE_REMOTELY_ACCESSIBLE_TOPIC
+                ),
             )
             if not success:
                 _LOGGER.error(
@@ -842,167 +1722,717 @@ class MqttMediaPlayer(MqttEntity, MediaPlayerEntity):
             len(getattr(self, "_subscriptions", {})),
         )
 
-    async def _subscribe_topics(self) -> None:
-        """(Re)Subscribe to topics."""
-        from homeassistant.components.mqtt.subscription import (
-            async_subscribe_topics_internal,
-        )
+    @callback
+    def _wrap_message_handler(
+        self, key: str, handler: Callable[[ReceiveMessage], None]
+    ) -> Callable[[ReceiveMessage], None]:
+        """Route a topic handler through the entity's central message path.
 
-        _LOGGER.debug(
-            "🔌 Actually subscribing to MQTT topics for entity: %s", self.entity_id
-        )
-        async_subscribe_topics_internal(self.hass, self._sub_state)
-        _LOGGER.debug("✅ MQTT subscription completed for entity: %s", self.entity_id)
+        While settling after a broker reconnect, only the latest message per
+        topic is kept; it is applied when the quiet window ends. Otherwise
+        messages are admitted through the per-topic and per-entity token
+        buckets, and the latest over-budget message per topic is applied once
+        tokens are available again.
+        """
+
+        if key in self._m3p_value_paths or key in self._m3p_value_templates:
+            handler = partial(self._async_apply_value_template, key, handler)
+
+        @callback
+        def message_received(msg: ReceiveMessage) -> None:
+            if self._m3p_settle_timer is not None:
+                self._m3p_settle_buffer[key] = (handler, msg)
+                self._m3p_settle_last = time.monotonic()
+                return
+            if not self._async_admit_message(key):
+                # Over budget: keep only the latest value for a deferred apply
+                self._m3p_deferred[key] = (handler, msg)
+                return
+            self._m3p_deferred.pop(key, None)
+            handler(msg)
+
+        return message_received
+
+    @callback
+    def _async_apply_combined_state(self, data: dict[str, Any]) -> None:
+        """Apply every field of a combined state message with one state write.
+
+        Fields are validated as on their own topics; invalid ones are skipped.
+        """
+        previous_state = self._attr_state
+        if (state := data.get("state")) is not None:
+            state = str(state).lower()
+            if state == STATE_UNAVAILABLE:
+                self._attr_available = False
+            elif state == STATE_UNKNOWN:
+                self._attr_available = True
+                self._attr_state = STATE_UNKNOWN
+            else:
+                try:
+                    self._attr_state = MediaPlayerState(state)
+                    self._attr_available = True
+                except ValueError:
+                    _LOGGER.warning("Invalid media player state received: %s", state)
+
+        for key in ("media_title", "media_artist", "media_album_name"):
+            if key in data:
+                value = data[key]
+                setattr(
+                    self,
+                    COMBINED_STATE_ATTRS[key],
+                    None if value is None else METADATA_STRINGS.intern(str(value)),
+                )
+
+        if "media_image_url" in data:
+            image_url = data["media_image_url"]
+            image_url = (
+                None if image_url is None else METADATA_STRINGS.intern(str(image_url))
+            )
+            self._attr_media_image_url = image_url
+            if self._is_data_uri_image(image_url):
+                self._attr_media_image_remotely_accessible = True
+
+        if (volume := data.get("volume_level")) is not None:
+            if isinstance(volume, (int, float)) and 0.0 <= volume <= 1.0:
+                self._attr_volume_level = float(volume)
+            else:
+                _LOGGER.warning("Volume level out of range: %s", volume)
+
+        if (duration := data.get("media_duration")) is not None:
+            if isinstance(duration, (int, float)) and duration >= 0:
+                self._attr_media_duration = int(duration)
+            else:
+                _LOGGER.warning("Invalid media duration received: %s", duration)
+
+        if (position := data.get("media_position")) is not None:
+            if isinstance(position, (int, float)) and position >= 0:
+                device_time = parse_device_timestamp(
+                    data.get("media_position_timestamp")
+                )
+                received = utcnow()
+                self._attr_media_position = position
+                self._attr_media_position_updated_at = (
+                    self._m3p_device_clock.to_local(device_time, received)
+                    if device_time is not None
+                    else received
+                )
+            else:
+                _LOGGER.warning("Invalid media position received: %s", position)
+
+        self._async_write_state()
+        if self._attr_state != previous_state:
+            self._async_scale_subscriptions()
         _LOGGER.info(
-            "[m3p] %s MQTT topic subscription batch complete (subscriptions=%s)",
+            "[m3p] %s combined state update (fields=%s, state=%s)",
             self._log_identity(),
-            list(getattr(self, "_subscriptions", {}).keys()),
+            list(data),
+            self._attr_state,
         )
 
-    async def async_media_play(self) -> None:
-        """Send a play command to the media player."""
-        topic = self._config.get(CONF_PLAY_TOPIC)
-        if not topic:
-            _LOGGER.warning("Play command called but no play topic configured")
-            return
-        _LOGGER.debug("🎵 Sending PLAY command to topic: %s", topic)
-        _LOGGER.info("[m3p] %s publish PLAY (topic=%s)", self._log_identity(), topic)
+    @callback
+    def _async_apply_value_template(
+        self,
+        key: str,
+        handler: Callable[[ReceiveMessage], None],
+        msg: ReceiveMessage,
+    ) -> None:
+        """Extract a topic's value from its payload, then handle it as usual."""
         try:
-            await self.async_publish(topic, "")
-        except Exception as e:
-            _LOGGER.error("Failed to publish play command to topic %s: %s", topic, e)
-
-    async def async_media_pause(self) -> None:
-        """Send a pause command to the media player."""
-        topic = self._config.get(CONF_PAUSE_TOPIC)
-        if not topic:
-            _LOGGER.warning("Pause command called but no pause topic configured")
+            if (path := self._m3p_value_paths.get(key)) is not None:
+                value = value_to_payload(
+                    extract_json_path(self._async_parse_json(msg), path)
+                )
+            else:
+                value = str(
+                    self._m3p_value_templates[
+                        key
+                    ].async_render_with_possible_json_value(msg.payload)
+                )
+        except (ValueError, KeyError, IndexError, TypeError, TemplateError) as e:
+            _LOGGER.warning(
+                "Could not extract %s from payload on %s: %s", key, msg.topic, e
+            )
             return
-        _LOGGER.debug("⏸️ Sending PAUSE command to topic: %s", topic)
-        _LOGGER.info("[m3p] %s publish PAUSE (topic=%s)", self._log_identity(), topic)
-        try:
-            await self.async_publish(topic, "")
-        except Exception as e:
-            _LOGGER.error("Failed to publish pause command to topic %s: %s", topic, e)
+        handler(replace(msg, payload=value))
+
+    def _async_parse_json(self, msg: ReceiveMessage) -> Any:
+        """Parse a JSON payload once for every attribute bound to its topic."""
+        # Keyed on the payload object, which every subscription of one message
+        # shares. Holding it keeps its id from being reused, and the same
+        # object always has the same content, so a hit is never stale.
+        cache = self._m3p_json_cache
+        if cache is not None and cache[0] is msg.payload:
+            return cache[1]
+        data = json_loads(msg.payload)
+        self._m3p_json_cache = (msg.payload, data)
+        return data
 
-    async def async_media_stop(self) -> None:
-        """Send a stop command to the media player."""
-        topic = self._config.get(CONF_STOP_TOPIC)
-        if not topic:
-            _LOGGER.warning("Stop command called but no stop topic configured")
+    @callback
+    def _async_write_state(self) -> None:
+        """Write state, unless a settle flush will write it once at the end."""
+        if self._m3p_applying_buffer:
             return
-        _LOGGER.debug("⏹️ Sending STOP command to topic: %s", topic)
-        _LOGGER.info("[m3p] %s publish STOP (topic=%s)", self._log_identity(), topic)
-        try:
-            await self.async_publish(topic, "")
-        except Exception as e:
-            _LOGGER.error("Failed to publish stop command to topic %s: %s", topic, e)
+        self.async_write_ha_state()
 
-    async def async_media_next_track(self) -> None:
-        """Send a next track command to the media player."""
-        topic = self._config.get(CONF_NEXT_TRACK_TOPIC)
-        if not topic:
-            _LOGGER.warning(
-                "Next track command called but no next track topic configured"
-            )
+    @callback
+    def _async_begin_settle(self) -> None:
+        """Start buffering messages until the reconnect burst goes quiet.
+
+        The retained burst only starts once the client's batched
+        resubscriptions reach the broker, so the settle lasts at least
+        REFRESH_DELAY_SECONDS.
+        """
+        window = self._config[CONF_RECONNECT_QUIET_WINDOW]
+        if not window:
             return
-        _LOGGER.debug("⏭️ Sending NEXT TRACK command to topic: %s", topic)
-        _LOGGER.info("[m3p] %s publish NEXT (topic=%s)", self._log_identity(), topic)
-        try:
-            await self.async_publish(topic, "")
-        except Exception as e:
-            _LOGGER.error(
-                "Failed to publish next track command to topic %s: %s", topic, e
+        now = time.monotonic()
+        self._m3p_settle_last = now
+        self._m3p_settle_not_before = now + REFRESH_DELAY_SECONDS
+        if self._m3p_settle_timer is None:
+            self._m3p_settle_deadline = now + RECONNECT_SETTLE_MAX_SECONDS
+            self._m3p_settle_timer = async_call_later(
+                self.hass,
+                max(window, REFRESH_DELAY_SECONDS),
+                self._async_settle_check,
+            )
+            _LOGGER.debug(
+                "[m3p] %s settling for %.2fs quiet window",
+                self._log_identity(),
+                window,
             )
 
-    async def async_media_previous_track(self) -> None:
-        """Send a previous track command to the media player."""
-        topic = self._config.get(CONF_PREVIOUS_TRACK_TOPIC)
-        if not topic:
-            _LOGGER.warning(
-                "Previous track command called but no previous track topic configured"
+    @callback
+    def _async_settle_check(self, _now: datetime) -> None:
+        """Apply buffered messages once no message arrived for a full window."""
+        window = self._config[CONF_RECONNECT_QUIET_WINDOW]
+        now = time.monotonic()
+        quiet_for = now - self._m3p_settle_last
+        wait = max(window - quiet_for, self._m3p_settle_not_before - now)
+        if wait > 0 and now < self._m3p_settle_deadline:
+            self._m3p_settle_timer = async_call_later(
+                self.hass, wait, self._async_settle_check
             )
             return
-        _LOGGER.debug("⏮️ Sending PREVIOUS TRACK command to topic: %s", topic)
+        self._m3p_settle_timer = None
+
+        buffered, self._m3p_settle_buffer = self._m3p_settle_buffer, {}
+        self._async_apply_messages(buffered)
         _LOGGER.info(
-            "[m3p] %s publish PREVIOUS (topic=%s)", self._log_identity(), topic
+            "[m3p] %s applied %s buffered topics after settle",
+            self._log_identity(),
+            len(buffered),
         )
+
+    @callback
+    def _async_apply_messages(
+        self,
+        buffered: dict[str, tuple[Callable[[ReceiveMessage], None], ReceiveMessage]],
+    ) -> None:
+        """Run buffered handlers and write state once."""
+        if not buffered:
+            return
+        self._m3p_applying_buffer = True
         try:
-            await self.async_publish(topic, "")
-        except Exception as e:
-            _LOGGER.error(
-                "Failed to publish previous track command to topic %s: %s", topic, e
-            )
+            for handler, msg in buffered.values():
+                handler(msg)
+        finally:
+            self._m3p_applying_buffer = False
+        self.async_write_ha_state()
 
-    async def async_set_volume_level(self, volume: float) -> None:
-        """Send a set volume level command to the media player."""
-        topic = self._config.get(CONF_VOLUME_SET_TOPIC)
-        if not topic:
-            _LOGGER.warning(
-                "Set volume level command called but no volume set topic configured"
+    @callback
+    def _async_cancel_settle(self) -> None:
+        if self._m3p_settle_timer is not None:
+            self._m3p_settle_timer()
+            self._m3p_settle_timer = None
+        self._m3p_settle_buffer.clear()
+
+    @callback
+    def _async_admit_message(self, key: str) -> bool:
+        """Take a token from the topic and entity buckets, if both have one."""
+        topic_rate = self._config[CONF_TOPIC_RATE_LIMIT]
+        entity_bucket = self._m3p_entity_bucket
+        if not topic_rate and entity_bucket is None:
+            return True
+
+        now = time.monotonic()
+        topic_bucket = None
+        if topic_rate:
+            topic_bucket = self._m3p_topic_buckets.get(key)
+            if topic_bucket is None:
+                topic_bucket = self._m3p_topic_buckets[key] = TokenBucket(
+                    topic_rate, topic_rate * RATE_LIMIT_BURST_SECONDS, now
+                )
+        buckets = [bucket for bucket in (topic_bucket, entity_bucket) if bucket]
+        if all(bucket.has_token(now) for bucket in buckets):
+            for bucket in buckets:
+                bucket.take(now)
+            return True
+
+        self._async_note_limited(key, now)
+        if self._m3p_deferred_timer is None:
+            delay = max(bucket.time_until_token(now) for bucket in buckets)
+            self._m3p_deferred_timer = async_call_later(
+                self.hass, delay, self._async_apply_deferred
             )
+        return False
+
+    @callback
+    def _async_apply_deferred(self, _now: datetime) -> None:
+        """Apply the latest rate-limited message per topic."""
+        self._m3p_deferred_timer = None
+        deferred, self._m3p_deferred = self._m3p_deferred, {}
+        now = time.monotonic()
+        for key in deferred:
+            if bucket := self._m3p_topic_buckets.get(key):
+                bucket.take(now)
+            if self._m3p_entity_bucket is not None:
+                self._m3p_entity_bucket.take(now)
+        self._async_apply_messages(deferred)
+
+    @callback
+    def _async_note_limited(self, key: str, now: float) -> None:
+        """Count rate-limited messages and raise a repair issue for noisy players."""
+        if now - self._m3p_limited_since >= NOISY_DEVICE_WINDOW_SECONDS:
+            self._m3p_limited_since = now
+            self._m3p_limited_count = 0
+        self._m3p_limited_count += 1
+        self._m3p_last_limited = now
+        if (
+            self._m3p_limited_count != NOISY_DEVICE_THRESHOLD
+            or self._m3p_noisy_issue_id is not None
+        ):
             return
-        payload = str(volume)
-        _LOGGER.debug(
-            "🔊 Sending SET VOLUME LEVEL command to topic: %s, payload: %s",
+
+        topic = self._config.get(key)
+        # Keyed on entity_id: YAML players may have no unique_id
+        self._m3p_noisy_issue_id = f"noisy_device_{self.entity_id}"
+        _LOGGER.warning(
+            "[m3p] %s is publishing faster than its rate limit (topic=%s, "
+            "limited=%s in %.0fs)",
+            self._log_identity(),
             topic,
-            payload,
+            self._m3p_limited_count,
+            NOISY_DEVICE_WINDOW_SECONDS,
         )
+        ir.async_create_issue(
+            self.hass,
+            DOMAIN,
+            self._m3p_noisy_issue_id,
+            is_fixable=False,
+            severity=ir.IssueSeverity.WARNING,
+            translation_key="noisy_device",
+            translation_placeholders={
+                "entity_id": self.entity_id,
+                "topic": str(topic),
+                "limited": str(self._m3p_limited_count),
+                "window": f"{NOISY_DEVICE_WINDOW_SECONDS:.0f}",
+            },
+        )
+        self._m3p_noisy_clear_timer = async_call_later(
+            self.hass, NOISY_DEVICE_WINDOW_SECONDS, self._async_check_noisy_cleared
+        )
+
+    @callback
+    def _async_check_noisy_cleared(self, _now: datetime) -> None:
+        """Delete the noisy device issue after a full window without limiting."""
+        quiet_for = time.monotonic() - self._m3p_last_limited
+        if quiet_for < NOISY_DEVICE_WINDOW_SECONDS:
+            self._m3p_noisy_clear_timer = async_call_later(
+                self.hass,
+                NOISY_DEVICE_WINDOW_SECONDS - quiet_for,
+                self._async_check_noisy_cleared,
+            )
+            return
+        self._m3p_noisy_clear_timer = None
+        if self._m3p_noisy_issue_id is not None:
+            ir.async_delete_issue(self.hass, DOMAIN, self._m3p_noisy_issue_id)
+            self._m3p_noisy_issue_id = None
+            _LOGGER.info(
+                "[m3p] %s is back within its rate limits", self._log_identity()
+            )
+
+    @callback
+    def _async_cleanup_rate_limit(self) -> None:
+        if self._m3p_deferred_timer is not None:
+            self._m3p_deferred_timer()
+            self._m3p_deferred_timer = None
+        self._m3p_deferred.clear()
+        if self._m3p_noisy_clear_timer is not None:
+            self._m3p_noisy_clear_timer()
+            self._m3p_noisy_clear_timer = None
+        if self._m3p_noisy_issue_id is not None:
+            ir.async_delete_issue(self.hass, DOMAIN, self._m3p_noisy_issue_id)
+            self._m3p_noisy_issue_id = None
+
+    def _metadata_subscriptions_wanted(self) -> bool:
+        """Return True when the non-state topics should be subscribed."""
+        if not self._config[CONF_DYNAMIC_SUBSCRIPTIONS]:
+            return True
+        # Until the first state arrives, assume the player may be active
+        return self._attr_state in (None, STATE_UNKNOWN) or (
+            self._attr_state in ACTIVE_STATES
+        )
+
+    @callback
+    def _async_scale_subscriptions(self) -> None:
+        """Attach or detach metadata subscriptions after a state change."""
+        if self._metadata_subscriptions_wanted() == self._m3p_metadata_subscribed:
+            return
+        self.hass.async_create_task(self._async_resubscribe())
+
+    async def _async_resubscribe(self) -> None:
+        """Rebuild subscriptions; topics no longer prepared are unsubscribed."""
+        self._subscriptions = {}
+        self._prepare_subscribe_topics()
+        self._sub_state = subscription.async_prepare_subscribe_topics(
+            self.hass, self._sub_state, self._subscriptions
+        )
+        await self._subscribe_topics()
+        if self._m3p_metadata_subscribed:
+            # Without retained metadata, the new subscriptions would stay empty
+            self._async_schedule_refresh()
+
+    @callback
+    def _async_setup_position_interval(self) -> None:
+        """Track whether the player is watched, if the device accepts an interval."""
+        if not self._config.get(CONF_POSITION_INTERVAL_COMMAND_TOPIC):
+            return
+        for signal in (SIGNAL_WEBSOCKET_CONNECTED, SIGNAL_WEBSOCKET_DISCONNECTED):
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass, signal, self._async_update_position_interval
+                )
+            )
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass,
+                self._async_update_position_interval,
+                timedelta(seconds=POSITION_WATCH_CHECK_SECONDS),
+            )
+        )
+        self._async_update_position_interval()
+
+    def _is_watched(self) -> bool:
+        """Return True when a frontend is connected or an automation uses us.
+
+        HA does not expose which entities a frontend is rendering, so any
+        open websocket connection counts as watching.
+        """
+        if self.hass.data.get(WEBSOCKET_DATA_CONNECTIONS, 0) > 0:
+            return True
+        return bool(automation.automations_with_entity(self.hass, self.entity_id))
+
+    @callback
+    def _async_update_position_interval(self, *_: Any) -> None:
+        """Tell the device how often to report position, when that changes."""
+        watched = self._is_watched()
+        interval = self._config[
+            CONF_POSITION_INTERVAL_WATCHED
+            if watched
+            else CONF_POSITION_INTERVAL_UNWATCHED
+        ]
+        if interval == self._m3p_position_interval:
+            return
+        self._m3p_position_interval = interval
+        topic = self._config[CONF_POSITION_INTERVAL_COMMAND_TOPIC]
+        payload = f"{interval:g}"
         _LOGGER.info(
-            "[m3p] %s publish VOLUME_SET (topic=%s, payload=%s)",
+            "[m3p] %s publish POSITION_INTERVAL (topic=%s, payload=%s, watched=%s)",
             self._log_identity(),
             topic,
             payload,
+            watched,
+        )
+        self.hass.async_create_task(
+            self._async_publish_position_interval(topic, payload)
         )
+
+    async def _async_publish_position_interval(self, topic: str, payload: str) -> None:
+        # Retained, so the device picks the interval up when it reconnects
         try:
-            await self.async_publish(topic, payload)
+            await self.async_publish(topic, payload, retain=True)
         except Exception as e:
+            self._m3p_position_interval = None
             _LOGGER.error(
-                "Failed to publish volume level command to topic %s: %s", topic, e
+                "Failed to publish position interval to topic %s: %s", topic, e
             )
 
-    async def async_mute_volume(self, mute: bool) -> None:
-        """Send a mute volume command to the media player."""
-        topic = self._config.get(CONF_VOLUME_MUTE_TOPIC)
-        if not topic:
-            _LOGGER.warning(
-                "Mute volume command called but no volume mute topic configured"
-            )
-            return
-        payload = "true" if mute else "false"
+    @callback
+    def _async_mqtt_connection_changed(self, connected: bool) -> None:
+        """Settle the retained burst after a reconnect, and send held commands."""
+        if connected:
+            self._async_begin_settle()
+            self.hass.async_create_task(self._async_flush_command_queue())
+            self._async_schedule_refresh()
+
+    async def _subscribe_topics(self) -> None:
+        """(Re)Subscribe to topics."""
         _LOGGER.debug(
-            "🔇 Sending MUTE VOLUME command to topic: %s, payload: %s", topic, payload
+            "🔌 Actually subscribing to MQTT topics for entity: %s", self.entity_id
         )
+        subscription.async_subscribe_topics_internal(self.hass, self._sub_state)
+        _LOGGER.debug("✅ MQTT subscription completed for entity: %s", self.entity_id)
         _LOGGER.info(
-            "[m3p] %s publish VOLUME_MUTE (topic=%s, payload=%s)",
+            "[m3p] %s MQTT topic subscription batch complete (subscriptions=%s)",
             self._log_identity(),
-            topic,
-            payload,
+            list(getattr(self, "_subscriptions", {}).keys()),
+        )
+
+    @callback
+    def _async_schedule_refresh(self) -> None:
+        """Request a refresh once new subscriptions have reached the broker."""
+        if not self._config.get(CONF_REFRESH_COMMAND_TOPIC):
+            return
+        self._async_cancel_refresh()
+
+        @callback
+        def _refresh(_now: datetime) -> None:
+            self._m3p_refresh_timer = None
+            self.hass.async_create_task(self.async_request_refresh())
+
+        self._m3p_refresh_timer = async_call_later(
+            self.hass, REFRESH_DELAY_SECONDS, _refresh
+        )
+
+    @callback
+    def _async_cancel_refresh(self) -> None:
+        if self._m3p_refresh_timer is not None:
+            self._m3p_refresh_timer()
+            self._m3p_refresh_timer = None
+
+    async def async_request_refresh(self) -> None:
+        """Ask the device to republish its current state once.
+
+        Sent after the entity is added, after a reconnect, after metadata
+        topics are resubscribed and on the m3p.refresh service, so devices
+        need not retain their state topics.
+        """
+        if not (topic := self._config.get(CONF_REFRESH_COMMAND_TOPIC)):
+            return
+        if not mqtt.is_connected(self.hass):
+            # The reconnect will ask again
+            return
+        _LOGGER.info(
+            "[m3p] %s requesting refresh (topic=%s)", self._log_identity(), topic
         )
         try:
-            await self.async_publish(topic, payload)
-        except Exception as e:
-            _LOGGER.error(
-                "Failed to publish mute volume command to topic %s: %s", topic, e
+            await self.async_publish(
+                topic, "", qos=self._config[CONF_QOS], retain=False
             )
+        except Exception as e:
+            _LOGGER.error("Failed to publish refresh request to topic %s: %s", topic, e)
 
-    async def async_media_seek(self, position: float) -> None:
-        """Send a seek command to the media player."""
-        topic = self._config.get(CONF_SEEK_TOPIC)
+    async def _async_send_command(
+        self, action: str, topic_key: str, payload: str, value: Any = None
+    ) -> None:
+        """Publish a command on command_topic, or on its dedicated topic.
+
+        On command_topic the payload is ``{"action": ..., "value": ...}``,
+        plus ``"seq"`` when command_sequence is enabled.
+        """
+        command_topic = self._config.get(CONF_COMMAND_TOPIC)
+        if command_topic and action in self._config[CONF_COMMAND_ACTIONS]:
+            topic = command_topic
+            message: dict[str, Any] = {"action": action}
+            if value is not None:
+                message["value"] = value
+            if self._config[CONF_COMMAND_SEQUENCE]:
+                message["seq"] = self._async_next_command_seq()
+            payload = json_dumps(message)
+        else:
+            topic = self._config.get(topic_key)
         if not topic:
-            _LOGGER.warning("Seek command called but no seek topic configured")
+            _LOGGER.warning("%s command called but no %s configured", action, topic_key)
+            return
+        await self._async_dispatch_command(action, topic, payload)
+
+    async def async_send_group_command(self, action: str, payload: str) -> None:
+        """Publish a command on the group command topic this player shares.
+
+        The player's options for the action and its command queue apply, as
+        for its own commands.
+        """
+        if topic := self.group_command_topic:
+            await self._async_dispatch_command(action, topic, payload)
+
+    async def _async_dispatch_command(
+        self, action: str, topic: str, payload: str
+    ) -> None:
+        """Publish a command with the action's QoS, retain and await_ack."""
+        options = self._config[CONF_COMMAND_OPTIONS].get(action, {})
+        qos = options.get(CONF_QOS, self._config[CONF_QOS])
+        retain = options.get(CONF_RETAIN, False)
+        publish = self._async_publish_command(action, topic, payload, qos, retain)
+        if options.get(CONF_AWAIT_ACK, True):
+            await publish
+        else:
+            # Fire and forget: don't hold the service call until the broker acks
+            self.hass.async_create_background_task(
+                publish, f"m3p {self._log_identity()} {action}"
+            )
+
+    async def _async_publish_command(
+        self,
+        action: str,
+        topic: str,
+        payload: str,
+        qos: int,
+        retain: bool,
+        queued_at: float | None = None,
+    ) -> None:
+        """Publish a command, holding it while MQTT is disconnected.
+
+        ``queued_at`` is when a flushed command was first queued; requeuing
+        keeps it, so the TTL is not restarted when the connection flaps.
+        """
+        queue = self._m3p_command_queue
+        if queue.ttl and not mqtt.is_connected(self.hass):
+            self._async_queue_command(action, topic, payload, qos, retain, queued_at)
             return
-        payload = str(position)
-        _LOGGER.debug(
-            "⏩ Sending SEEK command to topic: %s, payload: %s", topic, payload
-        )
         _LOGGER.info(
-            "[m3p] %s publish SEEK (topic=%s, payload=%s)",
+            "[m3p] %s publish %s (topic=%s, payload=%s, qos=%s, retain=%s)",
             self._log_identity(),
+            action.upper(),
             topic,
             payload,
+            qos,
+            retain,
         )
         try:
-            await self.async_publish(topic, payload)
+            await self.async_publish(topic, payload, qos=qos, retain=retain)
         except Exception as e:
-            _LOGGER.error("Failed to publish seek command to topic %s: %s", topic, e)
+            _LOGGER.error(
+                "Failed to publish %s command to topic %s: %s", action, topic, e
+            )
+            # Lost the connection mid-publish: hold it for the reconnect
+            if queue.ttl and not mqtt.is_connected(self.hass):
+                self._async_queue_command(
+                    action, topic, payload, qos, retain, queued_at
+                )
+
+    @callback
+    def _async_queue_command(
+        self,
+        action: str,
+        topic: str,
+        payload: str,
+        qos: int,
+        retain: bool,
+        queued_at: float | None = None,
+    ) -> None:
+        """Hold a command until MQTT reconnects."""
+        if queued_at is None:
+            queued_at = time.monotonic()
+        group = topic == self.group_command_topic
+        dropped = self._m3p_command_queue.push(
+            QueuedCommand(action, topic, payload, qos, retain, queued_at, group)
+        )
+        _LOGGER.info(
+            "[m3p] %s MQTT disconnected, queued %s (queued=%s, superseded=%s)",
+            self._log_identity(),
+            action.upper(),
+            len(self._m3p_command_queue),
+            [command.action for command in dropped] or "<none>",
+        )
+
+    async def _async_flush_command_queue(self) -> None:
+        """Send queued commands in order, dropping any past their TTL."""
+        if not len(self._m3p_command_queue):
+            return
+        queued = len(self._m3p_command_queue)
+        commands = self._m3p_command_queue.drain(time.monotonic())
+        _LOGGER.info(
+            "[m3p] %s MQTT reconnected, flushing %s queued commands (expired=%s)",
+            self._log_identity(),
+            len(commands),
+            queued - len(commands),
+        )
+        for command in commands:
+            await self._async_publish_command(
+                command.action,
+                command.topic,
+                command.payload,
+                command.qos,
+                command.retain,
+                command.queued_at,
+            )
+
+    @callback
+    def _async_next_command_seq(self) -> int:
+        """Return the next sequence number, remembering when it was sent."""
+        self._m3p_command_seq += 1
+        seq = self._m3p_command_seq
+        if self._config.get(CONF_COMMAND_ACK_TOPIC):
+            pending = self._m3p_pending_acks
+            pending[seq] = time.monotonic()
+            while len(pending) > COMMAND_PENDING_ACKS:
+                del pending[next(iter(pending))]
+        return seq
+
+    async def async_media_play(self) -> None:
+        """Send a play command to the media player."""
+        await self._async_send_command(ACTION_PLAY, CONF_PLAY_TOPIC, "")
+
+    async def async_media_pause(self) -> None:
+        """Send a pause command to the media player."""
+        await self._async_send_command(ACTION_PAUSE, CONF_PAUSE_TOPIC, "")
+
+    async def async_media_stop(self) -> None:
+        """Send a stop command to the media player."""
+        await self._async_send_command(ACTION_STOP, CONF_STOP_TOPIC, "")
+
+    async def async_media_next_track(self) -> None:
+        """Send a next track command to the media player."""
+        await self._async_send_command(ACTION_NEXT_TRACK, CONF_NEXT_TRACK_TOPIC, "")
+
+    async def async_media_previous_track(self) -> None:
+        """Send a previous track command to the media player."""
+        await self._async_send_command(
+            ACTION_PREVIOUS_TRACK, CONF_PREVIOUS_TRACK_TOPIC, ""
+        )
+
+    async def async_set_volume_level(self, volume: float) -> None:
+        """Send a set volume level command to the media player."""
+        await self._async_send_command(
+            ACTION_VOLUME_SET, CONF_VOLUME_SET_TOPIC, str(volume), volume
+        )
+
+    async def async_mute_volume(self, mute: bool) -> None:
+        """Send a mute volume command to the media player."""
+        await self._async_send_command(
+            ACTION_VOLUME_MUTE,
+            CONF_VOLUME_MUTE_TOPIC,
+            "true" if mute else "false",
+            mute,
+        )
+
+    async def async_media_seek(self, position: float) -> None:
+        """Send a seek command to the media player."""
+        await self._async_send_command(
+            ACTION_SEEK, CONF_SEEK_TOPIC, str(position), position
+        )
+
+    async def async_play_media(
+        self, media_type: MediaType | str, media_id: str, **kwargs: Any
+    ) -> None:
+        """Ask the player to play an item, typically one from its library."""
+        value = {"media_content_id": media_id, "media_content_type": media_type}
+        await self._async_send_command(
+            ACTION_PLAY_MEDIA, CONF_PLAY_MEDIA_TOPIC, json_dumps(value), value
+        )
+
+    async def async_get_queue(self) -> ServiceResponse:
+        """Return the play queue for the m3p.get_queue service."""
+        return {
+            "items": self._m3p_queue.as_list(),
+            "version": self._m3p_queue.version,
+            "stale": self._m3p_queue.stale,
+        }
+
+    async def async_browse_media(
+        self,
+        media_content_type: MediaType | str | None = None,
+        media_content_id: str | None = None,
+    ) -> BrowseMedia:
+        """Browse the library index; no request goes to the device."""
+        return self._m3p_library.browse(media_content_id)
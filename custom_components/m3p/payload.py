@@ -0,0 +1,115 @@
+"""Payload decoding for Mellow MQTT player topics.
+
+State, numeric and boolean topics are subscribed without the MQTT client's
+UTF-8 decoding, so their payloads arrive as the received bytes. ``int()`` and
+``float()`` parse bytes directly and known state names map to shared ``str``
+constants, so ingesting these topics creates no intermediate strings. Every
+helper also accepts ``str``, as handed on by a value template.
+
+Titles, artists, albums and artwork URLs go through ``METADATA_STRINGS``, so
+players on the same stream share one object per value. Home Assistant's
+attribute comparisons then short-circuit on identity.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from homeassistant.components.media_player import MediaPlayerState
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+
+from .const import INTERN_MAX_LENGTH, INTERN_TABLE_SIZE
+
+Payload = str | bytes | bytearray | memoryview
+
+_STATE_NAMES: dict[str | bytes, str] = {
+    key: name
+    for name in (
+        *(state.value for state in MediaPlayerState),
+        STATE_UNAVAILABLE,
+        STATE_UNKNOWN,
+    )
+    for key in (name, name.encode())
+}
+
+_TRUE_TEXT = frozenset({"true", "1", "yes", "on"})
+_TRUE_BYTES = frozenset(value.encode() for value in _TRUE_TEXT)
+
+
+class InternTable:
+    """Bounded table of shared strings, evicting the least recently used."""
+
+    def __init__(self, size: int, max_length: int) -> None:
+        """Initialize an empty table."""
+        self._size = size
+        self._max_length = max_length
+        self._strings: OrderedDict[str, str] = OrderedDict()
+
+    def intern(self, value: str | None) -> str | None:
+        """Return the shared copy of value, adding it if not yet held."""
+        if value is None or len(value) > self._max_length:
+            return value
+        strings = self._strings
+        if (shared := strings.get(value)) is not None:
+            strings.move_to_end(value)
+            return shared
+        strings[value] = value
+        if len(strings) > self._size:
+            strings.popitem(last=False)
+        return value
+
+
+METADATA_STRINGS = InternTable(INTERN_TABLE_SIZE, INTERN_MAX_LENGTH)
+
+
+def _number_buffer(payload: Payload) -> str | bytes | bytearray:
+    # int() and float() take str, bytes and bytearray, but not memoryview;
+    # numeric payloads are a few bytes, so the copy is negligible
+    return payload.tobytes() if isinstance(payload, memoryview) else payload
+
+
+def decode_text(payload: Payload | None) -> str | None:
+    """Decode a payload to text, without copying buffers first.
+
+    Invalid UTF-8 is replaced rather than raised, so it fails validation in
+    the handler like any other bad value.
+    """
+    if payload is None or isinstance(payload, str):
+        return payload
+    # str() decodes straight from any buffer, memoryview included
+    return str(payload, "utf-8", "replace")
+
+
+def decode_state(payload: Payload) -> str:
+    """Return the lowercased state name; known states share one object."""
+    if (
+        isinstance(payload, (str, bytes))
+        and (name := _STATE_NAMES.get(payload)) is not None
+    ):
+        return name
+    text = decode_text(payload).lower()
+    return _STATE_NAMES.get(text, text)
+
+
+def parse_float(payload: Payload) -> float:
+    """Parse a decimal number; raises ValueError like float()."""
+    return float(_number_buffer(payload))
+
+
+def parse_int(payload: Payload) -> int:
+    """Parse an integer; raises ValueError like int()."""
+    return int(_number_buffer(payload))
+
+
+def parse_bool(payload: Payload) -> bool:
+    """Return True for true/1/yes/on, in any case; False otherwise."""
+    if isinstance(payload, str):
+        return payload.strip().lower() in _TRUE_TEXT
+    return bytes(payload).strip().lower() in _TRUE_BYTES
+
+
+def is_json_object(payload: Payload) -> bool:
+    """Return True if the payload looks like a JSON object."""
+    if isinstance(payload, str):
+        return payload.lstrip().startswith("{")
+    return bytes(payload).lstrip().startswith(b"{")
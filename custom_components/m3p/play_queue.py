@@ -0,0 +1,138 @@
+"""Play queue for Mellow MQTT players.
+
+Devices publish the whole queue (retained) on ``queue_topic`` and then only
+range operations on ``queue_delta_topic``::
+
+    snapshot: {"version": 7, "items": [{"id": "t1", "title": "...", "artist": "...", "image": "..."}, ...]}
+    delta:    {"version": 8, "ops": [{"op": "insert", "index": 3, "items": [...]},
+                                     {"op": "remove", "index": 0, "count": 2},
+                                     {"op": "move", "index": 4, "count": 1, "to": 0}]}
+
+``version`` is optional (absent or null); when present, it must be an
+integer, possibly as a string, and a delta must follow the previous
+version exactly, or the queue is treated as stale until the next snapshot.
+A move's ``to`` is the position after the moved range has been taken out.
+"""
+
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+
+class QueueItem(NamedTuple):
+    """One upcoming item."""
+
+    id: str
+    title: str | None
+    artist: str | None
+    image: str | None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> QueueItem:
+        """Build an item from its JSON form; raises KeyError without an id."""
+        return cls(
+            str(data["id"]),
+            data.get("title"),
+            data.get("artist"),
+            data.get("image"),
+        )
+
+
+class QueueDeltaError(ValueError):
+    """A delta does not apply to the queue as we know it."""
+
+
+def _parse_version(value: Any) -> int | None:
+    """Return a message's version; raises ValueError if it is not an integer."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"invalid version {value!r}")
+    try:
+        version = int(value)
+    except ValueError:
+        version = None
+    if version is None or (version != value and str(version) != str(value).strip()):
+        raise ValueError(f"invalid version {value!r}")
+    return version
+
+
+class PlayQueue:
+    """A list of items kept in step with the device through range operations."""
+
+    __slots__ = ("items", "stale", "version")
+
+    def __init__(self) -> None:
+        """Initialize an empty queue that has not seen a snapshot yet."""
+        self.items: list[QueueItem] = []
+        self.version: int | None = None
+        self.stale = True
+
+    def apply_snapshot(self, data: dict[str, Any]) -> None:
+        """Replace the whole queue; raises ValueError, KeyError or TypeError.
+
+        A rejected snapshot leaves the queue as it was.
+        """
+        version = _parse_version(data.get("version"))
+        items = [QueueItem.from_dict(item) for item in data["items"]]
+        self.items = items
+        self.version = version
+        self.stale = False
+
+    def apply_delta(self, data: dict[str, Any]) -> None:
+        """Apply a delta's operations in order.
+
+        Raises QueueDeltaError, leaving the queue stale, when the delta skips
+        a version or addresses items that are not there.
+        """
+        if self.stale:
+            raise QueueDeltaError("waiting for a snapshot")
+        try:
+            version = _parse_version(data.get("version"))
+        except ValueError as err:
+            self.stale = True
+            raise QueueDeltaError(str(err)) from err
+        if (
+            version is not None
+            and self.version is not None
+            and version != self.version + 1
+        ):
+            self.stale = True
+            raise QueueDeltaError(f"expected version {self.version + 1}, got {version}")
+
+        # Work on a copy so a bad op cannot leave the queue half-applied
+        items = self.items.copy()
+        try:
+            for op in data["ops"]:
+                index = int(op["index"])
+                if op["op"] == "insert":
+                    if not 0 <= index <= len(items):
+                        raise QueueDeltaError(f"insert at {index} of {len(items)}")
+                    items[index:index] = [QueueItem.from_dict(i) for i in op["items"]]
+                    continue
+                count = int(op.get("count", 1))
+                if index < 0 or count < 1 or index + count > len(items):
+                    raise QueueDeltaError(
+                        f"{op['op']} {count} at {index} of {len(items)}"
+                    )
+                moved = items[index : index + count]
+                del items[index : index + count]
+                if op["op"] == "move":
+                    to = int(op["to"])
+                    if not 0 <= to <= len(items):
+                        raise QueueDeltaError(f"move to {to} of {len(items)}")
+                    items[to:to] = moved
+                elif op["op"] != "remove":
+                    raise QueueDeltaError(f"unknown op {op['op']}")
+        except (KeyError, TypeError, ValueError) as err:
+            self.stale = True
+            if isinstance(err, QueueDeltaError):
+                raise
+            raise QueueDeltaError(f"malformed delta: {err!r}") from err
+
+        self.items = items
+        self.version = version if version is not None else self.version
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the items as plain dicts."""
+        return [item._asdict() for item in self.items]
@@ -0,0 +1,44 @@
+"""Ingress rate limiting for Mellow MQTT players."""
+
+from __future__ import annotations
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, up to ``burst``.
+
+    Times are ``time.monotonic()`` values supplied by the caller, so one clock
+    read can be shared by several buckets.
+    """
+
+    __slots__ = ("burst", "rate", "_tokens", "_updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        # Below one token the bucket could never admit anything
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def has_token(self, now: float) -> bool:
+        """Return True when a token is available."""
+        self._refill(now)
+        return self._tokens >= 1
+
+    def take(self, now: float) -> None:
+        """Consume a token; an empty bucket stays at zero."""
+        self._refill(now)
+        self._tokens = max(0.0, self._tokens - 1)
+
+    def time_until_token(self, now: float) -> float:
+        """Return seconds until a token is available."""
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
@@ -0,0 +1,274 @@
+"""Services for the Mellow MQTT Media integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+import logging
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import (
+    Event,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_platform
+from homeassistant.helpers.json import json_dumps
+from homeassistant.util.dt import utcnow
+
+from .const import (
+    ACTION_NEXT_TRACK,
+    ACTION_PAUSE,
+    ACTION_PLAY,
+    ACTION_PREVIOUS_TRACK,
+    ACTION_SEEK,
+    ACTION_STOP,
+    ACTION_VOLUME_MUTE,
+    ACTION_VOLUME_SET,
+    ATTR_ACTION,
+    ATTR_PATH,
+    ATTR_PAYLOADS,
+    ATTR_VALUE,
+    DOMAIN,
+    SERVICE_CAPTURE_START,
+    SERVICE_CAPTURE_STOP,
+    SERVICE_GROUP_COMMAND,
+)
+from .capture import DATA_CAPTURE, PAYLOADS_FULL, PAYLOADS_HASH, TrafficCapture
+
+if TYPE_CHECKING:
+    from .media_player import MqttMediaPlayer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Action -> per-entity fallback when no group topic covers the entity
+ENTITY_ACTIONS: dict[str, Callable[[MqttMediaPlayer, Any], Awaitable[None]]] = {
+    ACTION_PLAY: lambda entity, _: entity.async_media_play(),
+    ACTION_PAUSE: lambda entity, _: entity.async_media_pause(),
+    ACTION_STOP: lambda entity, _: entity.async_media_stop(),
+    ACTION_NEXT_TRACK: lambda entity, _: entity.async_media_next_track(),
+    ACTION_PREVIOUS_TRACK: lambda entity, _: entity.async_media_previous_track(),
+    ACTION_SEEK: lambda entity, value: entity.async_media_seek(float(value)),
+    ACTION_VOLUME_SET: lambda entity, value: entity.async_set_volume_level(
+        float(value)
+    ),
+    ACTION_VOLUME_MUTE: lambda entity, value: entity.async_mute_volume(bool(value)),
+}
+# Values are validated per action, so group topics get the same payload
+# as the entity path would send
+VALUE_SCHEMAS = {
+    ACTION_SEEK: vol.All(vol.Coerce(float), vol.Range(min=0)),
+    ACTION_VOLUME_SET: vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+    ACTION_VOLUME_MUTE: cv.boolean,
+}
+
+
+def _validate_group_value(data: dict[str, Any]) -> dict[str, Any]:
+    """Check the value against the action; actions without one drop it."""
+    if (schema := VALUE_SCHEMAS.get(data[ATTR_ACTION])) is None:
+        data.pop(ATTR_VALUE, None)
+        return data
+    if ATTR_VALUE not in data:
+        raise vol.Invalid(f"{data[ATTR_ACTION]} requires a value", path=[ATTR_VALUE])
+    try:
+        data[ATTR_VALUE] = schema(data[ATTR_VALUE])
+    except vol.Invalid as err:
+        raise vol.Invalid(
+            f"Invalid value for {data[ATTR_ACTION]}: {err}", path=[ATTR_VALUE]
+        ) from err
+    return data
+
+
+# play_media needs a library item, which has no place in a group command
+GROUP_COMMAND_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+            vol.Required(ATTR_ACTION): vol.In(list(ENTITY_ACTIONS)),
+            vol.Optional(ATTR_VALUE): vol.Any(bool, int, float, str),
+        }
+    ),
+    _validate_group_value,
+)
+
+CAPTURE_START_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_PAYLOADS, default=PAYLOADS_FULL): vol.In(
+            [PAYLOADS_FULL, PAYLOADS_HASH]
+        ),
+    }
+)
+
+
+@callback
+def _async_m3p_players(hass: HomeAssistant) -> dict[str, MqttMediaPlayer]:
+    """Return every loaded m3p player by entity_id."""
+    return {
+        entity_id: entity
+        for platform in entity_platform.async_get_platforms(hass, DOMAIN)
+        for entity_id, entity in platform.entities.items()
+    }
+
+
+async def _async_group_command(call: ServiceCall) -> None:
+    """Send one command to many players, using group topics where possible.
+
+    A group topic is used only when every player advertising it is targeted;
+    everyone else gets their own command, all published concurrently. One
+    failure does not stop the rest; failures are raised together at the end.
+    """
+    hass = call.hass
+    action = call.data[ATTR_ACTION]
+    value = call.data.get(ATTR_VALUE)
+
+    players = _async_m3p_players(hass)
+    targeted = [
+        players[entity_id]
+        for entity_id in call.data[ATTR_ENTITY_ID]
+        if entity_id in players
+    ]
+    unknown = set(call.data[ATTR_ENTITY_ID]) - players.keys()
+    if unknown:
+        _LOGGER.warning(
+            "[m3p] group_command ignoring non-m3p entities: %s", sorted(unknown)
+        )
+
+    members: defaultdict[str, set[str]] = defaultdict(set)
+    for entity_id, entity in players.items():
+        if topic := entity.group_command_topic:
+            members[topic].add(entity_id)
+    targeted_by_topic: defaultdict[str, set[str]] = defaultdict(set)
+    # Group topics are published by one member, so its command options apply
+    senders: dict[str, MqttMediaPlayer] = {}
+    for entity in targeted:
+        if topic := entity.group_command_topic:
+            targeted_by_topic[topic].add(entity.entity_id)
+            senders.setdefault(topic, entity)
+
+    group_topics = {
+        topic
+        for topic, entity_ids in targeted_by_topic.items()
+        if entity_ids == members[topic]
+    }
+    individual = [
+        entity for entity in targeted if entity.group_command_topic not in group_topics
+    ]
+
+    message: dict[str, Any] = {"action": action}
+    if value is not None:
+        message["value"] = value
+    payload = json_dumps(message)
+    _LOGGER.info(
+        "[m3p] group_command %s (group_topics=%s, individual=%s)",
+        action.upper(),
+        sorted(group_topics),
+        [entity.entity_id for entity in individual],
+    )
+    targets = [*sorted(group_topics), *(entity.entity_id for entity in individual)]
+    results = await asyncio.gather(
+        *(
+            senders[topic].async_send_group_command(action, payload)
+            for topic in sorted(group_topics)
+        ),
+        *(ENTITY_ACTIONS[action](entity, value) for entity in individual),
+        return_exceptions=True,
+    )
+    failed = {
+        target: result
+        for target, result in zip(targets, results, strict=True)
+        if isinstance(result, BaseException)
+    }
+    for target, err in failed.items():
+        _LOGGER.error("[m3p] group_command %s failed for %s: %s", action, target, err)
+    if failed:
+        raise HomeAssistantError(
+            f"group_command {action} failed for {len(failed)} of {len(targets)}"
+            f" targets: {', '.join(failed)}"
+        )
+
+
+async def _async_capture_start(call: ServiceCall) -> ServiceResponse:
+    """Start recording m3p traffic to a JSON Lines file."""
+    hass = call.hass
+    if DATA_CAPTURE in hass.data:
+        raise ServiceValidationError(
+            f"A capture is already running: {hass.data[DATA_CAPTURE].path}"
+        )
+    if path := call.data.get(ATTR_PATH):
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Capture path is not allowed: {path}")
+    else:
+        path = hass.config.path(f"m3p_capture_{utcnow():%Y%m%d_%H%M%S}.jsonl")
+
+    capture = TrafficCapture(path, call.data[ATTR_PAYLOADS])
+    capture.start()
+    hass.data[DATA_CAPTURE] = capture
+
+    async def _async_stop_on_shutdown(_event: Event) -> None:
+        if hass.data.get(DATA_CAPTURE) is capture:
+            del hass.data[DATA_CAPTURE]
+            await hass.async_add_executor_job(capture.stop)
+
+    # async_listen_once unsubscribes itself once fired, so only a stop
+    # service call needs to remove it
+    capture.unsub_shutdown = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_STOP, _async_stop_on_shutdown
+    )
+    _LOGGER.info(
+        "[m3p] Traffic capture started (path=%s, payloads=%s)",
+        path,
+        call.data[ATTR_PAYLOADS],
+    )
+    return {"path": path}
+
+
+async def _async_capture_stop(call: ServiceCall) -> ServiceResponse:
+    """Stop the running capture and report what it recorded."""
+    hass = call.hass
+    if (capture := hass.data.pop(DATA_CAPTURE, None)) is None:
+        raise ServiceValidationError("No capture is running")
+    if capture.unsub_shutdown is not None:
+        capture.unsub_shutdown()
+    await hass.async_add_executor_job(capture.stop)
+    _LOGGER.info(
+        "[m3p] Traffic capture stopped (path=%s, recorded=%s, dropped=%s)",
+        capture.path,
+        capture.recorded,
+        capture.dropped,
+    )
+    return {
+        "path": capture.path,
+        "recorded": capture.recorded,
+        "dropped": capture.dropped,
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+    hass.services.async_register(
+        DOMAIN, SERVICE_GROUP_COMMAND, _async_group_command, schema=GROUP_COMMAND_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CAPTURE_START,
+        _async_capture_start,
+        schema=CAPTURE_START_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CAPTURE_STOP,
+        _async_capture_stop,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,47 @@
+"""Value extraction for Mellow MQTT player topics.
+
+A ``*_value_template`` of the form ``$.track.title`` or ``$.tracks[0].title``
+is compiled to a tuple of keys and read straight out of the parsed JSON;
+anything else is rendered as a Jinja template.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from homeassistant.helpers.json import json_dumps
+
+_PATH_PATTERN = re.compile(r"\$(?:\.[^.\[\]\s]+|\[\d+\])+")
+_SEGMENT_PATTERN = re.compile(r"\.([^.\[\]\s]+)|\[(\d+)\]")
+
+
+def compile_json_path(expression: str) -> tuple[str | int, ...] | None:
+    """Return the keys of a simple JSON path, or None if it is not one."""
+    expression = expression.strip()
+    if not _PATH_PATTERN.fullmatch(expression):
+        return None
+    return tuple(
+        key if key else int(index)
+        for key, index in _SEGMENT_PATTERN.findall(expression)
+    )
+
+
+def extract_json_path(data: Any, path: tuple[str | int, ...]) -> Any:
+    """Follow ``path`` into ``data``; raises KeyError, IndexError or TypeError."""
+    for key in path:
+        data = data[key]
+    return data
+
+
+def value_to_payload(value: Any) -> str:
+    """Render an extracted value the way a device would publish it alone."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json_dumps(value)
+    return str(value)
@@ -0,0 +1 @@
+"""Tests for the Mellow MQTT Media Player integration."""
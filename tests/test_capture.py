@@ -0,0 +1,66 @@
+"""Tests for the traffic capture writer."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from custom_components.m3p.capture import PAYLOADS_FULL, PAYLOADS_HASH, TrafficCapture
+from custom_components.m3p.const import CAPTURE_QUEUE_SIZE
+
+
+class Unprintable:
+    def __str__(self) -> str:
+        raise RuntimeError("no text")
+
+
+def read_records(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_written_in_order(tmp_path: Path) -> None:
+    path = tmp_path / "capture.jsonl"
+    capture = TrafficCapture(str(path), PAYLOADS_FULL)
+    capture.start()
+    capture.record(
+        "rx", "media_player.a", "a/state", b"playing", 0, True, "state_topic"
+    )
+    capture.record("tx", "media_player.a", "a/cmd", "pause", 1, False)
+    capture.record("rx", "media_player.a", "a/art", b"\xff\xd8", 0, False)
+    capture.stop()
+
+    records = read_records(path)
+    assert [record["topic"] for record in records] == ["a/state", "a/cmd", "a/art"]
+    assert records[0]["payload"] == "playing"
+    assert records[0]["key"] == "state_topic"
+    assert records[1]["qos"] == 1
+    assert records[2]["payload_b64"] == "/9g="
+    assert (capture.recorded, capture.dropped) == (3, 0)
+
+
+def test_hashed_payloads(tmp_path: Path) -> None:
+    path = tmp_path / "capture.jsonl"
+    capture = TrafficCapture(str(path), PAYLOADS_HASH)
+    capture.start()
+    capture.record("rx", None, "a/state", "playing", 0, False)
+    capture.stop()
+    (record,) = read_records(path)
+    assert "payload" not in record
+    assert len(record["hash"]) == 16
+    assert record["len"] == 7
+
+
+def test_full_queue_and_bad_records_are_dropped(tmp_path: Path) -> None:
+    path = tmp_path / "capture.jsonl"
+    capture = TrafficCapture(str(path), PAYLOADS_FULL)
+    # Nothing drains the queue until the writer starts
+    for _ in range(CAPTURE_QUEUE_SIZE - 1):
+        capture.record("rx", None, "a/state", "playing", 0, False)
+    capture.record("rx", None, "a/bad", Unprintable(), 0, False)
+    capture.record("rx", None, "a/state", "overflow", 0, False)
+    assert capture.dropped == 1
+
+    capture.start()
+    capture.stop()
+    assert capture.recorded == CAPTURE_QUEUE_SIZE - 1
+    assert capture.dropped == 2
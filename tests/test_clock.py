@@ -0,0 +1,76 @@
+"""Tests for device timestamp parsing and clock offset estimation."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.m3p.clock import ClockOffsetEstimator, parse_device_timestamp
+
+MOMENT = datetime(2025, 8, 1, 12, 0, 0, tzinfo=UTC)
+EPOCH = MOMENT.timestamp()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        EPOCH,
+        int(EPOCH),
+        EPOCH * 1000,
+        str(EPOCH),
+        str(int(EPOCH * 1000)),
+        "2025-08-01T12:00:00Z",
+        "2025-08-01T14:00:00+02:00",
+        "2025-08-01T12:00:00",
+        MOMENT,
+        MOMENT.replace(tzinfo=None),
+    ],
+)
+def test_parses_epoch_iso_and_native_timestamps(value: object) -> None:
+    parsed = parse_device_timestamp(value)
+    assert parsed == MOMENT
+    assert parsed.tzinfo is not None
+
+
+def test_aware_datetime_keeps_its_zone() -> None:
+    zone = timezone(timedelta(hours=2))
+    value = MOMENT.astimezone(zone)
+    assert parse_device_timestamp(value) is value
+
+
+@pytest.mark.parametrize(
+    "value", [True, False, None, "soon", "", "inf", float("nan"), [EPOCH], b"1"]
+)
+def test_unparseable_values_return_none(value: object) -> None:
+    assert parse_device_timestamp(value) is None
+
+
+def test_offset_follows_the_least_delayed_sample() -> None:
+    estimator = ClockOffsetEstimator(window=8)
+    # The device clock runs 10s behind; messages take 0.5s, 0.1s and 2s
+    skew = timedelta(seconds=10)
+    for delay in (0.5, 0.1, 2.0):
+        local = estimator.to_local(MOMENT, MOMENT + skew + timedelta(seconds=delay))
+    assert local == MOMENT + skew + timedelta(seconds=0.1)
+
+
+def test_first_sample_maps_to_its_receive_time() -> None:
+    estimator = ClockOffsetEstimator(window=8)
+    received = MOMENT + timedelta(seconds=3)
+    assert estimator.to_local(MOMENT, received) == received
+
+
+def test_old_samples_leave_the_window() -> None:
+    estimator = ClockOffsetEstimator(window=2)
+    estimator.to_local(MOMENT, MOMENT + timedelta(seconds=1))
+    estimator.to_local(MOMENT, MOMENT + timedelta(seconds=5))
+    # The 1s sample is pushed out, so the clock change is picked up
+    local = estimator.to_local(MOMENT, MOMENT + timedelta(seconds=4))
+    assert local == MOMENT + timedelta(seconds=4)
+
+
+def test_device_clock_ahead_gives_a_negative_offset() -> None:
+    estimator = ClockOffsetEstimator(window=4)
+    device_time = MOMENT + timedelta(seconds=30)
+    assert estimator.to_local(device_time, MOMENT) == MOMENT
@@ -0,0 +1,70 @@
+"""Tests for combined state decoding."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import cbor2
+import msgpack
+import pytest
+
+from custom_components.m3p.codec import decode_combined_state
+from custom_components.m3p.const import ENCODING_CBOR, ENCODING_JSON, ENCODING_MSGPACK
+
+STATE = {"state": "playing", "volume": 0.5, "title": "Something"}
+
+
+@pytest.mark.parametrize(
+    ("encoding", "payload"),
+    [
+        (ENCODING_JSON, b'{"state": "playing", "volume": 0.5, "title": "Something"}'),
+        (ENCODING_CBOR, cbor2.dumps(STATE)),
+        (ENCODING_MSGPACK, msgpack.packb(STATE)),
+    ],
+)
+def test_decodes_each_encoding(encoding: str, payload: bytes) -> None:
+    assert decode_combined_state(payload, encoding) == STATE
+
+
+@pytest.mark.parametrize(
+    ("encoding", "dumps"),
+    [(ENCODING_CBOR, cbor2.dumps), (ENCODING_MSGPACK, msgpack.packb)],
+)
+def test_byte_strings_are_decoded_as_text(encoding: str, dumps) -> None:
+    payload = dumps({b"state": b"playing", "title": b"Caf\xc3\xa9 \xff"})
+    assert decode_combined_state(payload, encoding) == {
+        "state": "playing",
+        "title": "Café �",
+    }
+
+
+def test_cbor_keys_that_are_not_text_are_dropped() -> None:
+    payload = cbor2.dumps({"state": "playing", 1: "x", (2, 3): "y", b"title": "T"})
+    data = decode_combined_state(payload, ENCODING_CBOR)
+    assert data == {"state": "playing", "title": "T"}
+    assert all(isinstance(key, str) for key in data)
+
+
+def test_msgpack_timestamps_are_aware_datetimes() -> None:
+    moment = datetime(2025, 8, 1, 12, 0, tzinfo=UTC)
+    payload = msgpack.packb({"position_updated_at": moment}, datetime=True)
+    assert decode_combined_state(payload, ENCODING_MSGPACK) == {
+        "position_updated_at": moment
+    }
+
+
+@pytest.mark.parametrize(
+    ("encoding", "payload"),
+    [
+        (ENCODING_JSON, b"[1, 2]"),
+        (ENCODING_JSON, b"{not json"),
+        (ENCODING_CBOR, cbor2.dumps(["playing"])),
+        (ENCODING_CBOR, b"\xff\xff"),
+        (ENCODING_MSGPACK, msgpack.packb("playing")),
+        (ENCODING_MSGPACK, b"\xc1"),
+        ("yaml", b"state: playing"),
+    ],
+)
+def test_malformed_payloads_raise_value_error(encoding: str, payload: bytes) -> None:
+    with pytest.raises(ValueError):
+        decode_combined_state(payload, encoding)
@@ -0,0 +1,129 @@
+"""Tests for the disconnected-command queue."""
+
+from __future__ import annotations
+
+from custom_components.m3p.command_queue import CommandQueue, QueuedCommand
+from custom_components.m3p.const import (
+    ACTION_NEXT_TRACK,
+    ACTION_PAUSE,
+    ACTION_PLAY,
+    ACTION_SEEK,
+    ACTION_STOP,
+    ACTION_VOLUME_MUTE,
+    ACTION_VOLUME_SET,
+)
+
+
+def command(action: str, payload: str = "", queued_at: float = 0.0) -> QueuedCommand:
+    return QueuedCommand(action, f"player/{action}", payload, 0, False, queued_at)
+
+
+def actions(commands: list[QueuedCommand]) -> list[tuple[str, str]]:
+    return [(c.action, c.payload) for c in commands]
+
+
+def test_drains_in_order() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    queue.push(command(ACTION_PLAY))
+    queue.push(command(ACTION_NEXT_TRACK))
+    queue.push(command(ACTION_VOLUME_SET, "0.5"))
+    assert actions(queue.drain(now=1.0)) == [
+        (ACTION_PLAY, ""),
+        (ACTION_NEXT_TRACK, ""),
+        (ACTION_VOLUME_SET, "0.5"),
+    ]
+    assert len(queue) == 0
+
+
+def test_latest_volume_wins_and_moves_to_the_back() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    queue.push(command(ACTION_VOLUME_SET, "0.2"))
+    queue.push(command(ACTION_NEXT_TRACK))
+    dropped = queue.push(command(ACTION_VOLUME_SET, "0.7"))
+    assert actions(dropped) == [(ACTION_VOLUME_SET, "0.2")]
+    assert actions(queue.drain(now=0.0)) == [
+        (ACTION_NEXT_TRACK, ""),
+        (ACTION_VOLUME_SET, "0.7"),
+    ]
+
+
+def test_transport_commands_supersede_each_other() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    queue.push(command(ACTION_PLAY))
+    queue.push(command(ACTION_PAUSE))
+    queue.push(command(ACTION_STOP))
+    assert actions(queue.drain(now=0.0)) == [(ACTION_STOP, "")]
+
+
+def test_seek_and_mute_collapse_separately() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    queue.push(command(ACTION_SEEK, "10"))
+    queue.push(command(ACTION_VOLUME_MUTE, "true"))
+    queue.push(command(ACTION_SEEK, "20"))
+    queue.push(command(ACTION_VOLUME_MUTE, "false"))
+    assert actions(queue.drain(now=0.0)) == [
+        (ACTION_SEEK, "20"),
+        (ACTION_VOLUME_MUTE, "false"),
+    ]
+
+
+def test_track_skips_are_never_collapsed() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    for _ in range(3):
+        assert queue.push(command(ACTION_NEXT_TRACK)) == []
+    assert len(queue) == 3
+
+
+def test_full_queue_drops_the_oldest() -> None:
+    queue = CommandQueue(max_size=2, ttl=10)
+    queue.push(command(ACTION_PLAY))
+    queue.push(command(ACTION_NEXT_TRACK))
+    dropped = queue.push(command(ACTION_NEXT_TRACK, "second"))
+    assert actions(dropped) == [(ACTION_PLAY, "")]
+    assert actions(queue.drain(now=0.0)) == [
+        (ACTION_NEXT_TRACK, ""),
+        (ACTION_NEXT_TRACK, "second"),
+    ]
+
+
+def test_drain_skips_expired_commands() -> None:
+    queue = CommandQueue(max_size=10, ttl=5)
+    queue.push(command(ACTION_NEXT_TRACK, "old", queued_at=0.0))
+    queue.push(command(ACTION_NEXT_TRACK, "edge", queued_at=5.0))
+    queue.push(command(ACTION_NEXT_TRACK, "new", queued_at=9.0))
+    assert actions(queue.drain(now=10.0)) == [
+        (ACTION_NEXT_TRACK, "edge"),
+        (ACTION_NEXT_TRACK, "new"),
+    ]
+    assert len(queue) == 0
+
+
+def test_ttl_change_applies_to_held_commands() -> None:
+    queue = CommandQueue(max_size=10, ttl=60)
+    queue.push(command(ACTION_PLAY, queued_at=0.0))
+    queue.ttl = 1
+    assert queue.drain(now=2.0) == []
+
+
+def test_clear() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    queue.push(command(ACTION_PLAY))
+    queue.clear()
+    assert len(queue) == 0
+    assert queue.drain(now=0.0) == []
+
+
+def test_group_commands_only_collapse_with_each_other() -> None:
+    queue = CommandQueue(max_size=10, ttl=10)
+    group_pause = command(ACTION_PAUSE)
+    group_pause.group = True
+    queue.push(group_pause)
+    # The player's own play must not drop the pause meant for the group
+    assert queue.push(command(ACTION_PLAY)) == []
+    group_play = command(ACTION_PLAY)
+    group_play.group = True
+    assert queue.push(group_play) == [group_pause]
+    assert [(c.action, c.group) for c in queue.drain(now=1.0)] == [
+        (ACTION_PLAY, False),
+        (ACTION_PLAY, True),
+    ]
@@ -0,0 +1,143 @@
+"""Tests for the media library index."""
+
+from __future__ import annotations
+
+from homeassistant.components.media_player import BrowseError, MediaClass
+import pytest
+
+from custom_components.m3p.const import LIBRARY_BROWSE_PAGE_SIZE
+from custom_components.m3p.library import ROOT_TITLE, LibraryIndex
+
+
+def child_ids(index: LibraryIndex, media_content_id: str | None = None) -> list[str]:
+    return [child.media_content_id for child in index.browse(media_content_id).children]
+
+
+def test_browse_root_and_folder() -> None:
+    index = LibraryIndex()
+    index.apply_page(
+        1,
+        [
+            {"id": "a1", "title": "Abbey Road", "class": "album"},
+            {"id": "t1", "title": "Something", "parent": "a1"},
+        ],
+    )
+    root = index.browse(None)
+    assert root.title == ROOT_TITLE
+    assert child_ids(index) == ["a1"]
+    album = root.children[0]
+    assert album.can_expand
+    assert not album.can_play
+
+    node = index.browse("a1")
+    assert node.title == "Abbey Road"
+    track = node.children[0]
+    assert track.media_class == MediaClass.TRACK
+    assert track.can_play
+    assert not track.can_expand
+
+
+def test_item_defaults() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"id": 7, "class": "not-a-class", "playable": False}])
+    item = index.browse(None).children[0]
+    assert item.media_content_id == "7"
+    assert item.title == "7"
+    assert item.media_class == MediaClass.TRACK
+    assert item.media_content_type == "music"
+    assert not item.can_play
+
+
+def test_unknown_id_raises_browse_error() -> None:
+    with pytest.raises(BrowseError):
+        LibraryIndex().browse("missing")
+
+
+def test_items_without_id_are_skipped() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"title": "no id"}, "not a dict", {"id": "ok"}])
+    assert len(index) == 1
+
+
+def test_page_items_must_be_a_list() -> None:
+    with pytest.raises(TypeError):
+        LibraryIndex().apply_page(1, 5)
+
+
+def test_republished_page_drops_missing_items() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"id": "a"}, {"id": "b"}])
+    index.apply_page(2, [{"id": "c"}])
+    index.apply_page(1, [{"id": "b"}])
+    assert child_ids(index) == ["b", "c"]
+
+
+def test_item_moved_to_another_page_survives_old_page_replace() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"id": "a"}])
+    index.apply_page(2, [{"id": "a"}])
+    index.apply_page(1, [])
+    assert child_ids(index) == ["a"]
+
+
+def test_delta_upsert_and_remove() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"id": "a", "class": "album"}, {"id": "t1", "parent": "a"}])
+    index.apply_delta(
+        [{"id": "t2", "parent": "a"}, {"id": "t1", "parent": "", "title": "Moved"}],
+        ["missing"],
+    )
+    assert child_ids(index, "a") == ["t2"]
+    assert child_ids(index) == ["a", "t1"]
+
+
+def test_delta_upsert_keeps_item_on_its_page() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"id": "a", "title": "Old"}])
+    index.apply_delta([{"id": "a", "title": "New"}], [])
+    assert index.browse(None).children[0].title == "New"
+    index.apply_page(1, [])
+    assert len(index) == 0
+
+
+def test_removing_a_folder_removes_its_descendants() -> None:
+    index = LibraryIndex()
+    index.apply_page(
+        1,
+        [
+            {"id": "artist", "class": "artist"},
+            {"id": "album", "class": "album", "parent": "artist"},
+            {"id": "t1", "parent": "album"},
+            {"id": "t2", "parent": "album"},
+            {"id": "other"},
+        ],
+    )
+    index.apply_delta([], ["artist"])
+    assert len(index) == 1
+    assert child_ids(index) == ["other"]
+    with pytest.raises(BrowseError):
+        index.browse("album")
+
+
+def test_large_folders_are_paged() -> None:
+    index = LibraryIndex()
+    total = LIBRARY_BROWSE_PAGE_SIZE + 10
+    index.apply_page(1, [{"id": f"t{i}"} for i in range(total)])
+
+    first = index.browse(None).children
+    assert len(first) == LIBRARY_BROWSE_PAGE_SIZE + 1
+    assert first[0].media_content_id == "t0"
+    more = first[-1]
+    assert more.can_expand
+    assert more.media_content_id == f"?offset={LIBRARY_BROWSE_PAGE_SIZE}"
+
+    second = index.browse(more.media_content_id).children
+    assert [child.media_content_id for child in second] == [
+        f"t{i}" for i in range(LIBRARY_BROWSE_PAGE_SIZE, total)
+    ]
+
+
+def test_item_id_that_looks_like_a_page_is_browsed_as_the_item() -> None:
+    index = LibraryIndex()
+    index.apply_page(1, [{"id": "x?offset=3", "class": "album"}])
+    assert index.browse("x?offset=3").title == "x?offset=3"
@@ -0,0 +1,393 @@
+"""Tests for the media player's MQTT message handling."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import call
+
+import cbor2
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.components.mqtt import MQTT_CONNECTION_STATE
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_mqtt_message,
+    async_fire_time_changed,
+)
+from pytest_homeassistant_custom_component.typing import MqttMockHAClient
+
+from custom_components.m3p.const import (
+    DOMAIN,
+    NOISY_DEVICE_THRESHOLD,
+    NOISY_DEVICE_WINDOW_SECONDS,
+    RECONNECT_SETTLE_MAX_SECONDS,
+    REFRESH_DELAY_SECONDS,
+)
+
+DISCOVERY_TOPIC = "homeassistant/media_player/test/player1/config"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Load the m3p integration from custom_components."""
+
+
+async def setup_player(hass: HomeAssistant, **options: Any) -> str:
+    """Discover one player with the given options and return its entity_id."""
+    payload = {
+        "unique_id": "player1",
+        "state_topic": "player/state",
+        "volume_level_topic": "player/volume",
+        **options,
+    }
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"discovery_payload": payload, "discovery_topic": DISCOVERY_TOPIC},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "media_player", DOMAIN, "player1"
+    )
+    assert entity_id is not None
+    return entity_id
+
+
+async def receive(hass: HomeAssistant, topic: str, payload: str | bytes) -> None:
+    async_fire_mqtt_message(hass, topic, payload)
+    await hass.async_block_till_done()
+
+
+async def advance(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, seconds: float
+) -> None:
+    freezer.tick(seconds)
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+async def set_connected(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, connected: bool
+) -> None:
+    mqtt_mock.connected = connected
+    async_dispatcher_send(hass, MQTT_CONNECTION_STATE, connected)
+    await hass.async_block_till_done()
+
+
+async def command(
+    hass: HomeAssistant, entity_id: str, service: str, **data: Any
+) -> None:
+    await hass.services.async_call(
+        "media_player", service, {"entity_id": entity_id, **data}, blocking=True
+    )
+
+
+def volume(hass: HomeAssistant, entity_id: str) -> float | None:
+    return hass.states.get(entity_id).attributes.get("volume_level")
+
+
+async def test_every_message_is_applied_without_rate_limits(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(hass)
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    for level in range(1, 21):
+        await receive(hass, "player/volume", str(level / 100))
+    assert len(events) == 20
+    assert volume(hass, entity_id) == 0.2
+
+
+async def test_topic_rate_limit_applies_the_latest_value_later(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    # One message a second, with a two second burst
+    entity_id = await setup_player(hass, topic_rate_limit=1)
+    for level in ("0.1", "0.2", "0.3", "0.4"):
+        await receive(hass, "player/volume", level)
+    assert volume(hass, entity_id) == 0.2
+
+    # Other topics have buckets of their own
+    await receive(hass, "player/state", "playing")
+    assert hass.states.get(entity_id).state == "playing"
+
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    await advance(hass, freezer, 1)
+    assert volume(hass, entity_id) == 0.4
+    assert len(events) == 1
+
+
+async def test_entity_rate_limit_spans_topics(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, entity_rate_limit=1)
+    await receive(hass, "player/volume", "0.1")
+    await receive(hass, "player/volume", "0.2")
+    await receive(hass, "player/state", "paused")
+    await receive(hass, "player/volume", "0.3")
+    assert hass.states.get(entity_id).state != "paused"
+
+    await advance(hass, freezer, 2)
+    state = hass.states.get(entity_id)
+    assert state.state == "paused"
+    assert state.attributes["volume_level"] == 0.3
+
+
+async def test_noisy_device_issue_is_raised_then_cleared(
+    hass: HomeAssistant,
+    mqtt_mock: MqttMockHAClient,
+    freezer: FrozenDateTimeFactory,
+    issue_registry: ir.IssueRegistry,
+) -> None:
+    entity_id = await setup_player(hass, topic_rate_limit=1)
+    issue_id = f"noisy_device_{entity_id}"
+    # Two messages fit the burst; the rest are limited
+    for index in range(NOISY_DEVICE_THRESHOLD + 2):
+        async_fire_mqtt_message(hass, "player/volume", str(index % 100 / 100))
+    await hass.async_block_till_done()
+    assert issue_registry.async_get_issue(DOMAIN, issue_id) is not None
+
+    # Limited again halfway through the window: the issue stays
+    await advance(hass, freezer, NOISY_DEVICE_WINDOW_SECONDS / 2)
+    for _ in range(5):
+        await receive(hass, "player/volume", "0.5")
+    await advance(hass, freezer, NOISY_DEVICE_WINDOW_SECONDS / 2)
+    assert issue_registry.async_get_issue(DOMAIN, issue_id) is not None
+
+    await advance(hass, freezer, NOISY_DEVICE_WINDOW_SECONDS)
+    assert issue_registry.async_get_issue(DOMAIN, issue_id) is None
+
+
+async def test_no_settle_on_the_initial_subscribe(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(hass, reconnect_quiet_window=0.5)
+    await receive(hass, "player/volume", "0.4")
+    assert volume(hass, entity_id) == 0.4
+
+
+async def test_no_settle_without_a_quiet_window(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(hass)
+    await set_connected(hass, mqtt_mock, False)
+    await set_connected(hass, mqtt_mock, True)
+    await receive(hass, "player/volume", "0.4")
+    assert volume(hass, entity_id) == 0.4
+
+
+async def test_reconnect_burst_is_applied_with_one_write(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, reconnect_quiet_window=0.5)
+    await set_connected(hass, mqtt_mock, False)
+    await set_connected(hass, mqtt_mock, True)
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    await receive(hass, "player/volume", "0.1")
+    await receive(hass, "player/state", "playing")
+    await receive(hass, "player/volume", "0.3")
+    assert events == []
+
+    # Quiet for longer than the window, but resubscriptions may still land
+    await advance(hass, freezer, REFRESH_DELAY_SECONDS - 0.5)
+    assert events == []
+
+    await advance(hass, freezer, 0.5)
+    assert len(events) == 1
+    state = hass.states.get(entity_id)
+    assert state.state == "playing"
+    assert state.attributes["volume_level"] == 0.3
+
+
+async def test_settle_waits_for_the_burst_to_go_quiet(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, reconnect_quiet_window=1)
+    await set_connected(hass, mqtt_mock, False)
+    await set_connected(hass, mqtt_mock, True)
+    await advance(hass, freezer, REFRESH_DELAY_SECONDS - 0.2)
+    await receive(hass, "player/volume", "0.7")
+    await advance(hass, freezer, 0.5)
+    assert volume(hass, entity_id) != 0.7
+    await advance(hass, freezer, 0.5)
+    assert volume(hass, entity_id) == 0.7
+
+
+async def test_settle_ends_at_the_deadline_under_constant_traffic(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, reconnect_quiet_window=1)
+    await set_connected(hass, mqtt_mock, False)
+    await set_connected(hass, mqtt_mock, True)
+    for step in range(int(RECONNECT_SETTLE_MAX_SECONDS * 2) + 2):
+        await receive(hass, "player/volume", str(step % 100 / 100))
+        await advance(hass, freezer, 0.5)
+    assert volume(hass, entity_id) is not None
+
+
+async def test_combined_state_ignores_non_text_keys(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(
+        hass,
+        combined_state_topic="player/combined",
+        combined_state_encoding="cbor",
+    )
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+    payload = cbor2.dumps(
+        {"state": "playing", 1: "one", b"raw": 2, "volume_level": 0.5}
+    )
+    await receive(hass, "player/combined", payload)
+    assert len(events) == 1
+    state = hass.states.get(entity_id)
+    assert state.state == "playing"
+    assert state.attributes["volume_level"] == 0.5
+
+
+async def test_invalid_combined_state_is_skipped(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(
+        hass,
+        combined_state_topic="player/combined",
+        combined_state_encoding="cbor",
+    )
+    await receive(hass, "player/combined", cbor2.dumps([1, 2]))
+    await receive(hass, "player/combined", b"\xff\xff")
+    assert hass.states.get(entity_id).state == "unknown"
+
+
+async def test_json_paths_read_each_message(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    # Frozen time: both messages share one receive timestamp
+    entity_id = await setup_player(
+        hass,
+        state_topic="player/now",
+        state_value_template="$.state",
+        media_title_topic="player/now",
+        media_title_value_template="$.track.title",
+    )
+    await receive(hass, "player/now", '{"state": "playing", "track": {"title": "A"}}')
+    await receive(hass, "player/now", '{"state": "paused", "track": {"title": "B"}}')
+    state = hass.states.get(entity_id)
+    assert state.state == "paused"
+    assert state.attributes["media_title"] == "B"
+
+
+async def test_capture_records_each_message_once(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    await setup_player(
+        hass,
+        state_topic="player/now",
+        state_value_template="$.state",
+        media_title_topic="player/now",
+        media_title_value_template="$.track.title",
+    )
+    await hass.services.async_call(DOMAIN, "capture_start", blocking=True)
+    await receive(hass, "player/now", '{"state": "playing"}')
+    await receive(hass, "player/now", '{"state": "paused"}')
+    response = await hass.services.async_call(
+        DOMAIN, "capture_stop", blocking=True, return_response=True
+    )
+    assert response["recorded"] == 2
+
+
+COMMAND_TOPICS = {
+    "play_topic": "player/cmd/play",
+    "pause_topic": "player/cmd/pause",
+    "volume_set_topic": "player/cmd/volume",
+}
+
+
+async def test_commands_are_held_while_disconnected(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(hass, **COMMAND_TOPICS)
+    await set_connected(hass, mqtt_mock, False)
+    # Still available, so the service calls reach the player
+    assert hass.states.get(entity_id).state != STATE_UNAVAILABLE
+    await command(hass, entity_id, "volume_set", volume_level=0.2)
+    await command(hass, entity_id, "media_play")
+    await command(hass, entity_id, "volume_set", volume_level=0.6)
+    await command(hass, entity_id, "media_pause")
+    mqtt_mock.async_publish.assert_not_called()
+
+    await set_connected(hass, mqtt_mock, True)
+    assert mqtt_mock.async_publish.mock_calls == [
+        call("player/cmd/volume", "0.6", 0, False),
+        call("player/cmd/pause", "", 0, False),
+    ]
+
+
+async def test_player_becomes_unavailable_after_the_queue_ttl(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, command_queue_ttl=5, **COMMAND_TOPICS)
+    await set_connected(hass, mqtt_mock, False)
+    await advance(hass, freezer, 4)
+    assert hass.states.get(entity_id).state != STATE_UNAVAILABLE
+    await advance(hass, freezer, 2)
+    assert hass.states.get(entity_id).state == STATE_UNAVAILABLE
+
+    await set_connected(hass, mqtt_mock, True)
+    assert hass.states.get(entity_id).state != STATE_UNAVAILABLE
+
+
+async def test_without_a_queue_ttl_commands_are_not_held(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    entity_id = await setup_player(hass, command_queue_ttl=0, **COMMAND_TOPICS)
+    await set_connected(hass, mqtt_mock, False)
+    assert hass.states.get(entity_id).state == STATE_UNAVAILABLE
+    await set_connected(hass, mqtt_mock, True)
+    mqtt_mock.async_publish.assert_not_called()
+
+
+async def test_expired_commands_are_dropped(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, command_queue_ttl=10, **COMMAND_TOPICS)
+    await set_connected(hass, mqtt_mock, False)
+    await command(hass, entity_id, "media_play")
+    await advance(hass, freezer, 8)
+    await command(hass, entity_id, "volume_set", volume_level=0.3)
+    await advance(hass, freezer, 3)
+
+    await set_connected(hass, mqtt_mock, True)
+    assert mqtt_mock.async_publish.mock_calls == [
+        call("player/cmd/volume", "0.3", 0, False)
+    ]
+
+
+async def test_requeued_commands_keep_their_ttl(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient, freezer: FrozenDateTimeFactory
+) -> None:
+    entity_id = await setup_player(hass, command_queue_ttl=10, **COMMAND_TOPICS)
+    await set_connected(hass, mqtt_mock, False)
+    await command(hass, entity_id, "media_play")
+    await advance(hass, freezer, 8)
+
+    # The connection drops again while the queue is flushed
+    def connection_lost(*args: Any) -> None:
+        mqtt_mock.connected = False
+        raise HomeAssistantError("connection lost")
+
+    mqtt_mock.async_publish.side_effect = connection_lost
+    await set_connected(hass, mqtt_mock, True)
+    assert len(mqtt_mock.async_publish.mock_calls) == 1
+
+    # Ten seconds after the command was issued, it is past its TTL
+    mqtt_mock.async_publish.side_effect = None
+    mqtt_mock.async_publish.reset_mock()
+    await advance(hass, freezer, 3)
+    await set_connected(hass, mqtt_mock, True)
+    mqtt_mock.async_publish.assert_not_called()
@@ -0,0 +1,129 @@
+"""Tests for payload decoding and string interning."""
+
+from __future__ import annotations
+
+from homeassistant.components.media_player import MediaPlayerState
+import pytest
+
+from custom_components.m3p.payload import (
+    InternTable,
+    decode_state,
+    decode_text,
+    is_json_object,
+    parse_bool,
+    parse_float,
+    parse_int,
+)
+
+
+def fresh(value: str) -> str:
+    # Build an equal string that is a distinct object from any literal
+    return "".join(list(value))
+
+
+def test_intern_returns_the_shared_copy() -> None:
+    table = InternTable(size=4, max_length=32)
+    first = fresh("Abbey Road")
+    second = fresh("Abbey Road")
+    assert first is not second
+    assert table.intern(first) is first
+    assert table.intern(second) is first
+
+
+def test_intern_passes_through_none_and_long_values() -> None:
+    table = InternTable(size=4, max_length=5)
+    assert table.intern(None) is None
+    long_value = fresh("too long")
+    assert table.intern(long_value) is long_value
+    assert table.intern(fresh("too long")) is not long_value
+
+
+def test_intern_evicts_the_least_recently_used() -> None:
+    table = InternTable(size=2, max_length=32)
+    first = table.intern(fresh("first"))
+    second = table.intern(fresh("second"))
+    # Touch "first" so "second" is the oldest when "third" arrives
+    assert table.intern(fresh("first")) is first
+    table.intern(fresh("third"))
+    assert table.intern(fresh("first")) is first
+    assert table.intern(fresh("second")) is not second
+
+
+@pytest.mark.parametrize(
+    "payload", ["héllo", "héllo".encode(), bytearray("héllo".encode())]
+)
+def test_decode_text(payload: str | bytes | bytearray) -> None:
+    assert decode_text(payload) == "héllo"
+
+
+def test_decode_text_handles_memoryview_and_invalid_utf8() -> None:
+    assert decode_text(None) is None
+    assert decode_text(memoryview(b"abc")) == "abc"
+    assert decode_text(b"a\xffb") == "a�b"
+
+
+@pytest.mark.parametrize(
+    "payload", ["playing", b"playing", b"PLAYING", bytearray(b"Playing")]
+)
+def test_known_states_share_one_object(payload: str | bytes | bytearray) -> None:
+    assert decode_state(payload) is MediaPlayerState.PLAYING.value
+
+
+def test_unknown_state_is_lowercased() -> None:
+    assert decode_state(b"Rewinding") == "rewinding"
+    assert decode_state(b"unavailable") == "unavailable"
+
+
+@pytest.mark.parametrize("payload", ["0.25", b"0.25", bytearray(b" 0.25 ")])
+def test_parse_float(payload: str | bytes | bytearray) -> None:
+    assert parse_float(payload) == 0.25
+
+
+def test_parse_numbers_accept_memoryview() -> None:
+    assert parse_float(memoryview(b"1.5")) == 1.5
+    assert parse_int(memoryview(b"42")) == 42
+
+
+@pytest.mark.parametrize("parse", [parse_float, parse_int])
+def test_parse_numbers_raise_value_error(parse) -> None:
+    with pytest.raises(ValueError):
+        parse(b"loud")
+
+
+def test_parse_int_rejects_decimals() -> None:
+    assert parse_int(b"7") == 7
+    with pytest.raises(ValueError):
+        parse_int(b"7.5")
+
+
+@pytest.mark.parametrize(
+    ("payload", "expected"),
+    [
+        ("true", True),
+        (b"ON", True),
+        (b" yes\n", True),
+        (bytearray(b"1"), True),
+        (memoryview(b"True"), True),
+        ("false", False),
+        (b"0", False),
+        (b"", False),
+        ("maybe", False),
+    ],
+)
+def test_parse_bool(payload: object, expected: bool) -> None:
+    assert parse_bool(payload) is expected
+
+
+@pytest.mark.parametrize(
+    ("payload", "expected"),
+    [
+        ('{"a": 1}', True),
+        (b'  {"a": 1}', True),
+        (memoryview(b"{}"), True),
+        ("[1]", False),
+        (b"playing", False),
+        (b"", False),
+    ],
+)
+def test_is_json_object(payload: object, expected: bool) -> None:
+    assert is_json_object(payload) is expected
@@ -0,0 +1,141 @@
+"""Tests for the play queue snapshot and delta handling."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.m3p.play_queue import PlayQueue, QueueDeltaError
+
+
+def snapshot(*ids: str, version: object = 1) -> dict:
+    return {"version": version, "items": [{"id": item_id} for item_id in ids]}
+
+
+def ids(queue: PlayQueue) -> list[str]:
+    return [item.id for item in queue.items]
+
+
+def test_snapshot_replaces_items() -> None:
+    queue = PlayQueue()
+    assert queue.stale
+    queue.apply_snapshot(
+        {"version": 3, "items": [{"id": 1, "title": "One", "artist": "A"}]}
+    )
+    assert not queue.stale
+    assert queue.version == 3
+    assert queue.as_list() == [
+        {"id": "1", "title": "One", "artist": "A", "image": None}
+    ]
+
+
+@pytest.mark.parametrize(
+    ("version", "expected"), [(None, None), (3, 3), ("3", 3), (" 4 ", 4), (5.0, 5)]
+)
+def test_snapshot_version_is_coerced(version: object, expected: int | None) -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", version=version))
+    assert queue.version == expected
+
+
+@pytest.mark.parametrize("version", ["three", "3.5", 3.5, True, [3], {}])
+def test_snapshot_with_invalid_version_is_rejected(version: object) -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", version=1))
+    with pytest.raises(ValueError):
+        queue.apply_snapshot(snapshot("b", version=version))
+    assert ids(queue) == ["a"]
+    assert queue.version == 1
+
+
+def test_snapshot_without_items_is_rejected() -> None:
+    queue = PlayQueue()
+    with pytest.raises(KeyError):
+        queue.apply_snapshot({"version": 1})
+    assert queue.stale
+
+
+def test_insert_remove_and_move() -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", "b", "c", "d"))
+    queue.apply_delta(
+        {
+            "version": 2,
+            "ops": [
+                {"op": "insert", "index": 4, "items": [{"id": "e"}]},
+                {"op": "remove", "index": 0, "count": 2},
+                # c d e -> move "e" to the front
+                {"op": "move", "index": 2, "count": 1, "to": 0},
+            ],
+        }
+    )
+    assert ids(queue) == ["e", "c", "d"]
+    assert queue.version == 2
+
+
+def test_move_target_is_after_the_range_is_taken_out() -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", "b", "c", "d"))
+    queue.apply_delta(
+        {"version": 2, "ops": [{"op": "move", "index": 0, "count": 2, "to": 2}]}
+    )
+    assert ids(queue) == ["c", "d", "a", "b"]
+
+
+def test_delta_before_snapshot_is_rejected() -> None:
+    with pytest.raises(QueueDeltaError):
+        PlayQueue().apply_delta({"ops": []})
+
+
+def test_version_gap_marks_queue_stale() -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", version=1))
+    with pytest.raises(QueueDeltaError):
+        queue.apply_delta({"version": 3, "ops": []})
+    assert queue.stale
+    # Further deltas wait for the next snapshot
+    with pytest.raises(QueueDeltaError):
+        queue.apply_delta({"version": 2, "ops": []})
+    queue.apply_snapshot(snapshot("b", version=5))
+    queue.apply_delta({"version": "6", "ops": []})
+    assert queue.version == 6
+
+
+def test_invalid_delta_version_marks_queue_stale() -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", version=1))
+    with pytest.raises(QueueDeltaError):
+        queue.apply_delta({"version": "two", "ops": []})
+    assert queue.stale
+
+
+def test_unversioned_queue_accepts_any_delta() -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", version=None))
+    queue.apply_delta({"version": 42, "ops": [{"op": "remove", "index": 0}]})
+    assert ids(queue) == []
+    assert queue.version == 42
+    queue.apply_delta({"ops": []})
+    assert queue.version == 42
+
+
+@pytest.mark.parametrize(
+    "op",
+    [
+        {"op": "insert", "index": 5, "items": []},
+        {"op": "remove", "index": 1, "count": 5},
+        {"op": "remove", "index": -1},
+        {"op": "remove", "index": 0, "count": 0},
+        {"op": "move", "index": 0, "to": 9},
+        {"op": "shuffle", "index": 0},
+        {"op": "remove"},
+        {"op": "insert", "index": "x", "items": []},
+    ],
+)
+def test_bad_op_leaves_items_untouched(op: dict) -> None:
+    queue = PlayQueue()
+    queue.apply_snapshot(snapshot("a", "b"))
+    with pytest.raises(QueueDeltaError):
+        queue.apply_delta({"version": 2, "ops": [{"op": "remove", "index": 0}, op]})
+    assert ids(queue) == ["a", "b"]
+    assert queue.version == 1
+    assert queue.stale
@@ -0,0 +1,64 @@
+"""Tests for the ingress token bucket."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.m3p.ratelimit import TokenBucket
+
+
+def test_starts_full_and_admits_a_burst() -> None:
+    bucket = TokenBucket(rate=10, burst=3, now=0.0)
+    for _ in range(3):
+        assert bucket.has_token(0.0)
+        bucket.take(0.0)
+    assert not bucket.has_token(0.0)
+
+
+def test_refills_at_rate() -> None:
+    bucket = TokenBucket(rate=10, burst=1, now=0.0)
+    bucket.take(0.0)
+    assert not bucket.has_token(0.05)
+    assert bucket.has_token(0.1)
+
+
+def test_refill_is_capped_at_burst() -> None:
+    bucket = TokenBucket(rate=10, burst=2, now=0.0)
+    bucket.take(0.0)
+    bucket.take(0.0)
+    # An hour idle still only refills two tokens
+    now = 3600.0
+    bucket.take(now)
+    bucket.take(now)
+    assert not bucket.has_token(now)
+
+
+def test_burst_below_one_token_is_raised_to_one() -> None:
+    bucket = TokenBucket(rate=0.1, burst=0.2, now=0.0)
+    assert bucket.burst == 1.0
+    assert bucket.has_token(0.0)
+
+
+def test_take_from_empty_bucket_stays_at_zero() -> None:
+    bucket = TokenBucket(rate=1, burst=1, now=0.0)
+    bucket.take(0.0)
+    bucket.take(0.0)
+    bucket.take(0.0)
+    # Not in debt: one token arrives after a single interval
+    assert bucket.time_until_token(0.0) == pytest.approx(1.0)
+
+
+def test_time_until_token() -> None:
+    bucket = TokenBucket(rate=4, burst=1, now=0.0)
+    assert bucket.time_until_token(0.0) == 0.0
+    bucket.take(0.0)
+    assert bucket.time_until_token(0.0) == pytest.approx(0.25)
+    assert bucket.time_until_token(0.1) == pytest.approx(0.15)
+    assert bucket.time_until_token(0.25) == 0.0
+
+
+def test_clock_going_backwards_does_not_drain() -> None:
+    bucket = TokenBucket(rate=10, burst=1, now=5.0)
+    bucket.take(5.0)
+    assert not bucket.has_token(4.0)
+    assert bucket.has_token(5.2)
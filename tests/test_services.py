@@ -0,0 +1,115 @@
+"""Tests for the integration's services."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import call, patch
+
+from homeassistant.components.mqtt import MQTT_CONNECTION_STATE
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import MqttMockHAClient
+
+from custom_components.m3p.const import DOMAIN
+from custom_components.m3p.media_player import MqttMediaPlayer
+
+GROUP_TOPIC = "group/living/cmd"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Load the m3p integration from custom_components."""
+
+
+async def setup_player(hass: HomeAssistant, name: str, **options: Any) -> str:
+    """Discover one player with its own pause topic and return its entity_id."""
+    payload = {
+        "unique_id": name,
+        "state_topic": f"{name}/state",
+        "pause_topic": f"{name}/cmd/pause",
+        **options,
+    }
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "discovery_payload": payload,
+            "discovery_topic": f"homeassistant/media_player/test/{name}/config",
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    entity_id = er.async_get(hass).async_get_entity_id("media_player", DOMAIN, name)
+    assert entity_id is not None
+    return entity_id
+
+
+async def group_command(hass: HomeAssistant, entity_ids: list[str]) -> None:
+    await hass.services.async_call(
+        DOMAIN,
+        "group_command",
+        {"entity_id": entity_ids, "action": "pause"},
+        blocking=True,
+    )
+
+
+async def test_group_topic_uses_the_command_options(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    options = {
+        "group_command_topic": GROUP_TOPIC,
+        "command_options": {"pause": {"qos": 1, "retain": True}},
+    }
+    kitchen = await setup_player(hass, "kitchen", **options)
+    lounge = await setup_player(hass, "lounge", **options)
+    mqtt_mock.async_publish.reset_mock()
+
+    await group_command(hass, [kitchen, lounge])
+    assert mqtt_mock.async_publish.mock_calls == [
+        call(GROUP_TOPIC, '{"action":"pause"}', 1, True)
+    ]
+
+
+async def test_group_topic_commands_are_held_while_disconnected(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    kitchen = await setup_player(hass, "kitchen", group_command_topic=GROUP_TOPIC)
+    lounge = await setup_player(hass, "lounge", group_command_topic=GROUP_TOPIC)
+    mqtt_mock.async_publish.reset_mock()
+    mqtt_mock.connected = False
+    async_dispatcher_send(hass, MQTT_CONNECTION_STATE, False)
+    await hass.async_block_till_done()
+
+    await group_command(hass, [kitchen, lounge])
+    mqtt_mock.async_publish.assert_not_called()
+
+    mqtt_mock.connected = True
+    async_dispatcher_send(hass, MQTT_CONNECTION_STATE, True)
+    await hass.async_block_till_done()
+    assert mqtt_mock.async_publish.mock_calls == [
+        call(GROUP_TOPIC, '{"action":"pause"}', 0, False)
+    ]
+
+
+async def test_one_failure_does_not_stop_the_others(
+    hass: HomeAssistant, mqtt_mock: MqttMockHAClient
+) -> None:
+    kitchen = await setup_player(hass, "kitchen", group_command_topic=GROUP_TOPIC)
+    lounge = await setup_player(hass, "lounge", group_command_topic=GROUP_TOPIC)
+    garage = await setup_player(hass, "garage")
+    mqtt_mock.async_publish.reset_mock()
+
+    with (
+        patch.object(
+            MqttMediaPlayer, "async_media_pause", side_effect=RuntimeError("boom")
+        ),
+        pytest.raises(HomeAssistantError, match=garage),
+    ):
+        await group_command(hass, [kitchen, lounge, garage])
+    assert mqtt_mock.async_publish.mock_calls == [
+        call(GROUP_TOPIC, '{"action":"pause"}', 0, False)
+    ]
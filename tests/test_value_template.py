@@ -0,0 +1,84 @@
+"""Tests for the JSON path fast path of value templates."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.m3p.value_template import (
+    compile_json_path,
+    extract_json_path,
+    value_to_payload,
+)
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("$.state", ("state",)),
+        ("$.track.title", ("track", "title")),
+        ("$.tracks[0].title", ("tracks", 0, "title")),
+        ("$[2]", (2,)),
+        ("  $.track.title\n", ("track", "title")),
+    ],
+)
+def test_compiles_simple_paths(
+    expression: str, expected: tuple[str | int, ...]
+) -> None:
+    assert compile_json_path(expression) == expected
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "{{ value_json.track.title }}",
+        "$",
+        "$.",
+        "$.track..title",
+        "$.tracks[-1]",
+        "$.tracks[x]",
+        "$.track title",
+        "$.track.title | upper",
+    ],
+)
+def test_anything_else_is_left_to_jinja(expression: str) -> None:
+    assert compile_json_path(expression) is None
+
+
+def test_extract_follows_the_path() -> None:
+    data = {"tracks": [{"title": "One"}, {"title": "Two"}]}
+    assert extract_json_path(data, ("tracks", 1, "title")) == "Two"
+    assert extract_json_path(data, ()) is data
+
+
+@pytest.mark.parametrize(
+    ("path", "error"),
+    [
+        (("missing",), KeyError),
+        (("tracks", 5), IndexError),
+        (("tracks", "title"), TypeError),
+        (("count", "value"), TypeError),
+    ],
+)
+def test_extract_raises_on_a_missing_path(
+    path: tuple[str | int, ...], error: type[Exception]
+) -> None:
+    data = {"tracks": [{"title": "One"}], "count": 3}
+    with pytest.raises(error):
+        extract_json_path(data, path)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, ""),
+        ("playing", "playing"),
+        (True, "true"),
+        (False, "false"),
+        (0.5, "0.5"),
+        (3, "3"),
+        ({"a": 1}, '{"a":1}'),
+        ([1, 2], "[1,2]"),
+    ],
+)
+def test_value_to_payload(value: object, expected: str) -> None:
+    assert value_to_payload(value) == expected
@@ -0,0 +1 @@
+"""Load-test harness for the M3P integration."""
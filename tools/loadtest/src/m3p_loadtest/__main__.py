@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="m3p-loadtest",
+        description="Run M3P against an in-process HA and embedded MQTT broker.",
+    )
+    parser.add_argument(
+        "--config-dir",
+        type=Path,
+        default=None,
+        help="HA config dir to use (default: a fresh temporary directory)",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="warning",
+        help="HA logger default level (default: warning)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    throughput = commands.add_parser(
+        "throughput", help="Sustained state traffic against N discovered players"
+    )
+    throughput.add_argument("--players", type=int, default=50)
+    throughput.add_argument(
+        "--rate", type=float, default=1.0, help="Position updates per player per second"
+    )
+    throughput.add_argument(
+        "--duration", type=float, default=30.0, help="Traffic duration in seconds"
+    )
+    throughput.add_argument("--discovery-timeout", type=float, default=120.0)
+    throughput.add_argument("--drain-seconds", type=float, default=5.0)
+    throughput.add_argument("--min-delivery-ratio", type=float, default=0.99)
+    throughput.add_argument("--max-p95-latency-ms", type=float, default=100.0)
+    throughput.add_argument("--max-loop-lag-ms", type=float, default=250.0)
+
+    startup = commands.add_parser(
+        "startup", help="Time from HA start to all players available"
+    )
+    startup.add_argument(
+        "--players",
+        type=int,
+        nargs="+",
+        default=[10, 100, 500],
+        help="Retained discovery configs to benchmark (default: 10 100 500)",
+    )
+    startup.add_argument(
+        "--restarts", type=int, default=3, help="Warm restarts per player count"
+    )
+    startup.add_argument("--timeout", type=float, default=300.0)
+
+    # Internal: one measured HA boot, spawned by "startup".
+    child = commands.add_parser("startup-child")
+    child.add_argument("--broker-host", required=True)
+    child.add_argument("--broker-port", type=int, required=True)
+    child.add_argument("--players", type=int, required=True)
+    child.add_argument("--timeout", type=float, required=True)
+
+    memory = commands.add_parser(
+        "memory", help="Retained memory per entity under realistic traffic"
+    )
+    memory.add_argument("--players", type=int, default=50)
+    memory.add_argument(
+        "--rounds", type=int, default=3, help="Track changes published per player"
+    )
+    memory.add_argument(
+        "--artwork-kib",
+        type=int,
+        default=32,
+        help="Raw size of each data-URI artwork before base64 (default: 32)",
+    )
+    memory.add_argument("--position-seconds", type=float, default=5.0)
+    memory.add_argument(
+        "--budget-kib",
+        type=float,
+        default=256.0,
+        help="Fail when retained memory per entity exceeds this (default: 256)",
+    )
+    memory.add_argument("--timeout", type=float, default=300.0)
+
+    # Internal: the traced HA process, spawned by "memory".
+    memory_child = commands.add_parser("memory-child")
+    memory_child.add_argument("--broker-host", required=True)
+    memory_child.add_argument("--broker-port", type=int, required=True)
+    memory_child.add_argument("--players", type=int, required=True)
+    memory_child.add_argument("--rounds", type=int, required=True)
+    memory_child.add_argument("--timeout", type=float, required=True)
+    memory_child.add_argument("--traceback-frames", type=int, default=25)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+    args = _build_parser().parse_args(argv)
+
+    # Subcommand modules are imported lazily so "startup-child" can start its
+    # clock before Home Assistant is imported.
+    if args.command == "throughput":
+        from .throughput import ThroughputOptions, async_run_throughput
+
+        options = ThroughputOptions(
+            players=args.players,
+            rate_hz=args.rate,
+            duration=args.duration,
+            discovery_timeout=args.discovery_timeout,
+            drain_seconds=args.drain_seconds,
+            min_delivery_ratio=args.min_delivery_ratio,
+            max_p95_latency_ms=args.max_p95_latency_ms,
+            max_loop_lag_ms=args.max_loop_lag_ms,
+            config_dir=args.config_dir,
+            log_level=args.log_level,
+        )
+        return asyncio.run(async_run_throughput(options))
+
+    if args.command == "startup":
+        from .startup import StartupOptions, run_startup
+
+        return run_startup(
+            StartupOptions(
+                player_counts=args.players,
+                restarts=args.restarts,
+                timeout=args.timeout,
+                log_level=args.log_level,
+            )
+        )
+
+    if args.command == "startup-child":
+        from .startup import StartupChildOptions, run_startup_child
+
+        if args.config_dir is None:
+            raise SystemExit("startup-child requires --config-dir")
+        return run_startup_child(
+            StartupChildOptions(
+                config_dir=args.config_dir,
+                broker_host=args.broker_host,
+                broker_port=args.broker_port,
+                players=args.players,
+                timeout=args.timeout,
+                log_level=args.log_level,
+            )
+        )
+
+    if args.command == "memory":
+        from .memory import MemoryOptions, run_memory
+
+        return run_memory(
+            MemoryOptions(
+                players=args.players,
+                rounds=args.rounds,
+                artwork_kib=args.artwork_kib,
+                position_seconds=args.position_seconds,
+                budget_kib=args.budget_kib,
+                timeout=args.timeout,
+                log_level=args.log_level,
+            )
+        )
+
+    if args.command == "memory-child":
+        from .memory import MemoryChildOptions, run_memory_child
+
+        if args.config_dir is None:
+            raise SystemExit("memory-child requires --config-dir")
+        return run_memory_child(
+            MemoryChildOptions(
+                config_dir=args.config_dir,
+                broker_host=args.broker_host,
+                broker_port=args.broker_port,
+                players=args.players,
+                rounds=args.rounds,
+                timeout=args.timeout,
+                traceback_frames=args.traceback_frames,
+                log_level=args.log_level,
+            )
+        )
+
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
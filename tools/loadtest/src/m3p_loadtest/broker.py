@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import threading
+
+from amqtt.broker import Broker
+
+LOGGER = logging.getLogger("m3p_loadtest.broker")
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class EmbeddedBroker:
+    """amqtt broker running on its own thread and event loop.
+
+    The broker lives in the harness process but never shares Home Assistant's
+    event loop, so it does not show up in the loop-lag measurements.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int | None = None) -> None:
+        self.host = host
+        self.port = port or _free_port(host)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._broker: Broker | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+
+    def start(self, timeout: float = 10.0) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="m3p-loadtest-broker", daemon=True
+        )
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Embedded MQTT broker did not start in time")
+        if self._error is not None:
+            raise RuntimeError("Embedded MQTT broker failed to start") from self._error
+        LOGGER.info("Embedded broker listening on %s:%s", self.host, self.port)
+
+    def stop(self) -> None:
+        if self._loop is None or self._broker is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._broker.shutdown(), self._loop)
+        try:
+            future.result(timeout=10)
+        except Exception:
+            LOGGER.exception("Failed to shut down embedded broker")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._start_broker())
+        except BaseException as err:
+            self._error = err
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _start_broker(self) -> None:
+        config = {
+            "listeners": {
+                "default": {"type": "tcp", "bind": f"{self.host}:{self.port}"},
+            },
+            "sys_interval": 0,
+            "auth": {"allow-anonymous": True, "plugins": ["auth_anonymous"]},
+            "topic-check": {"enabled": False},
+        }
+        self._broker = Broker(config)
+        await self._broker.start()
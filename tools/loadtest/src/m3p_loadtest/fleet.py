@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+import paho.mqtt.client as mqtt
+
+LOGGER = logging.getLogger("m3p_loadtest.fleet")
+
+DISCOVERY_PREFIX = "homeassistant"
+STATE_PREFIX = "m3p-loadtest"
+NODE_ID = "m3p_loadtest"
+
+# Publishes per player are spread over sub-ticks of this length so a large
+# fleet does not hit the broker as a single burst once per interval.
+SUB_TICK_SECONDS = 0.01
+
+# reconnect_quiet_window for every player. Settling merges messages into one
+# state write, which would skew delivery and latency, so it stays off.
+QUIET_WINDOW_SECONDS = 0.0
+
+
+@dataclass
+class SimulatedPlayer:
+    index: int
+    unique_id: str
+    object_id: str
+    base_topic: str
+    position: int = 0
+    sent: dict[int, float] = field(default_factory=dict)
+
+    @property
+    def discovery_topic(self) -> str:
+        return f"{DISCOVERY_PREFIX}/media_player/{NODE_ID}/{self.object_id}/config"
+
+    def topic(self, name: str) -> str:
+        return f"{self.base_topic}/{name}"
+
+    def discovery_payload(self) -> dict:
+        return {
+            "name": f"Loadtest Player {self.index}",
+            "unique_id": self.unique_id,
+            "device": {
+                "name": f"Loadtest Player {self.index}",
+                "identifiers": [self.unique_id],
+                "manufacturer": "M3P Loadtest",
+                "model": "Simulated Player",
+            },
+            "state_topic": self.topic("state"),
+            "media_title_topic": self.topic("title"),
+            "media_artist_topic": self.topic("artist"),
+            "media_album_name_topic": self.topic("album"),
+            "media_duration_topic": self.topic("duration"),
+            "media_position_topic": self.topic("position"),
+            "media_image_url_topic": self.topic("albumart"),
+            "volume_level_topic": self.topic("volume"),
+            "play_topic": self.topic("cmd/play"),
+            "pause_topic": self.topic("cmd/pause"),
+            "stop_topic": self.topic("cmd/stop"),
+            "next_track_topic": self.topic("cmd/next"),
+            "previous_track_topic": self.topic("cmd/previous"),
+            "seek_topic": self.topic("cmd/seek"),
+            "volume_set_topic": self.topic("cmd/volume"),
+            "volume_mute_topic": self.topic("cmd/mute"),
+            "reconnect_quiet_window": QUIET_WINDOW_SECONDS,
+        }
+
+
+class SimulatedFleet:
+    """N simulated players sharing one paho client on a background thread."""
+
+    def __init__(self, host: str, port: int, count: int) -> None:
+        self._host = host
+        self._port = port
+        self._lock = threading.Lock()
+        self.players = [
+            SimulatedPlayer(
+                index=index,
+                unique_id=f"m3p-loadtest-{index:04d}",
+                object_id=f"player_{index:04d}",
+                base_topic=f"{STATE_PREFIX}/player_{index:04d}",
+            )
+            for index in range(count)
+        ]
+        self.published = 0
+        self._client = mqtt.Client(
+            client_id="m3p-loadtest-fleet",
+            callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+        )
+        self._client.max_queued_messages_set(0)
+        self._client.max_inflight_messages_set(1000)
+
+    @property
+    def unique_ids(self) -> list[str]:
+        return [player.unique_id for player in self.players]
+
+    def connect(self) -> None:
+        self._client.connect(self._host, self._port)
+        self._client.loop_start()
+
+    def disconnect(self) -> None:
+        self._client.loop_stop()
+        self._client.disconnect()
+
+    def publish_discovery(self) -> None:
+        """Publish retained discovery configs and an initial state per player."""
+        infos = []
+        for player in self.players:
+            infos.append(
+                self._client.publish(
+                    player.discovery_topic,
+                    json.dumps(player.discovery_payload()),
+                    qos=1,
+                    retain=True,
+                )
+            )
+            for name, payload in (
+                ("state", "playing"),
+                ("title", f"Track {player.index}"),
+                ("artist", "Loadtest Artist"),
+                ("album", "Loadtest Album"),
+                ("duration", "3600"),
+                ("volume", "0.5"),
+            ):
+                infos.append(
+                    self._client.publish(
+                        player.topic(name), payload, qos=1, retain=True
+                    )
+                )
+        for info in infos:
+            info.wait_for_publish(timeout=30)
+        LOGGER.info("Published discovery for %s players", len(self.players))
+
+    def publish_track(
+        self, player: SimulatedPlayer, title: str, artwork: str
+    ) -> list[mqtt.MQTTMessageInfo]:
+        """Publish a full set of track metadata, the way a player does on change."""
+        return [
+            self._client.publish(player.topic(name), payload, qos=1, retain=True)
+            for name, payload in (
+                ("albumart", artwork),
+                ("artist", f"Artist of {title}"),
+                ("album", f"Album of {title}"),
+                ("duration", "240"),
+                ("title", title),
+            )
+        ]
+
+    def run_position_traffic(
+        self, rate_hz: float, duration: float, stop_event: threading.Event
+    ) -> None:
+        """Publish position updates to every player at ``rate_hz`` for ``duration``."""
+        interval = 1.0 / rate_hz
+        slots = max(1, int(interval / SUB_TICK_SECONDS))
+        chunk = -(-len(self.players) // slots)
+        groups = [
+            self.players[start : start + chunk]
+            for start in range(0, len(self.players), chunk)
+        ]
+        slot_interval = interval / len(groups)
+
+        next_tick = time.perf_counter()
+        end = next_tick + duration
+        while next_tick < end and not stop_event.is_set():
+            for group in groups:
+                for player in group:
+                    self._publish_position(player)
+                next_tick += slot_interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def publish_warmup_position(self, index: int) -> int:
+        """Publish the next position to one player, outside the measurement."""
+        player = self.players[index]
+        with self._lock:
+            player.position += 1
+            position = player.position
+        self._client.publish(player.topic("position"), str(position), qos=0)
+        return position
+
+    def pop_sent(self, unique_id_index: int, position: int) -> float | None:
+        """Return (and forget) the send time for a position value."""
+        player = self.players[unique_id_index]
+        with self._lock:
+            return player.sent.pop(position, None)
+
+    def _publish_position(self, player: SimulatedPlayer) -> None:
+        with self._lock:
+            player.position += 1
+            position = player.position
+            player.sent[position] = time.perf_counter()
+            self.published += 1
+        self._client.publish(player.topic("position"), str(position), qos=0)
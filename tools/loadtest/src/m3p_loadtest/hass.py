@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+
+from homeassistant import bootstrap
+from homeassistant.components import mqtt
+from homeassistant.components.mqtt.const import CONF_BROKER
+from homeassistant.config_entries import SOURCE_USER
+from homeassistant.const import CONF_PORT, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import entity_registry as er
+from homeassistant.runner import RuntimeConfig
+
+LOGGER = logging.getLogger("m3p_loadtest.hass")
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+INTEGRATION_DIR = REPO_ROOT / "custom_components" / "m3p"
+
+CONFIGURATION_YAML = """\
+homeassistant:
+  name: M3P Loadtest
+  latitude: 0
+  longitude: 0
+  elevation: 0
+  unit_system: metric
+  time_zone: UTC
+
+logger:
+  default: {log_level}
+"""
+
+
+def prepare_config_dir(config_dir: Path, log_level: str = "warning") -> None:
+    """Create a minimal HA config dir with the m3p integration linked in."""
+    custom_components = config_dir / "custom_components"
+    custom_components.mkdir(parents=True, exist_ok=True)
+    link = custom_components / "m3p"
+    if not link.exists():
+        link.symlink_to(INTEGRATION_DIR, target_is_directory=True)
+
+    config_yaml = config_dir / "configuration.yaml"
+    if not config_yaml.exists():
+        config_yaml.write_text(CONFIGURATION_YAML.format(log_level=log_level))
+
+
+async def async_start_hass(config_dir: Path) -> HomeAssistant:
+    runtime_config = RuntimeConfig(
+        config_dir=str(config_dir), skip_pip=True, log_no_color=True
+    )
+    hass = await bootstrap.async_setup_hass(runtime_config)
+    if hass is None:
+        raise RuntimeError("Home Assistant failed to bootstrap")
+    await hass.async_start()
+    return hass
+
+
+async def async_configure_mqtt(hass: HomeAssistant, host: str, port: int) -> None:
+    """Point HA's MQTT integration at the embedded broker (first boot only)."""
+    if not hass.config_entries.async_entries(mqtt.DOMAIN):
+        result = await hass.config_entries.flow.async_init(
+            mqtt.DOMAIN, context={"source": SOURCE_USER}
+        )
+        if result["type"] is FlowResultType.FORM:
+            result = await hass.config_entries.flow.async_configure(
+                result["flow_id"], {CONF_BROKER: host, CONF_PORT: port}
+            )
+        if result["type"] is not FlowResultType.CREATE_ENTRY:
+            raise RuntimeError(f"MQTT config flow did not create an entry: {result}")
+
+    if not await mqtt.async_wait_for_mqtt_client(hass):
+        raise RuntimeError("MQTT client did not become ready")
+
+
+async def async_wait_for_players(
+    hass: HomeAssistant,
+    unique_ids: list[str],
+    timeout: float,
+    poll_interval: float = 0.02,
+) -> dict[str, str]:
+    """Wait until every unique_id has an available m3p entity.
+
+    Returns a mapping of entity_id to unique_id.
+    """
+    registry = er.async_get(hass)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    found: dict[str, str] = {}
+    pending = list(unique_ids)
+
+    while True:
+        still_pending = []
+        for unique_id in pending:
+            entity_id = registry.async_get_entity_id("media_player", "m3p", unique_id)
+            state = hass.states.get(entity_id) if entity_id else None
+            if state is None or state.state == STATE_UNAVAILABLE:
+                still_pending.append(unique_id)
+                continue
+            found[entity_id] = unique_id
+        pending = still_pending
+
+        if not pending:
+            return found
+        if loop.time() > deadline:
+            raise TimeoutError(
+                f"Only {len(found)}/{len(unique_ids)} players became available"
+            )
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import functools
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+
+# Stage names, in the order they happen during startup.
+STAGES = (
+    "async_step_mqtt",
+    "setup_entry",
+    "setup_entry.wait_for_mqtt",
+    "platform_setup_entry",
+    "schema_validation",
+    "prepare_subscribe_topics",
+    "subscribe_topics",
+)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+    first_start: float | None = None
+    last_end: float | None = None
+
+    def record(self, started: float, ended: float) -> None:
+        elapsed = ended - started
+        self.calls += 1
+        self.total += elapsed
+        self.longest = max(self.longest, elapsed)
+        if self.first_start is None or started < self.first_start:
+            self.first_start = started
+        if self.last_end is None or ended > self.last_end:
+            self.last_end = ended
+
+    def as_dict(self, origin: float) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_ms": self.total * 1000,
+            "max_ms": self.longest * 1000,
+            "start_ms": None
+            if self.first_start is None
+            else (self.first_start - origin) * 1000,
+            "end_ms": None
+            if self.last_end is None
+            else (self.last_end - origin) * 1000,
+        }
+
+
+class StartupInstrumentation:
+    """Wraps the integration's setup path with timers.
+
+    Everything is patched at module/class attribute level, so the integration
+    code under test runs unmodified.
+    """
+
+    def __init__(self, origin: float) -> None:
+        self.origin = origin
+        self.stages = {name: StageStats() for name in STAGES}
+        self.entity_added: dict[str, float] = {}
+
+    def install(self) -> None:
+        from homeassistant.components import mqtt
+
+        from custom_components import m3p
+        from custom_components.m3p import config_flow, media_player
+
+        flow_cls = config_flow.MqttMediaPlayerConfigFlow
+        flow_cls.async_step_mqtt = self._wrap_async(
+            "async_step_mqtt", flow_cls.async_step_mqtt
+        )
+        m3p.async_setup_entry = self._wrap_async("setup_entry", m3p.async_setup_entry)
+        media_player.async_setup_entry = self._wrap_async(
+            "platform_setup_entry", media_player.async_setup_entry
+        )
+        media_player.DISCOVERY_SCHEMA = _TimedSchema(
+            media_player.DISCOVERY_SCHEMA, self.stages["schema_validation"]
+        )
+
+        entity_cls = media_player.MqttMediaPlayer
+        entity_cls._prepare_subscribe_topics = self._wrap_sync(
+            "prepare_subscribe_topics", entity_cls._prepare_subscribe_topics
+        )
+        entity_cls._subscribe_topics = self._wrap_async(
+            "subscribe_topics", entity_cls._subscribe_topics
+        )
+
+        original_added = entity_cls.async_added_to_hass
+
+        async def async_added_to_hass(entity: Any) -> None:
+            await original_added(entity)
+            self.entity_added[entity.unique_id] = time.perf_counter()
+
+        entity_cls.async_added_to_hass = async_added_to_hass
+
+        original_wait = mqtt.async_wait_for_mqtt_client
+        wait_stats = self.stages["setup_entry.wait_for_mqtt"]
+
+        def async_wait_for_mqtt_client(*args: Any, **kwargs: Any) -> Any:
+            if sys._getframe(1).f_globals.get("__name__") != m3p.__name__:
+                return original_wait(*args, **kwargs)
+            return _timed_call(wait_stats, original_wait, *args, **kwargs)
+
+        mqtt.async_wait_for_mqtt_client = async_wait_for_mqtt_client
+
+    def report(self) -> dict[str, Any]:
+        return {name: stats.as_dict(self.origin) for name, stats in self.stages.items()}
+
+    def _wrap_async(self, stage: str, func: Any) -> Any:
+        stats = self.stages[stage]
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await _timed_call(stats, func, *args, **kwargs)
+
+        return wrapper
+
+    def _wrap_sync(self, stage: str, func: Any) -> Any:
+        stats = self.stages[stage]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record(started, time.perf_counter())
+
+        return wrapper
+
+
+async def _timed_call(stats: StageStats, func: Any, *args: Any, **kwargs: Any) -> Any:
+    started = time.perf_counter()
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        stats.record(started, time.perf_counter())
+
+
+class _TimedSchema:
+    def __init__(self, schema: Any, stats: StageStats) -> None:
+        self._schema = schema
+        self._stats = stats
+
+    def __call__(self, data: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return self._schema(data)
+        finally:
+            self._stats.record(started, time.perf_counter())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._schema, name)
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import functools
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .broker import EmbeddedBroker
+from .fleet import SimulatedFleet
+
+REPORT_PREFIX = "M3P_MEMORY_REPORT "
+PHASE_PREFIX = "M3P_MEMORY_PHASE "
+
+# Per-entity breakdown, in attribution order. An object reachable from more
+# than one category is only counted in the first.
+CATEGORIES = ("artwork", "metadata_strings", "config", "subscriptions", "state")
+
+
+@dataclass(frozen=True)
+class MemoryOptions:
+    players: int
+    rounds: int
+    artwork_kib: int
+    position_seconds: float
+    budget_kib: float
+    timeout: float
+    log_level: str
+
+
+@dataclass(frozen=True)
+class MemoryChildOptions:
+    config_dir: Path
+    broker_host: str
+    broker_port: int
+    players: int
+    rounds: int
+    timeout: float
+    traceback_frames: int
+    log_level: str
+
+
+def track_title(round_index: int, player_index: int) -> str:
+    return f"Track {round_index}-{player_index}"
+
+
+def artwork_data_uri(size_kib: int) -> str:
+    # Random bytes do not compress, like real album art.
+    encoded = base64.b64encode(os.urandom(size_kib * 1024)).decode("ascii")
+    return f"data:image/png;base64,{encoded}"
+
+
+def run_memory(options: MemoryOptions) -> int:
+    """Drive traffic from this process while HA runs in a traced child.
+
+    The broker and the fleet's paho client stay out of the measured process,
+    so retained messages held by the broker are not mistaken for HA memory.
+    """
+    broker = EmbeddedBroker()
+    broker.start()
+    fleet = SimulatedFleet(broker.host, broker.port, options.players)
+    fleet.connect()
+    try:
+        with tempfile.TemporaryDirectory(prefix="m3p-memory-") as tmp:
+            child = _spawn_child(
+                MemoryChildOptions(
+                    config_dir=Path(tmp),
+                    broker_host=broker.host,
+                    broker_port=broker.port,
+                    players=options.players,
+                    rounds=options.rounds,
+                    timeout=options.timeout,
+                    traceback_frames=25,
+                    log_level=options.log_level,
+                )
+            )
+            try:
+                _expect_phase(child, "discovery")
+                fleet.publish_discovery()
+                _expect_phase(child, "traffic")
+                for round_index in range(options.rounds):
+                    infos = []
+                    for player in fleet.players:
+                        infos.extend(
+                            fleet.publish_track(
+                                player,
+                                track_title(round_index, player.index),
+                                artwork_data_uri(options.artwork_kib),
+                            )
+                        )
+                    for info in infos:
+                        info.wait_for_publish(timeout=60)
+                fleet.run_position_traffic(
+                    1.0, options.position_seconds, threading.Event()
+                )
+                child.stdin.write("done\n")
+                child.stdin.flush()
+                report = _read_report(child)
+            finally:
+                if child.poll() is None:
+                    child.wait(timeout=options.timeout)
+    finally:
+        fleet.disconnect()
+        broker.stop()
+
+    return _print_report(report, options)
+
+
+def _spawn_child(options: MemoryChildOptions) -> subprocess.Popen[str]:
+    cmd = [
+        sys.executable,
+        "-m",
+        "m3p_loadtest",
+        "--config-dir",
+        str(options.config_dir),
+        "--log-level",
+        options.log_level,
+        "memory-child",
+        "--broker-host",
+        options.broker_host,
+        "--broker-port",
+        str(options.broker_port),
+        "--players",
+        str(options.players),
+        "--rounds",
+        str(options.rounds),
+        "--timeout",
+        str(options.timeout),
+        "--traceback-frames",
+        str(options.traceback_frames),
+    ]
+    return subprocess.Popen(
+        cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+
+
+def _expect_phase(child: subprocess.Popen[str], phase: str) -> None:
+    for line in child.stdout:
+        if line.startswith(PHASE_PREFIX):
+            received = line.removeprefix(PHASE_PREFIX).strip()
+            if received != phase:
+                raise RuntimeError(f"expected phase {phase!r}, got {received!r}")
+            return
+    raise RuntimeError(f"memory child exited before phase {phase!r}")
+
+
+def _read_report(child: subprocess.Popen[str]) -> dict[str, Any]:
+    for line in child.stdout:
+        if line.startswith(REPORT_PREFIX):
+            return json.loads(line.removeprefix(REPORT_PREFIX))
+    raise RuntimeError("memory child exited without a report")
+
+
+def _print_report(report: dict[str, Any], options: MemoryOptions) -> int:
+    per_entity = report["per_entity_bytes"]
+    print(f"players:             {report['players']}")
+    print(f"artwork per track:   {options.artwork_kib} KiB (x{options.rounds})")
+    print(f"retained total:      {report['retained_bytes'] / 1024:.1f} KiB")
+    print(f"retained per entity: {per_entity / 1024:.1f} KiB")
+    print("breakdown per entity:")
+    attributed = 0.0
+    for category in CATEGORIES:
+        value = report["breakdown_per_entity"][category]
+        attributed += value
+        print(f"  {category:<18} {value / 1024:>9.1f} KiB")
+    print(f"  {'other':<18} {(per_entity - attributed) / 1024:>9.1f} KiB")
+    print("top allocation sites:")
+    for site in report["top_sites"]:
+        print(f"  {site['size_diff'] / 1024:>9.1f} KiB  {site['where']}")
+
+    budget = options.budget_kib * 1024
+    if per_entity > budget:
+        print(
+            f"FAIL: {per_entity / 1024:.1f} KiB per entity exceeds budget "
+            f"of {options.budget_kib:.1f} KiB"
+        )
+        return 1
+    print(f"PASS (budget {options.budget_kib:.1f} KiB per entity)")
+    return 0
+
+
+def run_memory_child(options: MemoryChildOptions) -> int:
+    return asyncio.run(_async_memory_child(options))
+
+
+async def _async_memory_child(options: MemoryChildOptions) -> int:
+    from homeassistant.helpers import entity_platform
+
+    from .hass import (
+        async_configure_mqtt,
+        async_start_hass,
+        async_wait_for_players,
+        prepare_config_dir,
+    )
+
+    prepare_config_dir(options.config_dir, options.log_level)
+    hass = await async_start_hass(options.config_dir)
+    loop = asyncio.get_running_loop()
+    try:
+        await async_configure_mqtt(hass, options.broker_host, options.broker_port)
+
+        gc.collect()
+        tracemalloc.start(options.traceback_frames)
+        baseline = tracemalloc.take_snapshot()
+
+        _signal_phase("discovery")
+        unique_ids = [f"m3p-loadtest-{index:04d}" for index in range(options.players)]
+        players = await async_wait_for_players(hass, unique_ids, options.timeout)
+
+        _signal_phase("traffic")
+        await loop.run_in_executor(None, sys.stdin.readline)
+        index_by_unique_id = {unique_id: i for i, unique_id in enumerate(unique_ids)}
+        final_titles = {
+            entity_id: track_title(options.rounds - 1, index_by_unique_id[unique_id])
+            for entity_id, unique_id in players.items()
+        }
+        await _async_wait_for_titles(hass, final_titles, options.timeout)
+        await asyncio.sleep(1)
+
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        entities = [
+            entity
+            for platform in entity_platform.async_get_platforms(hass, "m3p")
+            for entity in platform.entities.values()
+        ]
+        breakdown = _breakdown(hass, entities)
+        tracemalloc.stop()
+    finally:
+        await hass.async_stop()
+
+    retained = sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+    top_sites = [
+        {"where": str(stat.traceback[0]), "size_diff": stat.size_diff}
+        for stat in snapshot.compare_to(baseline, "lineno")[:10]
+    ]
+    count = len(entities) or 1
+    report = {
+        "players": len(entities),
+        "retained_bytes": retained,
+        "per_entity_bytes": retained / count,
+        "breakdown_per_entity": {
+            category: size / count for category, size in breakdown.items()
+        },
+        "top_sites": top_sites,
+    }
+    print(REPORT_PREFIX + json.dumps(report), flush=True)
+    return 0
+
+
+def _signal_phase(phase: str) -> None:
+    print(PHASE_PREFIX + phase, flush=True)
+
+
+async def _async_wait_for_titles(
+    hass: Any, titles: dict[str, str], timeout: float
+) -> None:
+    async with asyncio.timeout(timeout):
+        while True:
+            pending = [
+                entity_id
+                for entity_id, title in titles.items()
+                if (state := hass.states.get(entity_id)) is None
+                or state.attributes.get("media_title") != title
+            ]
+            if not pending:
+                return
+            await asyncio.sleep(0.1)
+
+
+def _breakdown(hass: Any, entities: list[Any]) -> dict[str, int]:
+    seen: set[int] = set()
+    totals = dict.fromkeys(CATEGORIES, 0)
+    for entity in entities:
+        roots = {
+            "artwork": [entity._attr_media_image_url],
+            "metadata_strings": [
+                entity._attr_media_title,
+                entity._attr_media_artist,
+                entity._attr_media_album_name,
+            ],
+            "config": [
+                entity._config,
+                getattr(entity, "_discovery_data", None),
+                entity.platform.config_entry.data,
+            ],
+            "subscriptions": [
+                entity._sub_state,
+                getattr(entity, "_subscriptions", None),
+            ],
+            "state": [hass.states.get(entity.entity_id)],
+        }
+        for category in CATEGORIES:
+            totals[category] += sum(deep_sizeof(root, seen) for root in roots[category])
+    return totals
+
+
+@functools.cache
+def _stop_types() -> tuple[type, ...]:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HassJob, HomeAssistant
+    from homeassistant.helpers.entity import Entity
+
+    return (
+        HomeAssistant,
+        Entity,
+        ConfigEntry,
+        HassJob,
+        type,
+        types.ModuleType,
+        types.FunctionType,
+        types.BuiltinFunctionType,
+        types.MethodType,
+        functools.partial,
+    )
+
+
+def deep_sizeof(root: Any, seen: set[int]) -> int:
+    """Approximate the memory reachable from ``root``.
+
+    Traversal stops at shared infrastructure (hass, entities, callbacks), so
+    the result is what the object owns rather than everything it can reach.
+    """
+    stop_types = _stop_types()
+    size = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, stop_types):
+            continue
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool)):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                slots = getattr(cls, "__slots__", ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return size
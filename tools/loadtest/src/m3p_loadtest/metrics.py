@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile; returns 0.0 for an empty sample set."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes a sleeping task."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self._interval = interval
+        self._task: asyncio.Task[None] | None = None
+        self.samples: list[float] = []
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self._interval)
+            self.samples.append(max(0.0, loop.time() - started - self._interval))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .broker import EmbeddedBroker
+from .fleet import SimulatedFleet
+from .instrument import STAGES
+
+REPORT_PREFIX = "M3P_STARTUP_REPORT "
+
+
+@dataclass(frozen=True)
+class StartupOptions:
+    player_counts: list[int]
+    restarts: int
+    timeout: float
+    log_level: str
+
+
+@dataclass(frozen=True)
+class StartupChildOptions:
+    config_dir: Path
+    broker_host: str
+    broker_port: int
+    players: int
+    timeout: float
+    log_level: str
+
+
+def run_startup(options: StartupOptions) -> int:
+    """Benchmark cold discovery and warm restarts for each player count."""
+    failed = False
+    for players in options.player_counts:
+        broker = EmbeddedBroker()
+        broker.start()
+        fleet = SimulatedFleet(broker.host, broker.port, players)
+        try:
+            fleet.connect()
+            fleet.publish_discovery()
+            fleet.disconnect()
+            with tempfile.TemporaryDirectory(prefix="m3p-startup-") as tmp:
+                child = StartupChildOptions(
+                    config_dir=Path(tmp),
+                    broker_host=broker.host,
+                    broker_port=broker.port,
+                    players=players,
+                    timeout=options.timeout,
+                    log_level=options.log_level,
+                )
+                cold = _spawn_child(child)
+                warm = [_spawn_child(child) for _ in range(options.restarts)]
+        except RuntimeError as err:
+            print(f"N={players}: FAIL ({err})")
+            failed = True
+            continue
+        finally:
+            broker.stop()
+        _print_report(players, cold, warm)
+
+    return 1 if failed else 0
+
+
+def _spawn_child(options: StartupChildOptions) -> dict[str, Any]:
+    # Every boot gets a fresh interpreter so import cost and module state match
+    # a real HA restart.
+    cmd = [
+        sys.executable,
+        "-m",
+        "m3p_loadtest",
+        "--config-dir",
+        str(options.config_dir),
+        "--log-level",
+        options.log_level,
+        "startup-child",
+        "--broker-host",
+        options.broker_host,
+        "--broker-port",
+        str(options.broker_port),
+        "--players",
+        str(options.players),
+        "--timeout",
+        str(options.timeout),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith(REPORT_PREFIX):
+            return json.loads(line.removeprefix(REPORT_PREFIX))
+    sys.stderr.write(result.stderr[-4000:])
+    raise RuntimeError(f"startup child exited with {result.returncode}")
+
+
+def _print_report(
+    players: int, cold: dict[str, Any], warm: list[dict[str, Any]]
+) -> None:
+    print(f"\n=== N={players} ===")
+    print(f"cold boot (first discovery): {cold['ready_ms']:.0f} ms")
+    if not warm:
+        return
+    ready = [run["ready_ms"] for run in warm]
+    print(
+        f"warm restart: median {statistics.median(ready):.0f} ms "
+        f"(min {min(ready):.0f}, max {max(ready):.0f}, runs {len(ready)})"
+    )
+    print(
+        f"  {'stage':<36} {'calls':>6} {'sum ms':>10} {'max ms':>9} "
+        f"{'first ms':>9} {'last ms':>9}"
+    )
+    for stage in STAGES:
+        runs = [run["stages"][stage] for run in warm]
+        calls = statistics.median(run["calls"] for run in runs)
+        if not calls:
+            continue
+        print(
+            f"  {stage:<36} {calls:>6.0f} "
+            f"{statistics.median(run['total_ms'] for run in runs):>10.1f} "
+            f"{statistics.median(run['max_ms'] for run in runs):>9.1f} "
+            f"{statistics.median(run['start_ms'] for run in runs):>9.0f} "
+            f"{statistics.median(run['end_ms'] for run in runs):>9.0f}"
+        )
+
+
+def run_startup_child(options: StartupChildOptions) -> int:
+    origin = time.perf_counter()
+    return asyncio.run(_async_startup_child(options, origin))
+
+
+async def _async_startup_child(options: StartupChildOptions, origin: float) -> int:
+    from .hass import (
+        async_configure_mqtt,
+        async_start_hass,
+        async_wait_for_players,
+        prepare_config_dir,
+    )
+    from .instrument import StartupInstrumentation
+
+    prepare_config_dir(options.config_dir, options.log_level)
+    sys.path.insert(0, str(options.config_dir))
+    instrumentation = StartupInstrumentation(origin)
+    instrumentation.install()
+
+    unique_ids = [f"m3p-loadtest-{index:04d}" for index in range(options.players)]
+    hass = await async_start_hass(options.config_dir)
+    try:
+        await async_configure_mqtt(hass, options.broker_host, options.broker_port)
+        await async_wait_for_players(hass, unique_ids, options.timeout)
+        ready = time.perf_counter()
+    finally:
+        await hass.async_stop()
+
+    # The poll above is coarse; when every entity reported in, use the moment
+    # the last one finished async_added_to_hass instead.
+    if len(instrumentation.entity_added) >= options.players:
+        ready = max(instrumentation.entity_added.values())
+    report = {
+        "players": options.players,
+        "ready_ms": (ready - origin) * 1000,
+        "stages": instrumentation.report(),
+    }
+    print(REPORT_PREFIX + json.dumps(report), flush=True)
+    return 0
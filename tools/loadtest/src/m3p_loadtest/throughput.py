@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
+
+from .broker import EmbeddedBroker
+from .fleet import QUIET_WINDOW_SECONDS, SimulatedFleet
+from .hass import (
+    async_configure_mqtt,
+    async_start_hass,
+    async_wait_for_players,
+    prepare_config_dir,
+)
+from .metrics import LoopLagMonitor, percentile
+
+
+@dataclass(frozen=True)
+class ThroughputOptions:
+    players: int
+    rate_hz: float
+    duration: float
+    discovery_timeout: float
+    drain_seconds: float
+    min_delivery_ratio: float
+    max_p95_latency_ms: float
+    max_loop_lag_ms: float
+    config_dir: Path | None
+    log_level: str
+
+
+async def async_run_throughput(options: ThroughputOptions) -> int:
+    broker = EmbeddedBroker()
+    broker.start()
+    fleet = SimulatedFleet(broker.host, broker.port, options.players)
+
+    with tempfile.TemporaryDirectory(prefix="m3p-loadtest-") as tmp:
+        config_dir = options.config_dir or Path(tmp)
+        prepare_config_dir(config_dir, options.log_level)
+        hass = await async_start_hass(config_dir)
+        try:
+            await async_configure_mqtt(hass, broker.host, broker.port)
+            fleet.connect()
+
+            discovery_started = time.perf_counter()
+            fleet.publish_discovery()
+            players = await async_wait_for_players(
+                hass, fleet.unique_ids, options.discovery_timeout
+            )
+            discovery_seconds = time.perf_counter() - discovery_started
+            print(
+                f"discovered {len(players)} players via async_step_mqtt "
+                f"in {discovery_seconds:.2f}s"
+            )
+
+            warmup_started = time.perf_counter()
+            await _async_wait_for_subscriptions(
+                hass, fleet, players, options.discovery_timeout
+            )
+            print(
+                "position topics subscribed "
+                f"in {time.perf_counter() - warmup_started:.2f}s"
+            )
+
+            return await _async_measure(hass, fleet, players, options)
+        finally:
+            await hass.async_stop()
+            fleet.disconnect()
+            broker.stop()
+
+
+async def _async_wait_for_subscriptions(
+    hass: HomeAssistant,
+    fleet: SimulatedFleet,
+    players: dict[str, str],
+    timeout: float,
+    retry_interval: float = 0.25,
+) -> None:
+    """Wait until a position update reaches every player.
+
+    Entities are available before the MQTT client's batched subscriptions
+    reach the broker, so updates published straight away would be lost.
+    """
+    index_by_unique_id = {player.unique_id: player.index for player in fleet.players}
+    pending = {
+        entity_id: index_by_unique_id[unique_id]
+        for entity_id, unique_id in players.items()
+    }
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        sent = {
+            entity_id: fleet.publish_warmup_position(index)
+            for entity_id, index in pending.items()
+        }
+        await asyncio.sleep(retry_interval)
+        pending = {
+            entity_id: index
+            for entity_id, index in pending.items()
+            if (state := hass.states.get(entity_id)) is None
+            or state.attributes.get("media_position") != sent[entity_id]
+        }
+        if not pending:
+            return
+        if loop.time() > deadline:
+            raise TimeoutError(
+                f"Position updates did not reach {len(pending)}/{len(players)} players"
+            )
+
+
+async def _async_measure(
+    hass: HomeAssistant,
+    fleet: SimulatedFleet,
+    players: dict[str, str],
+    options: ThroughputOptions,
+) -> int:
+    index_by_unique_id = {player.unique_id: player.index for player in fleet.players}
+    index_by_entity = {
+        entity_id: index_by_unique_id[unique_id]
+        for entity_id, unique_id in players.items()
+    }
+    latencies: list[float] = []
+
+    @callback
+    def _state_changed(event: Event[EventStateChangedData]) -> None:
+        index = index_by_entity.get(event.data["entity_id"])
+        new_state = event.data["new_state"]
+        if index is None or new_state is None:
+            return
+        position = new_state.attributes.get("media_position")
+        if position is None:
+            return
+        sent = fleet.pop_sent(index, int(position))
+        if sent is not None:
+            latencies.append(time.perf_counter() - sent)
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+    lag = LoopLagMonitor()
+    lag.start()
+
+    stop_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="m3p-traffic")
+    started = time.perf_counter()
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            executor,
+            fleet.run_position_traffic,
+            options.rate_hz,
+            options.duration,
+            stop_event,
+        )
+        traffic_seconds = time.perf_counter() - started
+
+        drain_deadline = time.perf_counter() + options.drain_seconds
+        while len(latencies) < fleet.published and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.05)
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False)
+        unsub()
+        await lag.stop()
+
+    published = fleet.published
+    delivered = len(latencies)
+    delivery_ratio = delivered / published if published else 0.0
+    throughput = delivered / traffic_seconds if traffic_seconds else 0.0
+    p50 = percentile(latencies, 50) * 1000
+    p95 = percentile(latencies, 95) * 1000
+    p99 = percentile(latencies, 99) * 1000
+    lag_p99 = percentile(lag.samples, 99) * 1000
+    lag_max = max(lag.samples, default=0.0) * 1000
+
+    print(f"players:          {len(players)}")
+    print(f"quiet window:     {QUIET_WINDOW_SECONDS:g} s (reconnect_quiet_window)")
+    print(f"offered rate:     {options.rate_hz * len(players):.1f} msg/s")
+    print(f"published:        {published}")
+    print(f"delivered:        {delivered} ({delivery_ratio:.1%})")
+    print(f"ingest rate:      {throughput:.1f} msg/s")
+    print(f"latency p50/p95/p99: {p50:.1f} / {p95:.1f} / {p99:.1f} ms")
+    print(f"loop lag p99/max: {lag_p99:.1f} / {lag_max:.1f} ms")
+
+    failures = []
+    if delivery_ratio < options.min_delivery_ratio:
+        failures.append(
+            f"delivery ratio {delivery_ratio:.1%} < {options.min_delivery_ratio:.1%}"
+        )
+    if p95 > options.max_p95_latency_ms:
+        failures.append(f"p95 latency {p95:.1f}ms > {options.max_p95_latency_ms:.1f}ms")
+    if lag_max > options.max_loop_lag_ms:
+        failures.append(f"loop lag {lag_max:.1f}ms > {options.max_loop_lag_ms:.1f}ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS")
+    return 1 if failures else 0
@@ -0,0 +1 @@
+"""Offline analysis of captured M3P traffic."""
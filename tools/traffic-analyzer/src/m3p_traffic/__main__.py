@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from .analysis import ModelOptions, analyze
+from .reader import read_source
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="m3p-traffic",
+        description="Summarize captured m3p traffic or a raw MQTT broker dump.",
+    )
+    parser.add_argument(
+        "path", type=Path, help="m3p.capture_start file, or mosquitto_sub -v output"
+    )
+    parser.add_argument(
+        "--top", type=int, default=20, help="Topics to list, by bytes (default: 20)"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the full report as JSON"
+    )
+    parser.add_argument(
+        "--topic-rate-limit",
+        type=float,
+        default=0.0,
+        help="topic_rate_limit to model, 0 to disable (default: 0)",
+    )
+    parser.add_argument(
+        "--entity-rate-limit",
+        type=float,
+        default=0.0,
+        help="entity_rate_limit to model, 0 to disable (default: 0)",
+    )
+    parser.add_argument(
+        "--reconnect-quiet-window",
+        type=float,
+        default=0.0,
+        help="reconnect_quiet_window to model, 0 to disable (default: 0)",
+    )
+    return parser
+
+
+def _rate(value: float | None, unit: str) -> str:
+    return "n/a" if value is None else f"{value:.2f} {unit}"
+
+
+def _print_report(kind: str, report: dict[str, Any], top: int) -> None:
+    print(f"source:           {kind}")
+    print(f"received:         {report['messages']} ({report['bytes']} bytes)")
+    print(f"published:        {report['published']}")
+    if report["timed"]:
+        print(f"span:             {report['span_seconds']:.1f} s")
+    else:
+        print(
+            "span:             n/a (no timestamps: rates and rate limits not modelled)"
+        )
+    artwork_per_hour = report["artwork_bytes_per_hour"]
+    print(
+        f"artwork:          {report['artwork_bytes']} bytes"
+        f" ({_rate(artwork_per_hour and artwork_per_hour / 1e6, 'MB/h')})"
+    )
+
+    print("\npayload sizes:")
+    for bucket, count in report["size_histogram"].items():
+        print(f"  {bucket:>8}  {count}")
+
+    print("\ndevices:")
+    print(
+        f"  {'device':<40} {'msgs':>8} {'msg/s':>8} {'bytes/s':>10}"
+        f" {'writes':>8} {'naive':>8} {'limited':>8}"
+    )
+    for name, d in report["devices"].items():
+        rate = d["messages_per_second"]
+        byte_rate = d["bytes_per_second"]
+        print(
+            f"  {name[:40]:<40} {d['messages']:>8}"
+            f" {'n/a' if rate is None else f'{rate:.2f}':>8}"
+            f" {'n/a' if byte_rate is None else f'{byte_rate:.0f}':>10}"
+            f" {d['writes']:>8} {d['naive_writes']:>8} {d['rate_limited']:>8}"
+        )
+
+    topics = sorted(report["topics"].items(), key=lambda item: -item[1]["bytes"])
+    print(f"\ntopics (top {min(top, len(topics))} by bytes):")
+    print(
+        f"  {'topic':<48} {'msgs':>8} {'msg/s':>8} {'p50':>7} {'p95':>7}"
+        f" {'max':>8} {'dup':>6}"
+    )
+    for topic, t in topics[:top]:
+        rate = t["messages_per_second"]
+        print(
+            f"  {topic[:48]:<48} {t['messages']:>8}"
+            f" {'n/a' if rate is None else f'{rate:.2f}':>8}"
+            f" {t['size_p50']:>7} {t['size_p95']:>7} {t['size_max']:>8}"
+            f" {t['duplicate_ratio']:>6.1%}"
+        )
+    print(
+        "\nwrites: state writes the m3p handlers would perform after the settle"
+        " buffer and rate limits; naive: one per valid message."
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    source = read_source(args.path)
+    report = analyze(
+        source.messages,
+        ModelOptions(
+            topic_rate=args.topic_rate_limit,
+            entity_rate=args.entity_rate_limit,
+            quiet_window=args.reconnect_quiet_window,
+        ),
+    )
+    if args.json:
+        print(json.dumps({"source": source.kind, **report}, indent=2))
+    else:
+        _print_report(source.kind, report, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+from .reader import Message
+
+# Options whose handlers in media_player._prepare_subscribe_topics write state
+# once per valid message
+WRITING_KEYS = frozenset(
+    {
+        "state_topic",
+        "volume_level_topic",
+        "media_title_topic",
+        "media_artist_topic",
+        "media_album_name_topic",
+        "media_duration_topic",
+        "media_position_topic",
+        "media_image_url_topic",
+        "media_image_remotely_accessible_topic",
+        "combined_state_topic",
+    }
+)
+# Options that bypass the settle buffer and rate limits
+UNLIMITED_KEYS = frozenset(
+    {
+        "command_ack_topic",
+        "library_index_topic",
+        "library_delta_topic",
+        "queue_topic",
+        "queue_delta_topic",
+    }
+)
+ARTWORK_KEYS = frozenset({"media_image_url_topic"})
+PLAYER_STATES = frozenset(
+    {"off", "on", "idle", "playing", "paused", "standby", "buffering"}
+)
+SIZE_BUCKETS = [64, 256, 1024, 4096, 16384, 65536]
+
+
+@dataclass(frozen=True)
+class ModelOptions:
+    topic_rate: float = 0.0
+    entity_rate: float = 0.0
+    burst_seconds: float = 2.0
+    quiet_window: float = 0.0
+
+
+@dataclass
+class TopicStats:
+    device: str
+    key: str | None
+    messages: int = 0
+    bytes: int = 0
+    duplicates: int = 0
+    sizes: list[int] = field(default_factory=list)
+    last: str | None = None
+
+
+@dataclass
+class DeviceStats:
+    messages: int = 0
+    published: int = 0
+    bytes: int = 0
+    naive_writes: int = 0
+    writes: int = 0
+    limited: int = 0
+
+
+class _Bucket:
+    __slots__ = ("burst", "rate", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def take(self, now: float) -> None:
+        self.refill(now)
+        self.tokens = max(0.0, self.tokens - 1)
+
+    def wait(self, now: float) -> float:
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class _WriteModel:
+    """Replays one device's messages through m3p's settle and rate limits.
+
+    Mirrors MqttMediaPlayer: a retained burst after subscribing is applied
+    with one write once it goes quiet; over-budget messages keep only the
+    latest value per topic, applied together with one write when the
+    buckets allow.
+    """
+
+    def __init__(self, options: ModelOptions, stats: DeviceStats) -> None:
+        self._options = options
+        self._stats = stats
+        self._topic_buckets: dict[str, _Bucket] = {}
+        self._entity_bucket: _Bucket | None = None
+        self._deferred: dict[str, bool] = {}
+        self._deferred_at: float | None = None
+        self._settle_writes = False
+        self._settle_last: float | None = None
+
+    def feed(self, ts: float, key: str, writes: bool, retain: bool) -> None:
+        self._flush_due(ts)
+        options = self._options
+        if (
+            options.quiet_window
+            and retain
+            and (
+                self._settle_last is None
+                or ts - self._settle_last <= options.quiet_window
+            )
+        ):
+            self._settle_writes |= writes
+            self._settle_last = ts
+            return
+        self._end_settle()
+
+        buckets = []
+        if options.topic_rate:
+            if key not in self._topic_buckets:
+                self._topic_buckets[key] = _Bucket(
+                    options.topic_rate, options.topic_rate * options.burst_seconds, ts
+                )
+            buckets.append(self._topic_buckets[key])
+        if options.entity_rate:
+            if self._entity_bucket is None:
+                self._entity_bucket = _Bucket(
+                    options.entity_rate, options.entity_rate * options.burst_seconds, ts
+                )
+            buckets.append(self._entity_bucket)
+        if all(bucket.wait(ts) == 0 for bucket in buckets):
+            for bucket in buckets:
+                bucket.take(ts)
+            self._deferred.pop(key, None)
+            self._stats.writes += writes
+            return
+        self._stats.limited += 1
+        self._deferred[key] = writes
+        if self._deferred_at is None:
+            self._deferred_at = ts + max(bucket.wait(ts) for bucket in buckets)
+
+    def finish(self) -> None:
+        self._end_settle()
+        self._flush_due(float("inf"))
+
+    def _end_settle(self) -> None:
+        if self._settle_last is not None:
+            self._stats.writes += self._settle_writes
+            self._settle_writes = False
+            self._settle_last = None
+
+    def _flush_due(self, ts: float) -> None:
+        if self._deferred_at is None or ts < self._deferred_at:
+            return
+        now = self._deferred_at
+        for key in self._deferred:
+            if bucket := self._topic_buckets.get(key):
+                bucket.take(now)
+            if self._entity_bucket is not None:
+                self._entity_bucket.take(now)
+        self._stats.writes += any(self._deferred.values())
+        self._deferred = {}
+        self._deferred_at = None
+
+
+def writes_state(message: Message) -> bool:
+    """Return True when m3p's handler for this message would write state."""
+    if message.key not in WRITING_KEYS:
+        return False
+    payload = message.payload
+    if payload is None or message.key == "combined_state_topic":
+        # Hashed captures: assume the payload was valid
+        return True
+    payload = payload.strip()
+    try:
+        if message.key == "state_topic":
+            return payload.lower() in PLAYER_STATES | {"unavailable", "unknown"}
+        if message.key == "volume_level_topic":
+            return 0.0 <= float(payload) <= 1.0
+        if message.key == "media_duration_topic":
+            return int(payload) >= 0
+        if message.key == "media_position_topic":
+            # A bare integer, or {"position": ..., "timestamp": ...}
+            if payload.startswith("{"):
+                position = float(json.loads(payload)["position"])
+            else:
+                position = int(payload)
+            return position >= 0
+    except (ValueError, TypeError, KeyError):
+        return False
+    return True
+
+
+def percentile(samples: list[int], pct: float) -> int:
+    """Nearest-rank percentile; returns 0 for an empty sample set."""
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def analyze(messages: list[Message], options: ModelOptions) -> dict[str, Any]:
+    topics: dict[str, TopicStats] = {}
+    devices: defaultdict[str, DeviceStats] = defaultdict(DeviceStats)
+    models: dict[str, _WriteModel] = {}
+    size_histogram = [0] * (len(SIZE_BUCKETS) + 1)
+    artwork_bytes = 0
+    timestamps = [m.ts for m in messages if m.ts is not None]
+    timed = len(timestamps) == len(messages) and bool(messages)
+    if timed:
+        messages = sorted(messages, key=lambda m: m.ts)
+
+    for message in messages:
+        device = devices[message.device]
+        if message.direction != "rx":
+            device.published += 1
+            continue
+        device.messages += 1
+        device.bytes += message.size
+        stats = topics.get(message.topic)
+        if stats is None:
+            stats = topics[message.topic] = TopicStats(message.device, message.key)
+        stats.messages += 1
+        stats.bytes += message.size
+        stats.sizes.append(message.size)
+        stats.duplicates += message.fingerprint == stats.last
+        stats.last = message.fingerprint
+        size_histogram[
+            next(
+                (i for i, limit in enumerate(SIZE_BUCKETS) if message.size <= limit),
+                len(SIZE_BUCKETS),
+            )
+        ] += 1
+        if message.key in ARTWORK_KEYS or message.fingerprint.startswith("data:image/"):
+            artwork_bytes += message.size
+
+        writes = writes_state(message)
+        device.naive_writes += writes
+        if message.key in UNLIMITED_KEYS or not message.key:
+            continue
+        if timed:
+            if message.device not in models:
+                models[message.device] = _WriteModel(options, device)
+            models[message.device].feed(message.ts, message.key, writes, message.retain)
+        else:
+            device.writes += writes
+
+    for model in models.values():
+        model.finish()
+
+    span = (max(timestamps) - min(timestamps)) if timed else 0.0
+    return {
+        "timed": timed,
+        "span_seconds": span,
+        "messages": sum(d.messages for d in devices.values()),
+        "published": sum(d.published for d in devices.values()),
+        "bytes": sum(d.bytes for d in devices.values()),
+        "artwork_bytes": artwork_bytes,
+        "artwork_bytes_per_hour": artwork_bytes / span * 3600 if span else None,
+        "size_histogram": dict(
+            zip(
+                [f"<={limit}" for limit in SIZE_BUCKETS] + [f">{SIZE_BUCKETS[-1]}"],
+                size_histogram,
+                strict=True,
+            )
+        ),
+        "devices": {
+            name: {
+                "messages": d.messages,
+                "published": d.published,
+                "bytes": d.bytes,
+                "messages_per_second": d.messages / span if span else None,
+                "bytes_per_second": d.bytes / span if span else None,
+                "naive_writes": d.naive_writes,
+                "writes": d.writes,
+                "rate_limited": d.limited,
+            }
+            for name, d in sorted(devices.items())
+        },
+        "topics": {
+            topic: {
+                "device": t.device,
+                "key": t.key,
+                "messages": t.messages,
+                "bytes": t.bytes,
+                "messages_per_second": t.messages / span if span else None,
+                "size_p50": percentile(t.sizes, 50),
+                "size_p95": percentile(t.sizes, 95),
+                "size_max": max(t.sizes),
+                "duplicate_ratio": t.duplicates / t.messages,
+            }
+            for topic, t in sorted(topics.items())
+        },
+    }
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+DISCOVERY_PREFIX = "homeassistant/media_player/"
+COMPONENTS_KEYS = ("components", "cmps")
+DEVICE_KEYS = ("device", "dev")
+PLATFORM_KEYS = ("platform", "p")
+TOPIC_BASE = "~"
+
+# Vendored from homeassistant.components.mqtt.abbreviations (2025.8.0),
+# topic options only, since the analyzer runs without Home Assistant.
+# custom_components/m3p/discovery.py expands keys with the full table.
+TOPIC_ABBREVIATIONS = {
+    "act_t": "action_topic",
+    "act_stat_t": "activity_state_topic",
+    "avty_t": "availability_topic",
+    "bri_cmd_t": "brightness_command_topic",
+    "bri_stat_t": "brightness_state_topic",
+    "clrm_stat_t": "color_mode_state_topic",
+    "clr_temp_cmd_t": "color_temp_command_topic",
+    "clr_temp_stat_t": "color_temp_state_topic",
+    "cmd_t": "command_topic",
+    "curr_hum_t": "current_humidity_topic",
+    "curr_temp_t": "current_temperature_topic",
+    "dir_cmd_t": "direction_command_topic",
+    "dir_stat_t": "direction_state_topic",
+    "dock_cmd_t": "dock_command_topic",
+    "fx_cmd_t": "effect_command_topic",
+    "fx_stat_t": "effect_state_topic",
+    "fan_mode_cmd_t": "fan_mode_command_topic",
+    "fan_mode_stat_t": "fan_mode_state_topic",
+    "hs_cmd_t": "hs_command_topic",
+    "hs_stat_t": "hs_state_topic",
+    "img_t": "image_topic",
+    "hum_cmd_t": "target_humidity_command_topic",
+    "hum_stat_t": "target_humidity_state_topic",
+    "json_attr_t": "json_attributes_topic",
+    "mode_cmd_t": "mode_command_topic",
+    "mode_stat_t": "mode_state_topic",
+    "osc_cmd_t": "oscillation_command_topic",
+    "osc_stat_t": "oscillation_state_topic",
+    "pause_cmd_t": "pause_command_topic",
+    "pct_cmd_t": "percentage_command_topic",
+    "pct_stat_t": "percentage_state_topic",
+    "pow_cmd_t": "power_command_topic",
+    "pr_mode_cmd_t": "preset_mode_command_topic",
+    "pr_mode_stat_t": "preset_mode_state_topic",
+    "rgb_cmd_t": "rgb_command_topic",
+    "rgb_stat_t": "rgb_state_topic",
+    "rgbw_cmd_t": "rgbw_command_topic",
+    "rgbw_stat_t": "rgbw_state_topic",
+    "rgbww_cmd_t": "rgbww_command_topic",
+    "rgbww_stat_t": "rgbww_state_topic",
+    "send_cmd_t": "send_command_topic",
+    "set_fan_spd_t": "set_fan_speed_topic",
+    "set_pos_t": "set_position_topic",
+    "pos_t": "position_topic",
+    "stat_t": "state_topic",
+    "strt_mw_cmd_t": "start_mowing_command_topic",
+    "swing_h_mode_cmd_t": "swing_horizontal_mode_command_topic",
+    "swing_h_mode_stat_t": "swing_horizontal_mode_state_topic",
+    "swing_mode_cmd_t": "swing_mode_command_topic",
+    "swing_mode_stat_t": "swing_mode_state_topic",
+    "temp_cmd_t": "temperature_command_topic",
+    "temp_hi_cmd_t": "temperature_high_command_topic",
+    "temp_hi_stat_t": "temperature_high_state_topic",
+    "temp_lo_cmd_t": "temperature_low_command_topic",
+    "temp_lo_stat_t": "temperature_low_state_topic",
+    "temp_stat_t": "temperature_state_topic",
+    "tilt_cmd_t": "tilt_command_topic",
+    "tilt_status_t": "tilt_status_topic",
+    "url_t": "url_topic",
+    "whit_cmd_t": "white_command_topic",
+    "xy_cmd_t": "xy_command_topic",
+    "xy_stat_t": "xy_state_topic",
+    "l_ver_t": "latest_version_topic",
+}
+
+# Last topic level -> the option it most likely belongs to, for dumps without
+# discovery configs (names used by tools/loadtest and common firmware)
+TOPIC_NAME_KEYS = {
+    "state": "state_topic",
+    "volume": "volume_level_topic",
+    "volume_level": "volume_level_topic",
+    "title": "media_title_topic",
+    "media_title": "media_title_topic",
+    "artist": "media_artist_topic",
+    "media_artist": "media_artist_topic",
+    "album": "media_album_name_topic",
+    "media_album_name": "media_album_name_topic",
+    "duration": "media_duration_topic",
+    "media_duration": "media_duration_topic",
+    "position": "media_position_topic",
+    "media_position": "media_position_topic",
+    "albumart": "media_image_url_topic",
+    "artwork": "media_image_url_topic",
+    "image": "media_image_url_topic",
+    "media_image_url": "media_image_url_topic",
+}
+
+
+@dataclass(slots=True)
+class Message:
+    ts: float | None
+    direction: str
+    device: str
+    topic: str
+    key: str | None
+    retain: bool
+    size: int
+    # Payload text, or its hash when only that was captured; compared to
+    # find repeated values
+    fingerprint: str
+    payload: str | None
+
+
+@dataclass(slots=True)
+class Source:
+    kind: str
+    messages: list[Message]
+
+
+def read_source(path: Path) -> Source:
+    """Read a capture file (m3p.capture_start) or a raw broker dump.
+
+    Raw dumps are `mosquitto_sub -v -t '#'` output, one `topic payload` per
+    line, optionally prefixed with a Unix timestamp (`-F '%U %t %p'`).
+    """
+    with path.open(encoding="utf-8", errors="replace") as file:
+        first = next((line for line in file if line.strip()), "")
+        file.seek(0)
+        if first.lstrip().startswith("{") and '"dir"' in first:
+            return Source("capture", list(_read_capture(file)))
+        return Source("dump", _read_dump(file))
+
+
+def _read_capture(lines) -> Iterator[Message]:
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        topic = record["topic"]
+        payload = record.get("payload")
+        yield Message(
+            ts=record.get("ts"),
+            direction=record.get("dir", "rx"),
+            device=record.get("entity") or _topic_parent(topic),
+            topic=topic,
+            key=record.get("key") or _guess_key(topic),
+            retain=bool(record.get("retain")),
+            size=record.get("len", 0),
+            fingerprint=record.get("hash") or payload or record.get("payload_b64", ""),
+            payload=payload,
+        )
+
+
+def _read_dump(lines) -> list[Message]:
+    parsed: list[tuple[float | None, str, str]] = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        ts: float | None = None
+        head, _, rest = line.partition(" ")
+        try:
+            ts = float(head)
+        except ValueError:
+            rest = line
+        topic, _, payload = rest.partition(" ")
+        parsed.append((ts, topic, payload))
+
+    # Discovery configs in the dump say which option each topic serves
+    topic_keys: dict[str, tuple[str, str]] = {}
+    for _, topic, payload in parsed:
+        if topic.startswith(DISCOVERY_PREFIX) and payload.startswith("{"):
+            topic_keys.update(_discovery_topics(topic, payload))
+
+    messages = []
+    for ts, topic, payload in parsed:
+        key, device = topic_keys.get(topic, (_guess_key(topic), _topic_parent(topic)))
+        messages.append(
+            Message(
+                ts=ts,
+                direction="rx",
+                device=device,
+                topic=topic,
+                key=key,
+                retain=False,
+                size=len(payload.encode("utf-8")),
+                fingerprint=payload,
+                payload=payload,
+            )
+        )
+    return messages
+
+
+def _discovery_topics(
+    discovery_topic: str, payload: str
+) -> Iterator[tuple[str, tuple[str, str]]]:
+    """Map each topic in a discovery config to its option and player.
+
+    Mirrors custom_components/m3p/discovery.py: abbreviated keys are
+    expanded, device payloads merge the shared options into each
+    media_player component, and only a leading or trailing ``~`` is
+    replaced with the topic base.
+    """
+    try:
+        config = json.loads(payload)
+    except ValueError:
+        return
+    if not isinstance(config, dict):
+        return
+    components = _first(config, COMPONENTS_KEYS)
+    if isinstance(components, dict):
+        skip = {*COMPONENTS_KEYS, *DEVICE_KEYS}
+        shared = {key: value for key, value in config.items() if key not in skip}
+        configs = [
+            {**shared, **component}
+            for component in components.values()
+            if isinstance(component, dict)
+            and _first(component, PLATFORM_KEYS) == "media_player"
+        ]
+    else:
+        configs = [config]
+    for component in configs:
+        base = component.get(TOPIC_BASE)
+        device = component.get("name") or discovery_topic.split("/")[2]
+        for key, value in component.items():
+            key = TOPIC_ABBREVIATIONS.get(key, key)
+            if key.endswith("_topic") and isinstance(value, str) and value:
+                yield _apply_topic_base(value, base), (key, device)
+
+
+def _first(config: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        if key in config:
+            return config[key]
+    return None
+
+
+def _apply_topic_base(topic: str, base: Any) -> str:
+    if not isinstance(base, str):
+        return topic
+    if topic[0] == TOPIC_BASE:
+        topic = f"{base}{topic[1:]}"
+    if topic[-1] == TOPIC_BASE:
+        topic = f"{topic[:-1]}{base}"
+    return topic
+
+
+def _topic_parent(topic: str) -> str:
+    return topic.rsplit("/", 1)[0]
+
+
+def _guess_key(topic: str) -> str | None:
+    return TOPIC_NAME_KEYS.get(topic.rsplit("/", 1)[-1])